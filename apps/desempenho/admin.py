@@ -1,28 +1,25 @@
 from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
+
+from atencion.models import normalizar_nombre
+from atencion.tareas import encolar_varios
 from .models import (
-    Coordinator,
-    Period,
     Function,
     KPI,
     Evaluation,
     KPIResult,
+    FunctionScore,
     Evidence,
 )
 
 
-@admin.register(Coordinator)
-class CoordinatorAdmin(admin.ModelAdmin):
-    list_display = ("full_name", "campus", "area", "is_active")
-    list_filter = ("campus", "area", "is_active")
-    search_fields = ("full_name", "email", "campus", "area")
-    ordering = ("full_name",)
-
-
-@admin.register(Period)
-class PeriodAdmin(admin.ModelAdmin):
-    list_display = ("year", "month", "closed")
-    list_filter = ("year", "closed")
-    ordering = ("-year", "-month")
+def _precalentar_periodos(period_ids):
+    # El rollup ya está hecho: solo se recalientan las filas del dashboard
+    encolar_varios(
+        "precalentar_periodo",
+        [{"periodo_id": pid, "rollup": False} for pid in set(period_ids)],
+    )
 
 
 @admin.register(Function)
@@ -37,6 +34,8 @@ class KPIAdmin(admin.ModelAdmin):
     list_display = ("name", "function", "target", "weight")
     list_filter = ("function",)
     search_fields = ("name", "function__name")
+    list_select_related = ("function",)
+    autocomplete_fields = ("function",)
     ordering = ("function__name", "-weight", "name")
 
 
@@ -50,41 +49,81 @@ class KPIResultInline(admin.TabularInline):
     extra = 0
     fields = ("kpi", "value", "score")
     readonly_fields = ("score",)
+    autocomplete_fields = ("kpi",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("kpi__function")
+
+
+class FunctionScoreInline(admin.TabularInline):
+    # Subtotales del rollup: se recalculan, no se editan
+    model = FunctionScore
+    extra = 0
+    fields = ("function", "score")
+    readonly_fields = ("function", "score")
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("function")
 
 
 @admin.register(Evaluation)
 class EvaluationAdmin(admin.ModelAdmin):
     list_display = ("coordinator", "period", "total_score", "created_at")
-    list_filter = ("period__year", "period__month", "coordinator__campus", "coordinator__area")
-    search_fields = ("coordinator__full_name",)
-    ordering = ("-period__year", "-period__month", "coordinator__full_name")
-    inlines = [KPIResultInline]
+    list_filter = ("period__anio", "period__mes", "coordinator__sede", "coordinator__area_academica")
+    search_fields = ("coordinator__nombre_normalizado",)
+    ordering = ("-period__anio", "-period__mes", "coordinator__nombre_completo")
+    list_select_related = ("coordinator", "period")
+    autocomplete_fields = ("coordinator", "period")
+    show_full_result_count = False
+    inlines = [FunctionScoreInline, KPIResultInline]
 
     actions = ["recalcular_scores"]
 
+    def get_search_results(self, request, queryset, search_term):
+        # La columna buscada está normalizada (sin tildes ni mayúsculas)
+        return super().get_search_results(request, queryset, normalizar_nombre(search_term))
+
     @admin.action(description="Recalcular score total de evaluaciones seleccionadas")
     def recalcular_scores(self, request, queryset):
-        for ev in queryset:
-            ev.recalc_score()
+        n = Evaluation.recalc_scores(queryset)
+        _precalentar_periodos(queryset.values_list("period_id", flat=True))
+        self.message_user(request, f"Scores recalculados: {n}")
 
 
 @admin.register(KPIResult)
 class KPIResultAdmin(admin.ModelAdmin):
     list_display = ("evaluation", "kpi", "value", "score")
-    list_filter = ("kpi__function", "evaluation__period__year", "evaluation__period__month")
-    search_fields = ("evaluation__coordinator__full_name", "kpi__name", "kpi__function__name")
-    ordering = ("-evaluation__period__year", "-evaluation__period__month")
+    list_filter = ("kpi__function", "evaluation__period__anio", "evaluation__period__mes")
+    search_fields = ("evaluation__coordinator__nombre_completo", "kpi__name", "kpi__function__name")
+    ordering = ("-evaluation__period__anio", "-evaluation__period__mes")
+    list_select_related = ("evaluation__coordinator", "evaluation__period", "kpi__function")
+    autocomplete_fields = ("evaluation", "kpi")
+    show_full_result_count = False
     inlines = [EvidenceInline]
     actions = ["calcular_scores"]
 
     @admin.action(description="Calcular score (y recalcular evaluación) para KPIResults seleccionados")
     def calcular_scores(self, request, queryset):
-        for r in queryset:
-            r.calculate_score()
+        n = KPIResult.calculate_scores(queryset)
+        _precalentar_periodos(queryset.values_list("evaluation__period_id", flat=True))
+        self.message_user(request, f"Scores calculados; evaluaciones recalculadas: {n}")
 
 
 @admin.register(Evidence)
 class EvidenceAdmin(admin.ModelAdmin):
-    list_display = ("description", "kpi_result", "created_at")
+    list_display = ("description", "kpi_result", "created_at", "download")
     list_filter = ("created_at", "kpi_result__kpi__function")
     search_fields = ("description", "kpi_result__kpi__name")
+    list_select_related = ("kpi_result__kpi",)
+    autocomplete_fields = ("kpi_result",)
+    show_full_result_count = False
+
+    @admin.display(description="Archivo")
+    def download(self, obj):
+        if not obj.file:
+            return "—"
+        return format_html('<a href="{}">Descargar</a>', reverse("desempenho:evidence_download", args=[obj.pk]))
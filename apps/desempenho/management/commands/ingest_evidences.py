@@ -0,0 +1,42 @@
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.desempenho.models import Evidence
+from atencion.models import Periodo
+from atencion.tareas import encolar
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga evidencias desde un ZIP para un periodo mensual. Nombres de archivo: "
+        "<coordinador_id>/<kpi_id>[_descripcion].ext o <coordinador_id>_<kpi_id>[_descripcion].ext"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("year", type=int)
+        parser.add_argument("month", type=int)
+        parser.add_argument("archive", help="Ruta del archivo ZIP")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            period = Periodo.objects.get(anio=options["year"], mes=options["month"])
+        except Periodo.DoesNotExist:
+            raise CommandError(f"No existe el periodo {options['month']:02d}-{options['year']}")
+
+        try:
+            stats = Evidence.ingest_zip(period, options["archive"], batch_size=options["batch_size"])
+        except (OSError, zipfile.BadZipFile) as e:
+            raise CommandError(f"No se pudo leer el ZIP: {e}")
+        if stats["created"]:
+            # Carga mensual en lote: dashboard del periodo recalentado (el rollup no cambia)
+            encolar("precalentar_periodo", periodo_id=period.id, rollup=False)
+
+        for name in stats["unmatched"]:
+            self.stderr.write(f"Sin KPIResult en {period}: {name}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Evidencias creadas en {period}: {stats['created']} | "
+            f"duplicadas: {stats['duplicates']} | demasiado grandes: {stats['too_large']} | "
+            f"sin KPIResult: {len(stats['unmatched'])}"
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.desempenho.models import Evaluation
+from atencion.models import Periodo
+from atencion.tareas import encolar
+
+
+class Command(BaseCommand):
+    help = "Recalcula el rollup KPI -> Función -> Evaluación de un periodo mensual"
+
+    def add_arguments(self, parser):
+        parser.add_argument("year", type=int)
+        parser.add_argument("month", type=int)
+
+    def handle(self, *args, **options):
+        try:
+            period = Periodo.objects.get(anio=options["year"], mes=options["month"])
+        except Periodo.DoesNotExist:
+            raise CommandError(f"No existe el periodo {options['month']:02d}-{options['year']}")
+
+        n = Evaluation.recalc_period(period)
+        encolar("precalentar_periodo", periodo_id=period.id, rollup=False)
+        self.stdout.write(self.style.SUCCESS(f"Evaluaciones recalculadas en {period}: {n}"))
@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Paso 1/3 de la unificación con atencion: FKs nuevas (aún opcionales)
+    hacia los modelos canónicos atencion.Coordinador y atencion.Periodo.
+    """
+
+    dependencies = [
+        ("atencion", "0009_coordinador_email_periodo_mes"),
+        ("desempenho", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="evaluation",
+            name="coordinador_canonico",
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.CASCADE, related_name="+", to="atencion.coordinador"
+            ),
+        ),
+        migrations.AddField(
+            model_name="evaluation",
+            name="periodo_canonico",
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.CASCADE, related_name="+", to="atencion.periodo"
+            ),
+        ),
+    ]
@@ -0,0 +1,80 @@
+import calendar
+import datetime
+import unicodedata
+
+from django.db import migrations
+
+
+def _normalizar(texto):
+    # Igual que atencion.models.normalizar_nombre
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_tildes.casefold().split())
+
+
+def mapear(apps, schema_editor):
+    """
+    Paso 2/3: cada Coordinator se asocia al Coordinador con el mismo nombre
+    normalizado (o se crea) y cada Period (año, mes) al Periodo mensual.
+    """
+    db = schema_editor.connection.alias
+    Coordinator = apps.get_model("desempenho", "Coordinator")
+    Period = apps.get_model("desempenho", "Period")
+    Evaluation = apps.get_model("desempenho", "Evaluation")
+    Coordinador = apps.get_model("atencion", "Coordinador")
+    Periodo = apps.get_model("atencion", "Periodo")
+
+    por_nombre = {}
+    for c in Coordinador.objects.using(db).order_by("id"):
+        por_nombre.setdefault(c.nombre_normalizado or _normalizar(c.nombre_completo), c)
+
+    coord_map = {}
+    for src in Coordinator.objects.using(db):
+        clave = _normalizar(src.full_name)
+        destino = por_nombre.get(clave)
+        if destino is None:
+            destino = Coordinador.objects.using(db).create(
+                nombre_completo=src.full_name,
+                nombre_normalizado=clave,
+                email=src.email,
+                sede=src.campus,
+                area_academica=src.area,
+                is_active=src.is_active,
+            )
+            por_nombre[clave] = destino
+        elif src.email and not destino.email:
+            destino.email = src.email
+            destino.save(update_fields=["email"])
+        coord_map[src.id] = destino.id
+
+    periodo_map = {}
+    for src in Period.objects.using(db):
+        ultimo_dia = calendar.monthrange(src.year, src.month)[1]
+        destino, _ = Periodo.objects.using(db).get_or_create(
+            anio=src.year,
+            mes=src.month,
+            defaults={
+                "name": f"{src.month:02d}-{src.year}",
+                "fecha_inicio": datetime.date(src.year, src.month, 1),
+                "fecha_fin": datetime.date(src.year, src.month, ultimo_dia),
+                "estado": "cerrado" if src.closed else "abierto",
+            },
+        )
+        periodo_map[src.id] = destino.id
+
+    evaluaciones = list(Evaluation.objects.using(db).only("id", "coordinator_id", "period_id"))
+    for e in evaluaciones:
+        e.coordinador_canonico_id = coord_map[e.coordinator_id]
+        e.periodo_canonico_id = periodo_map[e.period_id]
+    Evaluation.objects.using(db).bulk_update(evaluaciones, ["coordinador_canonico", "periodo_canonico"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("desempenho", "0002_evaluation_canonical_fks"),
+    ]
+
+    operations = [
+        migrations.RunPython(mapear, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Paso 3/3: las FKs canónicas reemplazan a las antiguas y se eliminan
+    desempenho.Coordinator y desempenho.Period.
+    """
+
+    dependencies = [
+        ("desempenho", "0003_map_coordinators_periods"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(name="evaluation", unique_together=set()),
+        migrations.RemoveField(model_name="evaluation", name="coordinator"),
+        migrations.RemoveField(model_name="evaluation", name="period"),
+        migrations.RenameField(model_name="evaluation", old_name="coordinador_canonico", new_name="coordinator"),
+        migrations.RenameField(model_name="evaluation", old_name="periodo_canonico", new_name="period"),
+        migrations.AlterField(
+            model_name="evaluation",
+            name="coordinator",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name="kpi_evaluations", to="atencion.coordinador"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="evaluation",
+            name="period",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name="kpi_evaluations", to="atencion.periodo"
+            ),
+        ),
+        migrations.AlterUniqueTogether(name="evaluation", unique_together={("coordinator", "period")}),
+        migrations.DeleteModel(name="Coordinator"),
+        migrations.DeleteModel(name="Period"),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('desempenho', '0004_drop_coordinator_period'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FunctionScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0)),
+                ('evaluation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='function_scores', to='desempenho.evaluation')),
+                ('function', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='desempenho.function')),
+            ],
+            options={
+                'unique_together': {('evaluation', 'function')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('atencion', '0009_coordinador_email_periodo_mes'),
+        ('desempenho', '0005_functionscore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='evaluation',
+            index=models.Index(fields=['period', 'updated_at'], name='desempenho__period__d57743_idx'),
+        ),
+    ]
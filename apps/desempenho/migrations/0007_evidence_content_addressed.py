@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:53
+
+import apps.desempenho.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('desempenho', '0006_evaluation_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='evidence',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=apps.desempenho.storage.evidence_storage, upload_to='evidences/', validators=[apps.desempenho.storage.validate_evidence_size]),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations
+from django.db.models import F, Sum
+from django.utils import timezone
+
+
+def recalcular(apps, schema_editor):
+    """
+    Rollup KPI -> Función -> Evaluación para las evaluaciones existentes:
+    antes de la 0005 total_score era el promedio plano por kpi.weight y no
+    había FunctionScore. Copia de Evaluation.recalc_scores (las migraciones no
+    dependen del código actual); después, `recalc_kpis <año> <mes>` recalcula
+    un periodo a mano.
+    """
+    db = schema_editor.connection.alias
+    Evaluation = apps.get_model("desempenho", "Evaluation")
+    KPIResult = apps.get_model("desempenho", "KPIResult")
+    FunctionScore = apps.get_model("desempenho", "FunctionScore")
+
+    subtotales = [
+        FunctionScore(
+            evaluation_id=row["evaluation"],
+            function_id=row["kpi__function"],
+            score=round(row["weighted_sum"] / row["weight_total"], 2),
+        )
+        for row in KPIResult.objects.using(db)
+        .values("evaluation", "kpi__function")
+        .annotate(weighted_sum=Sum(F("score") * F("kpi__weight")), weight_total=Sum("kpi__weight"))
+        if row["weight_total"]
+    ]
+    FunctionScore.objects.using(db).all().delete()
+    FunctionScore.objects.using(db).bulk_create(subtotales, batch_size=500)
+
+    totales = {
+        row["evaluation"]: round(row["weighted_sum"] / row["weight_total"], 2)
+        for row in FunctionScore.objects.using(db)
+        .values("evaluation")
+        .annotate(weighted_sum=Sum(F("score") * F("function__weight")), weight_total=Sum("function__weight"))
+        if row["weight_total"]
+    }
+    ahora = timezone.now()
+    evaluaciones = [
+        Evaluation(id=pk, total_score=totales.get(pk, 0), updated_at=ahora)
+        for pk in Evaluation.objects.using(db).values_list("id", flat=True)
+    ]
+    Evaluation.objects.using(db).bulk_update(evaluaciones, ["total_score", "updated_at"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('desempenho', '0007_evidence_content_addressed'),
+    ]
+
+    operations = [
+        migrations.RunPython(recalcular, migrations.RunPython.noop),
+    ]
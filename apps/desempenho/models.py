@@ -1,38 +1,23 @@
+import re
+import zipfile
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files import File
 from django.db import models
+from django.db.models import Case, Exists, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Least
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from atencion.models import Coordinador, Periodo
+from atencion.sedes import atomico
 
-# -------------------------------------------------
-# Coordinador de Carrera
-# -------------------------------------------------
-class Coordinator(models.Model):
-    full_name = models.CharField("Nombre completo", max_length=150)
-    email = models.EmailField(blank=True, null=True)
-    campus = models.CharField("Sede", max_length=100)
-    area = models.CharField("Área académica", max_length=120)
-    is_active = models.BooleanField(default=True)
-
-    def __str__(self):
-        return self.full_name
-
-
-# -------------------------------------------------
-# Periodo de evaluación (mensual)
-# -------------------------------------------------
-class Period(models.Model):
-    year = models.PositiveIntegerField()
-    month = models.PositiveSmallIntegerField(
-        validators=[MinValueValidator(1), MaxValueValidator(12)]
-    )
-    closed = models.BooleanField(default=False)
+from .storage import evidence_storage, sha256_from_name, validate_evidence_size
 
-    class Meta:
-        unique_together = ("year", "month")
-        ordering = ["-year", "-month"]
 
-    def __str__(self):
-        return f"{self.month:02d}-{self.year}"
+# Coordinador y periodo son los modelos canónicos de atencion
+# (atencion.Coordinador / atencion.Periodo mensual, ver Periodo.mensual).
 
 
 # -------------------------------------------------
@@ -69,25 +54,61 @@ class KPI(models.Model):
 # Evaluación mensual del coordinador
 # -------------------------------------------------
 class Evaluation(models.Model):
-    coordinator = models.ForeignKey(Coordinator, on_delete=models.CASCADE)
-    period = models.ForeignKey(Period, on_delete=models.CASCADE)
+    coordinator = models.ForeignKey(Coordinador, on_delete=models.CASCADE, related_name="kpi_evaluations")
+    period = models.ForeignKey(Periodo, on_delete=models.CASCADE, related_name="kpi_evaluations")
     created_at = models.DateTimeField(default=timezone.now)
 
     total_score = models.FloatField(default=0)
+    # Última modificación (también en recálculos por lotes): clave de caché del dashboard
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("coordinator", "period")
+        indexes = [models.Index(fields=["period", "updated_at"])]
 
     def recalc_score(self):
-        results = self.kpi_results.all()
-        if not results:
-            self.total_score = 0
-            return
-
-        weighted_sum = sum(r.score * r.kpi.weight for r in results)
-        weight_total = sum(r.kpi.weight for r in results)
-        self.total_score = round(weighted_sum / weight_total, 2)
-        self.save()
+        Evaluation.recalc_scores([self.id])
+        self.refresh_from_db(fields=["total_score"])
+
+    @classmethod
+    def recalc_scores(cls, evaluations):
+        """
+        Rollup KPI -> Función -> Evaluación para un queryset/lista de ids:
+        1) subtotal por función = promedio de KPIResult.score ponderado por kpi.weight
+           (una consulta agrupada por evaluación y función, guardado en FunctionScore);
+        2) total_score = promedio de los subtotales ponderado por function.weight
+           (otra consulta agrupada por evaluación) + UPDATE por lotes.
+        """
+        ids = list(cls.objects.filter(id__in=evaluations).values_list("id", flat=True))
+        subtotals = [
+            FunctionScore(
+                evaluation_id=row["evaluation"],
+                function_id=row["kpi__function"],
+                score=round(row["weighted_sum"] / row["weight_total"], 2),
+            )
+            for row in KPIResult.objects.filter(evaluation_id__in=ids)
+            .values("evaluation", "kpi__function")
+            .annotate(weighted_sum=Sum(F("score") * F("kpi__weight")), weight_total=Sum("kpi__weight"))
+            if row["weight_total"]
+        ]
+        with atomico():
+            FunctionScore.objects.filter(evaluation_id__in=ids).delete()
+            FunctionScore.objects.bulk_create(subtotals, batch_size=500)
+            totals = {
+                row["evaluation"]: round(row["weighted_sum"] / row["weight_total"], 2)
+                for row in FunctionScore.objects.filter(evaluation_id__in=ids)
+                .values("evaluation")
+                .annotate(weighted_sum=Sum(F("score") * F("function__weight")), weight_total=Sum("function__weight"))
+                if row["weight_total"]
+            }
+            now = timezone.now()
+            updated = [cls(id=pk, total_score=totals.get(pk, 0), updated_at=now) for pk in ids]
+            cls.objects.bulk_update(updated, ["total_score", "updated_at"], batch_size=500)
+        return len(updated)
+
+    @classmethod
+    def recalc_period(cls, period):
+        return cls.recalc_scores(cls.objects.filter(period=period))
 
     def __str__(self):
         return f"{self.coordinator} - {self.period}"
@@ -112,10 +133,42 @@ class KPIResult(models.Model):
         self.save()
         self.evaluation.recalc_score()
 
+    @classmethod
+    def calculate_scores(cls, results):
+        """
+        Versión por lotes de calculate_score: un solo UPDATE para los resultados
+        y recálculo por lotes de sus evaluaciones.
+        """
+        kpi = KPI.objects.filter(id=OuterRef("kpi_id"))
+        target = Subquery(kpi.values("target")[:1])
+        qs = cls.objects.filter(id__in=results.values("id"))
+        qs.update(score=Case(
+            When(Exists(kpi.filter(target__gt=0)), then=Least(Value(100.0), F("value") / target * 100)),
+            default=Value(0.0),
+        ))
+        return Evaluation.recalc_scores(qs.values("evaluation_id"))
+
     def __str__(self):
         return f"{self.kpi.name}: {self.score}"
 
 
+# -------------------------------------------------
+# Subtotal por función (rollup KPI -> Función)
+# -------------------------------------------------
+class FunctionScore(models.Model):
+    evaluation = models.ForeignKey(
+        Evaluation, related_name="function_scores", on_delete=models.CASCADE
+    )
+    function = models.ForeignKey(Function, on_delete=models.CASCADE)
+    score = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ("evaluation", "function")
+
+    def __str__(self):
+        return f"{self.evaluation} | {self.function.name}: {self.score}"
+
+
 # -------------------------------------------------
 # Evidencias
 # -------------------------------------------------
@@ -124,8 +177,81 @@ class Evidence(models.Model):
         KPIResult, related_name="evidences", on_delete=models.CASCADE
     )
     description = models.CharField(max_length=200)
-    file = models.FileField(upload_to="evidences/", blank=True, null=True)
+    file = models.FileField(
+        upload_to="evidences/", storage=evidence_storage, validators=[validate_evidence_size],
+        blank=True, null=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @property
+    def sha256(self):
+        return sha256_from_name(self.file.name) if self.file else None
+
+    # Convención de nombres dentro del ZIP: <coordinador_id>/<kpi_id>[_descripcion].ext
+    # o <coordinador_id>_<kpi_id>[_descripcion].ext (en cualquier subcarpeta)
+    ZIP_NAME_RE = re.compile(r"(?:^|/)(?P<coordinator>\d+)[/_](?P<kpi>\d+)(?:_(?P<description>[^/]*))?$")
+
+    @classmethod
+    def ingest_zip(cls, period, archive, batch_size=500):
+        """
+        Carga en lote las evidencias de un ZIP para un periodo mensual.
+        Cada entrada se lee en streaming desde el ZIP (sin extraer a disco)
+        y se guarda en el storage direccionado por contenido; los KPIResult se
+        resuelven con un dict cargado en una sola consulta. Las evidencias se
+        insertan con bulk_create cada `batch_size`, así la memoria no crece
+        con el tamaño del ZIP. Retorna un dict con los contadores y los
+        nombres sin KPIResult.
+        """
+        results = {
+            (coordinator_id, kpi_id): result_id
+            for result_id, coordinator_id, kpi_id in KPIResult.objects.filter(
+                evaluation__period=period
+            ).values_list("id", "evaluation__coordinator_id", "kpi_id")
+        }
+        existing = set(
+            cls.objects.filter(kpi_result__evaluation__period=period).values_list("kpi_result_id", "file")
+        )
+        storage = cls._meta.get_field("file").storage
+        limit = getattr(settings, "EVIDENCE_MAX_UPLOAD_BYTES", None)
+
+        stats = {"created": 0, "duplicates": 0, "too_large": 0, "unmatched": []}
+        pending = []
+
+        def flush():
+            cls.objects.bulk_create(pending)
+            stats["created"] += len(pending)
+            pending.clear()
+
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                path = PurePosixPath(info.filename)
+                if info.is_dir() or any(part.startswith((".", "__MACOSX")) for part in path.parts):
+                    continue
+                m = cls.ZIP_NAME_RE.search(str(path.with_suffix("")))
+                result_id = m and results.get((int(m["coordinator"]), int(m["kpi"])))
+                if not result_id:
+                    stats["unmatched"].append(info.filename)
+                    continue
+                if limit and info.file_size > limit:
+                    stats["too_large"] += 1
+                    continue
+
+                with zf.open(info) as entry:
+                    content = File(entry, name=path.name)
+                    # Tamaño desde el directorio del ZIP: evita descomprimir para medirlo
+                    content.size = info.file_size
+                    name = storage.save(path.name, content)
+                if (result_id, name) in existing:
+                    stats["duplicates"] += 1
+                    continue
+                existing.add((result_id, name))
+
+                description = (m["description"] or path.stem).replace("_", " ").strip()
+                pending.append(cls(kpi_result_id=result_id, description=description[:200], file=name))
+                if len(pending) >= batch_size:
+                    flush()
+        flush()
+        return stats
+
     def __str__(self):
         return self.description
@@ -0,0 +1,70 @@
+import hashlib
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage, storages
+
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class _ArchivoExistente(Exception):
+    """El archivo direccionado por contenido ya existe en el storage."""
+
+
+# -------------------------------------------------
+# Almacenamiento direccionado por contenido
+# -------------------------------------------------
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Guarda cada archivo con su SHA-256 como nombre
+    (evidences/ab/cd/<sha256>.<ext>): dos subidas idénticas ocupan un solo
+    archivo. El hash se calcula leyendo por chunks, sin cargar el archivo
+    completo en memoria.
+    """
+
+    prefix = "evidences"
+
+    def save(self, name, content, max_length=None):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        sha = digest.hexdigest()
+        ext = Path(name or "").suffix.lower()[:10]
+        name = f"{self.prefix}/{sha[:2]}/{sha[2:4]}/{sha}{ext}"
+        if self.exists(name):
+            return name
+        try:
+            return super().save(name, content, max_length=max_length)
+        except _ArchivoExistente:
+            return name
+
+    def get_available_name(self, name, max_length=None):
+        # Mismo nombre = mismo contenido: si otro proceso lo guardó entre medio
+        # (o _save choca con su archivo) es un acierto, no un nombre alternativo.
+        # Sin allow_overwrite (Django 5.1+), así funciona también en 4.2.
+        if self.exists(name):
+            raise _ArchivoExistente(name)
+        return name
+
+
+def evidence_storage():
+    return storages["evidences"]
+
+
+def sha256_from_name(name):
+    """SHA-256 del archivo si el nombre es direccionado por contenido; si no, None."""
+    stem = Path(name or "").stem
+    return stem if SHA256_RE.match(stem) else None
+
+
+def validate_evidence_size(file):
+    limit = getattr(settings, "EVIDENCE_MAX_UPLOAD_BYTES", None)
+    if limit and file.size > limit:
+        raise ValidationError(
+            f"El archivo pesa {file.size / 1024 / 1024:.1f} MB; el máximo es {limit / 1024 / 1024:.0f} MB."
+        )
@@ -1,3 +1,435 @@
-from django.test import TestCase
+import hashlib
+import importlib
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from atencion.models import Coordinador, Periodo, Tarea
+from atencion.tests import ESTATICOS_SIN_MANIFIESTO
+
+from .models import KPI, Evaluation, Evidence, Function, FunctionScore, KPIResult
+from .storage import evidence_storage
+from .views import dashboard_rows, previous_period
+
+
+def crear_funciones():
+    """Dos funciones (pesos 60/40) con dos KPIs cada una."""
+    docencia = Function.objects.create(code="DOC", name="Docencia", description="", weight=60)
+    gestion = Function.objects.create(code="GES", name="Gestión", description="", weight=40)
+    kpis = [
+        KPI.objects.create(function=docencia, name="Aprobación", target=80, weight=3),
+        KPI.objects.create(function=docencia, name="Asistencia", target=90, weight=1),
+        KPI.objects.create(function=gestion, name="Reuniones", target=10, weight=1),
+        KPI.objects.create(function=gestion, name="Informes", target=4, weight=1),
+    ]
+    return docencia, gestion, kpis
+
+
+def crear_evaluaciones(period, kpis, n, valores=(80, 90, 10, 4), **coordinador):
+    """n coordinadores con su evaluación del periodo y un KPIResult por KPI."""
+    evaluaciones = []
+    for i in range(n):
+        c = Coordinador.objects.create(nombre_completo=f"Coordinador {Coordinador.objects.count() + 1}", **coordinador)
+        e = Evaluation.objects.create(coordinator=c, period=period)
+        KPIResult.objects.bulk_create([KPIResult(evaluation=e, kpi=k, value=v) for k, v in zip(kpis, valores)])
+        evaluaciones.append(e)
+    return evaluaciones
+
+
+@ESTATICOS_SIN_MANIFIESTO
+class AdminConsultasTests(TestCase):
+    """Las changelists y acciones hacen un número fijo de consultas, sin importar las filas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@inacap.cl", "clave")
+        cls.period = Periodo.mensual(2025, 3)
+        _, _, cls.kpis = crear_funciones()
+        crear_evaluaciones(cls.period, cls.kpis, 10)
+        Evidence.objects.bulk_create(
+            [Evidence(kpi_result=r, description=f"Evidencia {r.id}") for r in KPIResult.objects.all()]
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def assertChangelist(self, url, consultas):
+        with self.assertNumQueries(consultas):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_changelist_evaluation(self):
+        self.assertChangelist("/admin/desempenho/evaluation/", 8)
+
+    def test_changelist_kpiresult(self):
+        self.assertChangelist("/admin/desempenho/kpiresult/", 7)
+
+    def test_changelist_evidence(self):
+        self.assertChangelist("/admin/desempenho/evidence/", 5)
+
+    def test_changelist_kpi(self):
+        self.assertChangelist("/admin/desempenho/kpi/", 6)
+
+    def test_accion_recalcular_scores(self):
+        ids = list(Evaluation.objects.values_list("id", flat=True))
+        with self.assertNumQueries(13):
+            self.client.post("/admin/desempenho/evaluation/", {"action": "recalcular_scores", "_selected_action": ids})
+        self.assertEqual(set(Evaluation.objects.values_list("total_score", flat=True)), {0.0})
+        self.assertEqual(Tarea.objects.filter(tipo="precalentar_periodo").count(), 1)
+
+    def test_accion_calcular_scores(self):
+        ids = list(KPIResult.objects.values_list("id", flat=True))
+        with self.assertNumQueries(16):
+            self.client.post("/admin/desempenho/kpiresult/", {"action": "calcular_scores", "_selected_action": ids})
+        self.assertEqual(set(KPIResult.objects.values_list("score", flat=True)), {100.0})
+        self.assertEqual(set(Evaluation.objects.values_list("total_score", flat=True)), {100.0})
+        self.assertEqual(Tarea.objects.filter(tipo="precalentar_periodo").count(), 1)
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.period = Periodo.mensual(2025, 3)
+        cls.docencia, cls.gestion, cls.kpis = crear_funciones()
+        # Scores 50, 100 (docencia, pesos 3/1) y 50, 100 (gestión, pesos 1/1)
+        cls.evaluaciones = crear_evaluaciones(cls.period, cls.kpis, 3, valores=(40, 90, 5, 4))
+        KPIResult.calculate_scores(KPIResult.objects.all())
+
+    def test_subtotales_y_total_ponderados(self):
+        e = Evaluation.objects.get(id=self.evaluaciones[0].id)
+        subtotales = dict(FunctionScore.objects.filter(evaluation=e).values_list("function__code", "score"))
+        self.assertEqual(subtotales, {"DOC": 62.5, "GES": 75.0})
+        self.assertEqual(e.total_score, 67.5)  # (62.5 * 60 + 75 * 40) / 100
+
+    def test_periodo_en_consultas_fijas(self):
+        crear_evaluaciones(self.period, self.kpis, 5)
+        # subtotales, ids, borrado y alta de FunctionScore, totales, UPDATE (+ savepoint)
+        with self.assertNumQueries(8):
+            n = Evaluation.recalc_period(self.period)
+        self.assertEqual(n, 8)
+
+    def test_evaluacion_sin_resultados_queda_en_cero(self):
+        c = Coordinador.objects.create(nombre_completo="Sin KPIs")
+        e = Evaluation.objects.create(coordinator=c, period=self.period, total_score=88)
+        e.recalc_score()
+        self.assertEqual(e.total_score, 0)
+        self.assertFalse(e.function_scores.exists())
+
+    def test_migracion_recalcula_evaluaciones_existentes(self):
+        # Como quedaban antes de la 0005: fórmula plana y sin subtotales
+        FunctionScore.objects.all().delete()
+        Evaluation.objects.update(total_score=80)
+        migracion = importlib.import_module("apps.desempenho.migrations.0008_recalcular_rollup")
+        migracion.recalcular(django_apps, SimpleNamespace(connection=connection))
+        self.assertEqual(set(Evaluation.objects.values_list("total_score", flat=True)), {67.5})
+        self.assertEqual(FunctionScore.objects.count(), 6)
+
+
+class MapeoCanonicoMigracionTests(TransactionTestCase):
+    """0003 (mapear) sobre el esquema de 0002, con los modelos antiguos aún presentes."""
+
+    antes = [("desempenho", "0002_evaluation_canonical_fks")]
+    despues = [("desempenho", "0003_map_coordinators_periods")]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.addCleanup(self.migrar_a_la_ultima)
+        executor.migrate(self.antes)
+        self.old_apps = executor.loader.project_state(self.antes).apps
+
+    def migrar_a_la_ultima(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_mapear(self):
+        Coordinator = self.old_apps.get_model("desempenho", "Coordinator")
+        Period = self.old_apps.get_model("desempenho", "Period")
+        Evaluation = self.old_apps.get_model("desempenho", "Evaluation")
+        Coordinador = self.old_apps.get_model("atencion", "Coordinador")
+        Periodo = self.old_apps.get_model("atencion", "Periodo")
+
+        jose = Coordinador.objects.create(nombre_completo="José Peña", nombre_normalizado="jose pena")
+        marzo = Periodo.objects.create(name="03-2025", anio=2025, mes=3)
+        mismo_nombre = Coordinator.objects.create(
+            full_name="JOSE  PEÑA", email="jpena@inacap.cl", campus="Arica", area="Informática"
+        )
+        nuevo = Coordinator.objects.create(full_name="Ana Soto", campus="Iquique", area="Salud", is_active=False)
+        e1 = Evaluation.objects.create(coordinator=mismo_nombre, period=Period.objects.create(year=2025, month=3))
+        e2 = Evaluation.objects.create(coordinator=nuevo, period=Period.objects.create(year=2025, month=4, closed=True))
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.despues)
+        new_apps = executor.loader.project_state(self.despues).apps
+        Coordinador = new_apps.get_model("atencion", "Coordinador")
+        Periodo = new_apps.get_model("atencion", "Periodo")
+        Evaluation = new_apps.get_model("desempenho", "Evaluation")
+
+        # Mismo nombre normalizado: se reutiliza y se completa el email
+        e1 = Evaluation.objects.get(id=e1.id)
+        self.assertEqual((e1.coordinador_canonico_id, e1.periodo_canonico_id), (jose.id, marzo.id))
+        self.assertEqual(Coordinador.objects.get(id=jose.id).email, "jpena@inacap.cl")
+
+        e2 = Evaluation.objects.get(id=e2.id)
+        ana = Coordinador.objects.get(id=e2.coordinador_canonico_id)
+        self.assertEqual(
+            (ana.nombre_completo, ana.nombre_normalizado, ana.sede, ana.area_academica, ana.is_active),
+            ("Ana Soto", "ana soto", "Iquique", "Salud", False),
+        )
+        abril = Periodo.objects.get(id=e2.periodo_canonico_id)
+        self.assertEqual(
+            (abril.name, abril.anio, abril.mes, abril.fecha_inicio, abril.fecha_fin, abril.estado),
+            ("04-2025", 2025, 4, date(2025, 4, 1), date(2025, 4, 30), "cerrado"),
+        )
+        self.assertEqual(Coordinador.objects.count(), 2)
+
+
+@ESTATICOS_SIN_MANIFIESTO
+class DashboardKPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.febrero = Periodo.mensual(2025, 2)
+        cls.marzo = Periodo.mensual(2025, 3)
+        cls.docencia, cls.gestion, cls.kpis = crear_funciones()
+        cls.antigua, = crear_evaluaciones(cls.febrero, cls.kpis, 1, valores=(40, 90, 5, 4))
+        cls.actual = Evaluation.objects.create(coordinator=cls.antigua.coordinator, period=cls.marzo)
+        KPIResult.objects.bulk_create(
+            [KPIResult(evaluation=cls.actual, kpi=k, value=v) for k, v in zip(cls.kpis, (80, 90, 10, 4))]
+        )
+        cls.nueva, = crear_evaluaciones(cls.marzo, cls.kpis, 1, valores=(0, 0, 0, 0))
+        KPIResult.calculate_scores(KPIResult.objects.all())
+        cls.functions = [cls.docencia, cls.gestion]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_previous_period(self):
+        enero = Periodo.mensual(2025, 1)
+        diciembre = Periodo.mensual(2024, 12)
+        periods = [self.marzo, self.febrero, enero, diciembre]
+        self.assertEqual(previous_period(self.marzo, periods), self.febrero)
+        self.assertEqual(previous_period(enero, periods), diciembre)
+        self.assertIsNone(previous_period(diciembre, periods))
+
+    def test_filas_con_variacion_y_subtotales(self):
+        rows = dashboard_rows(self.marzo, self.febrero, self.functions)
+        por_coordinador = {r["coordinator"]: r for r in rows}
+        actual = por_coordinador[self.antigua.coordinator.nombre_completo]
+        self.assertEqual(actual["total_score"], 100.0)
+        self.assertEqual(actual["delta"], 32.5)  # 100 - 67.5 (Lag por coordinador)
+        self.assertEqual(actual["function_scores"], [100.0, 100.0])
+        nueva = por_coordinador[self.nueva.coordinator.nombre_completo]
+        self.assertIsNone(nueva["delta"])
+        self.assertEqual(len(rows), 2)  # febrero solo alimenta el Lag
+
+    def test_filas_desde_cache_hasta_que_cambia_una_evaluacion(self):
+        dashboard_rows(self.marzo, self.febrero, self.functions)
+        with self.assertNumQueries(1):  # solo la marca de última modificación
+            dashboard_rows(self.marzo, self.febrero, self.functions)
+        KPIResult.objects.filter(evaluation=self.nueva).update(value=8)
+        KPIResult.calculate_scores(KPIResult.objects.filter(evaluation=self.nueva))
+        rows = dashboard_rows(self.marzo, self.febrero, self.functions)
+        self.assertNotEqual({r["total_score"] for r in rows}, {100.0, 0.0})
+
+    def test_vista(self):
+        response = self.client.get(reverse("desempenho:dashboard"), {"period": self.marzo.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["previous"], self.febrero)
+        self.assertEqual(len(response.context["rows"]), 2)
+
+
+class MediaTemporalMixin:
+    """MEDIA_ROOT en un directorio temporal (el storage de evidencias escribe ahí)."""
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajuste = override_settings(MEDIA_ROOT=media)
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+
+
+class AlmacenamientoEvidenciasTests(MediaTemporalMixin, TestCase):
+    def test_nombre_por_contenido_sin_duplicados(self):
+        storage = evidence_storage()
+        contenido = b"acta de reunion"
+        sha = hashlib.sha256(contenido).hexdigest()
+        primero = storage.save("Reunión.PDF", ContentFile(contenido))
+        segundo = storage.save("otra-copia.pdf", ContentFile(contenido))
+        self.assertEqual(primero, f"evidences/{sha[:2]}/{sha[2:4]}/{sha}.pdf")
+        self.assertEqual(segundo, primero)
+        self.assertEqual(storage.listdir(f"evidences/{sha[:2]}/{sha[2:4]}")[1], [f"{sha}.pdf"])
+        self.assertNotEqual(storage.save("x.pdf", ContentFile(b"otro contenido")), primero)
+
+    def test_carrera_con_otro_proceso_es_un_acierto(self):
+        storage = evidence_storage()
+        nombre = storage.save("a.txt", ContentFile(b"mismo"))
+        # El otro proceso guardó el archivo después de nuestro exists(): _save/get_available_name chocan con él
+        with mock.patch.object(type(storage), "exists", side_effect=[False, True]):
+            self.assertEqual(storage.save("b.txt", ContentFile(b"mismo")), nombre)
+        with storage.open(nombre) as f:
+            self.assertEqual(f.read(), b"mismo")
+
+
+class DescargaEvidenciaTests(MediaTemporalMixin, TestCase):
+    CONTENIDO = bytes(range(256)) * 4  # 1024 bytes
+
+    def setUp(self):
+        super().setUp()
+        period = Periodo.mensual(2025, 3)
+        _, _, kpis = crear_funciones()
+        resultado = crear_evaluaciones(period, kpis, 1)[0].kpi_results.first()
+        nombre = evidence_storage().save("informe.bin", ContentFile(self.CONTENIDO))
+        self.evidence = Evidence.objects.create(kpi_result=resultado, description="Informe mensual", file=nombre)
+        self.url = reverse("desempenho:evidence_download", args=[self.evidence.pk])
+        self.etag = f'"{self.evidence.sha256}"'
+        self.client.force_login(User.objects.create_superuser("admin", "admin@inacap.cl", "clave"))
+
+    def contenido(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_requiere_staff(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse("admin:login"), response["Location"])
+        self.client.force_login(User.objects.create_user("docente", "docente@inacap.cl", "clave"))
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        # Ni siquiera el ETag se revela sin sesión
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag).status_code, 302)
+
+    def test_completa_con_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], self.etag)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("informe-mensual.bin", response["Content-Disposition"])
+        self.assertEqual(self.contenido(response), self.CONTENIDO)
+
+    def test_rangos(self):
+        for rango, esperado, content_range in (
+            ("bytes=0-99", self.CONTENIDO[:100], "bytes 0-99/1024"),
+            ("bytes=1000-", self.CONTENIDO[1000:], "bytes 1000-1023/1024"),
+            ("bytes=-24", self.CONTENIDO[-24:], "bytes 1000-1023/1024"),
+            ("bytes=1000-5000", self.CONTENIDO[1000:], "bytes 1000-1023/1024"),
+        ):
+            with self.subTest(rango=rango):
+                response = self.client.get(self.url, HTTP_RANGE=rango)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response["Content-Range"], content_range)
+                self.assertEqual(response["Content-Length"], str(len(esperado)))
+                self.assertEqual(self.contenido(response), esperado)
+
+    def test_rango_no_satisfacible_416(self):
+        for rango in ("bytes=1024-", "bytes=50-10"):
+            with self.subTest(rango=rango):
+                response = self.client.get(self.url, HTTP_RANGE=rango)
+                self.assertEqual(response.status_code, 416)
+                self.assertEqual(response["Content-Range"], "bytes */1024")
+
+    def test_rango_no_soportado_devuelve_completa(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-1,5-9")
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_range(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=self.etag)
+        self.assertEqual(response.status_code, 206)
+        # ETag distinto: el archivo cambió, se manda completo
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"otro"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.contenido(response), self.CONTENIDO)
+
+    def test_if_none_match_304(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_sin_archivo_404(self):
+        Evidence.objects.filter(pk=self.evidence.pk).update(file=None)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class IngestaZipTests(MediaTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.period = Periodo.mensual(2025, 3)
+        _, _, self.kpis = crear_funciones()
+        self.evaluaciones = crear_evaluaciones(self.period, self.kpis, 2)
+
+    def zip(self, entradas):
+        archivo = io.BytesIO()
+        with zipfile.ZipFile(archivo, "w") as zf:
+            for nombre, contenido in entradas.items():
+                zf.writestr(nombre, contenido)
+        archivo.seek(0)
+        return archivo
+
+    def entradas(self):
+        c1, c2 = (e.coordinator_id for e in self.evaluaciones)
+        k1, k2 = self.kpis[0].id, self.kpis[1].id
+        return {
+            f"marzo/{c1}/{k1}_acta_consejo.pdf": b"acta",
+            f"{c1}_{k2}.xlsx": b"planilla",
+            f"{c2}/{k1}_acta_consejo.pdf": b"acta",  # mismo contenido, otro KPIResult
+            f"{c2}_{k2}_informe.pdf": b"x" * 2048,
+            "999_1_sin_coordinador.pdf": b"?",
+            f"__MACOSX/{c1}_{k1}.pdf": b"basura",
+            f"marzo/.{c1}_{k1}.pdf": b"oculto",
+        }
+
+    def test_carga_y_reingesta(self):
+        stats = Evidence.ingest_zip(self.period, self.zip(self.entradas()))
+        self.assertEqual(stats["created"], 4)
+        self.assertEqual(stats["unmatched"], ["999_1_sin_coordinador.pdf"])
+        self.assertEqual(
+            set(Evidence.objects.values_list("description", flat=True)),
+            {"acta consejo", "informe", f"{self.evaluaciones[0].coordinator_id} {self.kpis[1].id}"},
+        )
+        # Dos evidencias con el mismo contenido comparten archivo
+        self.assertEqual(Evidence.objects.values("file").distinct().count(), 3)
+
+        stats = Evidence.ingest_zip(self.period, self.zip(self.entradas()))
+        self.assertEqual((stats["created"], stats["duplicates"]), (0, 4))
+        self.assertEqual(Evidence.objects.count(), 4)
+
+    def test_consultas_fijas_por_lote(self):
+        c1 = self.evaluaciones[0].coordinator_id
+        entradas = {f"{c1}_{self.kpis[0].id}_doc{i}.txt": f"contenido {i}".encode() for i in range(30)}
+        # KPIResults, evidencias existentes y un INSERT por lote de 10
+        with self.assertNumQueries(5):
+            stats = Evidence.ingest_zip(self.period, self.zip(entradas), batch_size=10)
+        self.assertEqual(stats["created"], 30)
+
+    @override_settings(EVIDENCE_MAX_UPLOAD_BYTES=1024)
+    def test_demasiado_grandes(self):
+        stats = Evidence.ingest_zip(self.period, self.zip(self.entradas()))
+        self.assertEqual((stats["created"], stats["too_large"]), (3, 1))
+
+    def test_comando(self):
+        with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as f:
+            f.write(self.zip(self.entradas()).getvalue())
+        self.addCleanup(os.remove, f.name)
+        salida = io.StringIO()
+        call_command("ingest_evidences", "2025", "3", f.name, stdout=salida, stderr=io.StringIO())
+        self.assertIn("Evidencias creadas en 03-2025: 4", salida.getvalue())
+        tarea = Tarea.objects.get(tipo="precalentar_periodo")
+        self.assertEqual(tarea.parametros, {"periodo_id": self.period.id, "rollup": False})
+        with self.assertRaises(CommandError):
+            call_command("ingest_evidences", "2025", "4", f.name)
+        with self.assertRaises(CommandError):
+            call_command("ingest_evidences", "2025", "3", __file__)
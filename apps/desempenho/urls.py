@@ -5,4 +5,5 @@ app_name = "desempenho"
 
 urlpatterns = [
     path("", views.dashboard, name="dashboard"),
+    path("evidences/<int:pk>/", views.evidence_download, name="evidence_download"),
 ]
@@ -1,9 +1,226 @@
-from django.shortcuts import render
+import mimetypes
+import re
+from pathlib import Path
 
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.db.models import Count, F, Max, OuterRef, Subquery, Window
+from django.db.models.functions import Lag
+from django.http import FileResponse, Http404, HttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils.text import slugify
+from django.views.decorators.http import condition
 
+from atencion.models import Periodo
+from atencion.replicas import solo_lectura
+from atencion.sedes import q_sede, sede_actual
+
+from .models import Evaluation, Evidence, Function, FunctionScore
+from .storage import sha256_from_name
+
+DASHBOARD_CACHE_SECONDS = 60 * 60
+
+# Solo un rango simple ("bytes=inicio-fin", "bytes=inicio-" o "bytes=-sufijo")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _dashboard_rows(period, previous, functions):
+    """
+    Filas del dashboard en una sola consulta: evaluaciones del periodo y del
+    anterior, con el score previo vía Lag() (ventana por coordinador) y un
+    subquery por función para los subtotales (FunctionScore).
+    """
+    period_ids = [period.id] + ([previous.id] if previous else [])
+    qs = (
+        Evaluation.objects.filter(q_sede("coordinator__sede"), period_id__in=period_ids)
+        .annotate(
+            coordinator_name=F("coordinator__nombre_completo"),
+            previous_score=Window(
+                Lag("total_score"),
+                partition_by=[F("coordinator_id")],
+                order_by=[F("period__anio").asc(), F("period__mes").asc()],
+            ),
+            **{
+                f"function_{f.id}": Subquery(
+                    FunctionScore.objects.filter(evaluation=OuterRef("pk"), function_id=f.id).values("score")[:1]
+                )
+                for f in functions
+            },
+        )
+        .order_by("coordinator__nombre_completo")
+        .values("id", "period_id", "coordinator_name", "total_score", "previous_score",
+                *[f"function_{f.id}" for f in functions])
+    )
+    rows = []
+    for e in qs:
+        if e["period_id"] != period.id:
+            continue
+        previous_score = e["previous_score"]
+        rows.append({
+            "coordinator": e["coordinator_name"],
+            "total_score": e["total_score"],
+            "delta": None if previous_score is None else round(e["total_score"] - previous_score, 2),
+            "function_scores": [e[f"function_{f.id}"] for f in functions],
+        })
+    return rows
+
+
+def previous_period(period, periods):
+    """
+    Periodo mensual inmediatamente anterior a `period` entre `periods` (que va
+    de más nuevo a más antiguo), tenga o no evaluaciones; None si no hay.
+    """
+    return next((p for p in periods if (p.anio, p.mes) < (period.anio, period.mes)), None)
+
+
+def dashboard_rows(period, previous, functions):
+    """
+    Filas del dashboard desde la caché, o calculadas y cacheadas. La clave
+    lleva la última modificación de las evaluaciones: cualquier recálculo la
+    cambia. También la usa el precalentamiento (atencion.precalentar).
+    """
+    period_ids = [period.id] + ([previous.id] if previous else [])
+    stamp = Evaluation.objects.filter(q_sede("coordinator__sede"), period_id__in=period_ids).aggregate(
+        last=Max("updated_at"), n=Count("id")
+    )
+    # Los ids de periodo se repiten entre bases de sedes distintas: la sede va en la clave
+    key = "kpi_dashboard:{}:{}:{}:{}:{}:{}".format(
+        sede_actual() or "",
+        period.id,
+        previous.id if previous else 0,
+        stamp["n"],
+        stamp["last"].timestamp() if stamp["last"] else 0,
+        ",".join(str(f.id) for f in functions),
+    )
+    rows = cache.get(key)
+    if rows is None:
+        rows = _dashboard_rows(period, previous, functions)
+        cache.set(key, rows, DASHBOARD_CACHE_SECONDS)
+    return rows
+
+
+@solo_lectura
 def dashboard(request):
+    """
+    Dashboard KPI mensual: por coordinador, score total, variación respecto
+    del mes anterior y subtotal de cada función (rollup de Evaluation.recalc_scores).
+    Las filas se cachean con la última modificación de las evaluaciones del periodo.
+    """
+    periods = list(Periodo.objects.filter(mes__isnull=False).order_by("-anio", "-mes"))
+
+    period = None
+    period_id = request.GET.get("period")
+    if period_id and period_id.isdigit():
+        period = next((p for p in periods if p.id == int(period_id)), None)
+    elif periods:
+        period = periods[0]
+
+    functions = list(Function.objects.order_by("-weight", "name"))
+    previous = None
+    rows = []
+    if period:
+        previous = previous_period(period, periods)
+        rows = dashboard_rows(period, previous, functions)
+
     context = {
         "title": "MGD Coordinadores",
-        "subtitle": "Modelo de Gestión de Desempeño - Coordinador de Carrera (MVP)"
+        "subtitle": "Dashboard KPI mensual - Coordinador de Carrera",
+        "periods": periods,
+        "period": period,
+        "previous": previous,
+        "functions": functions,
+        "rows": rows,
     }
-    return render(request, "dashboard.html", context)
+    return render(request, "kpi_dashboard.html", context)
+
+
+# -------------------------------------------------
+# Descarga de evidencias (Range + ETag)
+# -------------------------------------------------
+class _RangeFile:
+    """Lector acotado a [start, start + length) para servir un 206 con FileResponse."""
+
+    def __init__(self, f, start, length):
+        f.seek(start)
+        self._f = f
+        self._remaining = length
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b""
+        size = self._remaining if size is None or size < 0 else min(size, self._remaining)
+        data = self._f.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._f.close()
+
+
+def _parse_range(header, size):
+    """(inicio, fin) inclusivos, None si no hay rango usable, o "invalid" si no es satisfacible."""
+    m = RANGE_RE.match(header or "")
+    if not m or not any(m.groups()):
+        return None
+    first, last = m.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        return "invalid"
+    return start, end
+
+
+def _evidence_etag(request, pk):
+    # El nombre es el SHA-256 del contenido: ETag fuerte sin leer el archivo
+    return sha256_from_name(Evidence.objects.filter(pk=pk).values_list("file", flat=True).first())
+
+
+@staff_member_required
+@condition(etag_func=_evidence_etag)
+def evidence_download(request, pk):
+    """
+    Descarga en streaming (FileResponse) con soporte de Range/206 e
+    If-None-Match/If-Range contra el SHA-256. Solo para staff: el enlace
+    está en el admin y el pk es secuencial.
+    """
+    evidence = get_object_or_404(Evidence.objects.only("id", "description", "file"), pk=pk)
+    if not evidence.file:
+        raise Http404("La evidencia no tiene archivo")
+
+    name = evidence.file.name
+    storage = evidence.file.storage
+    size = storage.size(name)
+    sha = sha256_from_name(name)
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    filename = f"{slugify(evidence.description) or 'evidencia'}{Path(name).suffix}"
+
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if request.method == "GET" and (not if_range or (sha and if_range.strip('"') == sha)):
+        byte_range = _parse_range(request.headers.get("Range"), size)
+
+    if byte_range == "invalid":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+    elif byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = FileResponse(
+            _RangeFile(storage.open(name, "rb"), start, length),
+            status=206, content_type=content_type, as_attachment=True, filename=filename,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(length)
+    else:
+        response = FileResponse(
+            storage.open(name, "rb"), content_type=content_type, as_attachment=True, filename=filename,
+        )
+
+    response["Accept-Ranges"] = "bytes"
+    # Contenido inmutable por nombre; privado porque las evidencias no son públicas
+    response["Cache-Control"] = "private, max-age=31536000, immutable" if sha else "private, no-cache"
+    return response
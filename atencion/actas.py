@@ -0,0 +1,307 @@
+"""
+Acta de evaluación: datos y renderers.
+
+Los datos de un acta se arman una vez en un ActaData inmutable (sin
+referencias al ORM) y se entregan a cualquiera de los renderers de RENDERERS
+(html, pdf, json, txt). Para lotes, cargar_actas_periodo() arma las actas de
+todo un periodo con un número fijo de consultas.
+
+Al cerrar una evaluación su ActaData se congela en ActaSnapshot
+(crear_snapshots); desde ahí el acta se lee de esa sola fila.
+"""
+import json
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import SEDE_POR_DEFECTO, ActaSnapshot, ConductaSello, Evaluacion, Objetivo, RespuestaConducta, RespuestaObjetivo
+from .puntajes import equivalente_0_120, nivel_desempeno, numero_acta_de, score_desde_respuestas
+from .sedes import q_sede
+
+
+@dataclass(frozen=True)
+class FilaActa:
+    """Ítem del catálogo (conducta u objetivo) con su cumplimiento (None = sin respuesta)."""
+    item_id: int
+    texto: str
+    ponderacion: int
+    cumplimiento: str | None
+
+
+@dataclass(frozen=True)
+class ActaData:
+    evaluacion_id: int
+    numero_acta: str
+    fecha_firma: date
+    cerrada: bool
+
+    coordinador: str
+    periodo_id: int
+    periodo: str
+    fecha_evaluacion: datetime
+
+    score: float | None
+    equivalente: float | None
+    nivel: str
+    nivel_color: str
+
+    conductas: tuple[FilaActa, ...]
+    objetivos: tuple[FilaActa, ...]
+
+    fortalezas: str
+    oportunidades_mejora: str
+    resumen_comentarios: str
+    retroalimentacion: str
+
+    # Al final y con valor por defecto: los snapshots anteriores no lo traen
+    sede: str = SEDE_POR_DEFECTO
+    anio: int | None = None
+
+    def as_dict(self):
+        """Dict serializable a JSON (fechas en ISO 8601)."""
+        d = asdict(self)
+        d["fecha_firma"] = self.fecha_firma.isoformat()
+        d["fecha_evaluacion"] = self.fecha_evaluacion.isoformat()
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        """Inverso de as_dict() (p. ej. para leer un ActaSnapshot)."""
+        d = dict(d)
+        d["fecha_firma"] = date.fromisoformat(d["fecha_firma"])
+        d["fecha_evaluacion"] = datetime.fromisoformat(d["fecha_evaluacion"])
+        d["conductas"] = tuple(FilaActa(**f) for f in d["conductas"])
+        d["objetivos"] = tuple(FilaActa(**f) for f in d["objetivos"])
+        # Snapshots sin año: el de la fecha de la evaluación
+        d.setdefault("anio", d["fecha_evaluacion"].year)
+        return cls(**d)
+
+
+# -------- Construcción --------
+
+def _filas(catalogo, respuestas, campo_texto):
+    filas = []
+    for item in catalogo:
+        r = respuestas.get(item.id)
+        filas.append(FilaActa(
+            item_id=item.id,
+            texto=getattr(item, campo_texto),
+            ponderacion=item.ponderacion,
+            cumplimiento=r.cumplimiento if r else None,
+        ))
+    return tuple(filas)
+
+
+def construir_acta(evaluacion, conductas, objetivos, resp_conductas, resp_objetivos, fecha_firma=None):
+    """
+    Arma el ActaData a partir de objetos ya cargados (no consulta la BD).
+    `evaluacion` debe traer coordinador y periodo (select_related);
+    resp_* son dicts {conducta_id/objetivo_id: respuesta}.
+    """
+    score = score_desde_respuestas(resp_conductas.values(), resp_objetivos.values())
+    equivalente = equivalente_0_120(score)
+    nivel, nivel_color = nivel_desempeno(equivalente)
+
+    return ActaData(
+        evaluacion_id=evaluacion.id,
+        numero_acta=numero_acta_de(evaluacion),
+        fecha_firma=fecha_firma or timezone.localdate(),
+        cerrada=evaluacion.cerrada,
+        coordinador=evaluacion.coordinador.nombre_completo,
+        periodo_id=evaluacion.periodo_id,
+        periodo=evaluacion.periodo.name,
+        fecha_evaluacion=evaluacion.fecha_creacion,
+        score=score,
+        equivalente=equivalente,
+        nivel=nivel,
+        nivel_color=nivel_color,
+        conductas=_filas(conductas, resp_conductas, "conducta"),
+        objetivos=_filas(objetivos, resp_objetivos, "objetivo"),
+        fortalezas=evaluacion.fortalezas,
+        oportunidades_mejora=evaluacion.oportunidades_mejora,
+        resumen_comentarios=evaluacion.resumen_comentarios,
+        retroalimentacion=evaluacion.retroalimentacion,
+        sede=evaluacion.coordinador.sede or SEDE_POR_DEFECTO,
+        anio=evaluacion.periodo.anio,
+    )
+
+
+def cargar_acta(evaluacion):
+    conductas = list(ConductaSello.objects.all().order_by("id"))
+    objetivos = list(Objetivo.objects.all().order_by("id"))
+    resp_conductas = {r.conducta_id: r for r in RespuestaConducta.objects.filter(evaluacion=evaluacion)}
+    resp_objetivos = {r.objetivo_id: r for r in RespuestaObjetivo.objects.filter(evaluacion=evaluacion)}
+    return construir_acta(evaluacion, conductas, objetivos, resp_conductas, resp_objetivos)
+
+
+async def acargar_acta(evaluacion):
+    conductas = [c async for c in ConductaSello.objects.all().order_by("id")]
+    objetivos = [o async for o in Objetivo.objects.all().order_by("id")]
+    resp_conductas = {
+        r.conducta_id: r async for r in RespuestaConducta.objects.filter(evaluacion=evaluacion)
+    }
+    resp_objetivos = {
+        r.objetivo_id: r async for r in RespuestaObjetivo.objects.filter(evaluacion=evaluacion)
+    }
+    return construir_acta(evaluacion, conductas, objetivos, resp_conductas, resp_objetivos)
+
+
+def cargar_actas_periodo(periodo, solo_cerradas=False):
+    """
+    Actas de todas las evaluaciones de un periodo (de la sede activa, si hay
+    una) en 5 consultas
+    (evaluaciones, 2 catálogos, 2 tablas de respuestas), sin importar cuántas sean.
+    """
+    evaluaciones = Evaluacion.objects.filter(q_sede("coordinador__sede"), periodo=periodo)
+    if solo_cerradas:
+        evaluaciones = evaluaciones.filter(cerrada=True)
+    return cargar_actas(evaluaciones)
+
+
+def cargar_actas(evaluaciones):
+    """Actas de un queryset de evaluaciones, con las mismas 5 consultas."""
+    evaluaciones = list(
+        evaluaciones.select_related("coordinador", "periodo").order_by("coordinador__nombre_completo")
+    )
+
+    conductas = list(ConductaSello.objects.all().order_by("id"))
+    objetivos = list(Objetivo.objects.all().order_by("id"))
+
+    resp_c, resp_o = {}, {}
+    for r in RespuestaConducta.objects.filter(evaluacion__in=evaluaciones):
+        resp_c.setdefault(r.evaluacion_id, {})[r.conducta_id] = r
+    for r in RespuestaObjetivo.objects.filter(evaluacion__in=evaluaciones):
+        resp_o.setdefault(r.evaluacion_id, {})[r.objetivo_id] = r
+
+    fecha_firma = timezone.localdate()
+    return [
+        construir_acta(e, conductas, objetivos, resp_c.get(e.id, {}), resp_o.get(e.id, {}), fecha_firma)
+        for e in evaluaciones
+    ]
+
+
+# -------- Snapshots de evaluaciones cerradas --------
+
+def crear_snapshots(evaluaciones):
+    """
+    Congela el acta de cada evaluación del queryset (llamar al cerrarlas).
+    Mientras siga cerrada el documento no cambia; si se reabrió y se vuelve a
+    cerrar, el snapshot existente se reemplaza (upsert) por el acta actual.
+    """
+    ActaSnapshot.objects.bulk_create(
+        [ActaSnapshot(evaluacion_id=a.evaluacion_id, documento=a.as_dict()) for a in cargar_actas(evaluaciones)],
+        batch_size=200,
+        update_conflicts=True,
+        unique_fields=["evaluacion"],
+        update_fields=["documento"],
+    )
+
+
+def descartar_acta_congelada(evaluacion):
+    """
+    Al reabrir una evaluación: borra su snapshot y el PDF generado, que ya no
+    corresponden a lo que se va a editar. No guarda `evaluacion`.
+    """
+    ActaSnapshot.objects.filter(evaluacion_id=evaluacion.id).delete()
+    if evaluacion.acta_pdf:
+        evaluacion.acta_pdf.delete(save=False)
+
+
+def acta_desde_snapshot(snapshot):
+    return ActaData.from_dict(snapshot.documento)
+
+
+# -------- Renderers --------
+
+class RendererActa(ABC):
+    """Convierte un ActaData en bytes. `request` es opcional (solo HTML lo usa)."""
+    content_type = "application/octet-stream"
+    extension = "bin"
+
+    @abstractmethod
+    def render(self, acta: ActaData, request=None) -> bytes:
+        ...
+
+    def nombre_archivo(self, acta: ActaData):
+        return f"acta_{acta.numero_acta}.{self.extension}"
+
+
+class RendererHTML(RendererActa):
+    content_type = "text/html; charset=utf-8"
+    extension = "html"
+
+    def render(self, acta, request=None):
+        return render_to_string("acta_evaluacion.html", {"acta": acta}, request=request).encode("utf-8")
+
+
+class RendererPDF(RendererActa):
+    content_type = "application/pdf"
+    extension = "pdf"
+
+    def render(self, acta, request=None):
+        # Import diferido: ReportLab solo se carga en el proceso que arma PDFs
+        from .pdf import construir_pdf_acta
+
+        return construir_pdf_acta(acta)
+
+
+class RendererJSON(RendererActa):
+    content_type = "application/json"
+    extension = "json"
+
+    def render(self, acta, request=None):
+        return json.dumps(acta.as_dict(), ensure_ascii=False, indent=2).encode("utf-8")
+
+
+class RendererTexto(RendererActa):
+    content_type = "text/plain; charset=utf-8"
+    extension = "txt"
+
+    def render(self, acta, request=None):
+        def fmt(v, decimales):
+            return f"{v:.{decimales}f}" if v is not None else "—"
+
+        lineas = [
+            f"INSTITUTO PROFESIONAL INACAP — SEDE {acta.sede.upper()}",
+            f"Evaluación de Desempeño Coordinador {acta.anio}",
+            f"N° Acta: {acta.numero_acta}",
+            f"Fecha de firma: {acta.fecha_firma.strftime('%d-%m-%Y')}",
+            "",
+            f"Coordinador evaluado: {acta.coordinador}",
+            f"Periodo: {acta.periodo}",
+            f"Fecha evaluación: {acta.fecha_evaluacion.strftime('%d-%m-%Y %H:%M')}",
+            f"Resultado (1–5): {fmt(acta.score, 2)}",
+            f"Equivalente (0–120): {fmt(acta.equivalente, 1)}",
+            f"Nivel: {acta.nivel}",
+        ]
+        for titulo, filas in (("Conductas Sello", acta.conductas), ("Objetivos de Gestión", acta.objetivos)):
+            lineas += ["", titulo]
+            lineas += [f"- {f.texto} ({f.ponderacion}%): {f.cumplimiento or '—'}" for f in filas]
+        lineas += [
+            "",
+            "Comentarios",
+            f"Fortalezas: {acta.fortalezas or '—'}",
+            f"Oportunidades de mejora: {acta.oportunidades_mejora or '—'}",
+            f"Resumen: {acta.resumen_comentarios or '—'}",
+            f"Retroalimentación: {acta.retroalimentacion or '—'}",
+        ]
+        return ("\n".join(lineas) + "\n").encode("utf-8")
+
+
+RENDERERS = {
+    "html": RendererHTML(),
+    "pdf": RendererPDF(),
+    "json": RendererJSON(),
+    "txt": RendererTexto(),
+}
+
+
+def respuesta_acta(contenido, renderer, acta):
+    resp = HttpResponse(contenido, content_type=renderer.content_type)
+    if not isinstance(renderer, RendererHTML):
+        resp["Content-Disposition"] = f'inline; filename="{renderer.nombre_archivo(acta)}"'
+    return resp
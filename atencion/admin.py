@@ -1,22 +1,49 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import (
     Coordinador, Periodo, Pauta, Objetivo, ConductaSello,
-    Evaluacion, RespuestaObjetivo, RespuestaConducta
+    Evaluacion, RespuestaObjetivo, RespuestaConducta, Tarea
 )
+from .actas import crear_snapshots, descartar_acta_congelada
+from .busqueda import q_nombre_coordinador
+from .periodos import abrir_periodo, cerrar_evaluaciones
+from .puntajes import scores_por_evaluacion
+from .tareas import al_confirmar, encolar
 
 
 @admin.register(Coordinador)
 class CoordinadorAdmin(admin.ModelAdmin):
     list_display = ("nombre_completo", "sede", "area_academica", "is_active")
-    search_fields = ("nombre_completo", "sede", "area_academica")
+    search_fields = ("nombre_normalizado",)
     list_filter = ("sede", "is_active")
+    ordering = ("nombre_normalizado",)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Misma búsqueda que el typeahead: columna normalizada e indexada
+        # (también la usan los autocomplete_fields que apuntan a Coordinador)
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(q_nombre_coordinador(search_term)), False
 
 
 @admin.register(Periodo)
 class PeriodoAdmin(admin.ModelAdmin):
-    list_display = ("name",)
+    list_display = ("name", "anio", "fecha_inicio", "fecha_fin", "estado")
+    list_filter = ("anio", "estado")
     search_fields = ("name",)
 
+    actions = ["abrir_periodos", "abrir_periodos_con_respuestas"]
+
+    @admin.action(description="Abrir periodo: crear evaluaciones de todos los coordinadores activos")
+    def abrir_periodos(self, request, queryset):
+        creadas = sum(abrir_periodo(p) for p in queryset)
+        self.message_user(request, f"Evaluaciones creadas: {creadas}")
+
+    @admin.action(description="Abrir periodo con respuestas vacías del catálogo")
+    def abrir_periodos_con_respuestas(self, request, queryset):
+        creadas = sum(abrir_periodo(p, con_respuestas=True) for p in queryset)
+        self.message_user(request, f"Evaluaciones creadas: {creadas}")
+
 
 @admin.register(Pauta)
 class PautaAdmin(admin.ModelAdmin):
@@ -27,6 +54,7 @@ class PautaAdmin(admin.ModelAdmin):
 @admin.register(Objetivo)
 class ObjetivoAdmin(admin.ModelAdmin):
     list_display = ("objetivo", "eje_estrategico", "ponderacion")
+    autocomplete_fields = ("pauta",)
     search_fields = ("objetivo", "eje_estrategico", "indicador")
     list_filter = ("eje_estrategico",)
 
@@ -34,17 +62,26 @@ class ObjetivoAdmin(admin.ModelAdmin):
 @admin.register(ConductaSello)
 class ConductaSelloAdmin(admin.ModelAdmin):
     list_display = ("conducta", "ponderacion")
+    autocomplete_fields = ("pauta",)
     search_fields = ("conducta", "descripcion")
 
 
 class RespuestaObjetivoInline(admin.TabularInline):
     model = RespuestaObjetivo
     extra = 0
+    autocomplete_fields = ("objetivo",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("objetivo")
 
 
 class RespuestaConductaInline(admin.TabularInline):
     model = RespuestaConducta
     extra = 0
+    autocomplete_fields = ("conducta",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("conducta")
 
 
 @admin.register(Evaluacion)
@@ -52,16 +89,74 @@ class EvaluacionAdmin(admin.ModelAdmin):
     list_display = ("coordinador", "periodo", "score_total", "cerrada", "fecha_creacion")
     list_filter = ("periodo", "cerrada")
     search_fields = ("coordinador__nombre_completo",)
+    list_select_related = ("coordinador", "periodo")
+    autocomplete_fields = ("coordinador", "periodo")
+    show_full_result_count = False
     inlines = [RespuestaObjetivoInline, RespuestaConductaInline]
 
+    actions = ["recalcular_scores", "cerrar_seleccionadas"]
+
+    def save_model(self, request, obj, form, change):
+        if change and "cerrada" in form.changed_data and not obj.cerrada:
+            # Reabierta: el acta congelada y su PDF quedan obsoletos
+            descartar_acta_congelada(obj)
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        if "cerrada" in form.changed_data and form.instance.cerrada:
+            # Cerrada desde el formulario: como en evaluacion_detalle, con las respuestas ya guardadas
+            crear_snapshots(Evaluacion.objects.filter(id=form.instance.id))
+            al_confirmar(encolar, "recalcular_score", evaluacion_id=form.instance.id)
+            al_confirmar(encolar, "generar_acta_pdf", evaluacion_id=form.instance.id)
+
+    @admin.action(description="Cerrar evaluaciones completas seleccionadas (y generar actas)")
+    def cerrar_seleccionadas(self, request, queryset):
+        cerradas, incompletas = cerrar_evaluaciones(queryset)
+        self.message_user(request, f"Cerradas: {cerradas}. Incompletas (siguen abiertas): {incompletas}")
+
+    @admin.action(description="Recalcular score total de evaluaciones seleccionadas")
+    def recalcular_scores(self, request, queryset):
+        # 2 consultas de lectura + UPDATE por lotes, sin importar la selección
+        scores = scores_por_evaluacion(queryset)
+        evaluaciones = [Evaluacion(id=eid, score_total=scores.get(eid)) for eid in queryset.values_list("id", flat=True)]
+        Evaluacion.objects.bulk_update(evaluaciones, ["score_total"], batch_size=500)
+        self.message_user(request, f"Scores recalculados: {len(evaluaciones)}")
+
+
+class RespuestaAdminMixin:
+    """Editar una respuesta suelta también cambia la marca de su evaluación (caché del panel)."""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        Evaluacion.objects.filter(id=obj.evaluacion_id).update(fecha_actualizacion=timezone.now())
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        Evaluacion.objects.filter(id=obj.evaluacion_id).update(fecha_actualizacion=timezone.now())
+
 
 @admin.register(RespuestaObjetivo)
-class RespuestaObjetivoAdmin(admin.ModelAdmin):
+class RespuestaObjetivoAdmin(RespuestaAdminMixin, admin.ModelAdmin):
     list_display = ("evaluacion", "objetivo", "cumplimiento")
     search_fields = ("evaluacion__coordinador__nombre_completo", "objetivo__objetivo")
+    list_select_related = ("evaluacion__coordinador", "evaluacion__periodo", "objetivo")
+    autocomplete_fields = ("evaluacion", "objetivo")
+    show_full_result_count = False
 
 
 @admin.register(RespuestaConducta)
-class RespuestaConductaAdmin(admin.ModelAdmin):
+class RespuestaConductaAdmin(RespuestaAdminMixin, admin.ModelAdmin):
     list_display = ("evaluacion", "conducta", "cumplimiento")
     search_fields = ("evaluacion__coordinador__nombre_completo", "conducta__conducta")
+    list_select_related = ("evaluacion__coordinador", "evaluacion__periodo", "conducta")
+    autocomplete_fields = ("evaluacion", "conducta")
+    show_full_result_count = False
+
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ("id", "tipo", "estado", "intentos", "ejecutar_desde", "fecha_actualizacion")
+    list_filter = ("estado", "tipo")
+    show_full_result_count = False
+    readonly_fields = ("fecha_creacion", "fecha_actualizacion")
@@ -0,0 +1,158 @@
+"""
+Búsquedas:
+
+- buscar_comentarios: texto completo en los comentarios de las evaluaciones
+  (fortalezas, oportunidades de mejora, resumen y retroalimentación). El índice
+  lo crea la migración 0006 (la 0010 recrea sus triggers en SQLite): FTS5 en
+  SQLite y columna tsvector con índice GIN en PostgreSQL. En otros motores se
+  cae a icontains, sin ranking.
+- buscar_coordinadores: typeahead sobre Coordinador.nombre_normalizado.
+
+Ambas se limitan a la sede activa (q_sede), igual que el panel.
+"""
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Coordinador, Evaluacion, normalizar_nombre
+from .sedes import q_sede, sede_actual
+
+# Delimitadores del término encontrado dentro del fragmento; se reemplazan
+# por <mark> después de escapar el texto.
+MARCA_INI, MARCA_FIN = "⟦", "⟧"
+
+CAMPOS_COMENTARIO = ("fortalezas", "oportunidades_mejora", "resumen_comentarios", "retroalimentacion")
+
+
+def _terminos(texto):
+    return re.findall(r"\w+", texto or "")
+
+
+def _filtros(periodo_id, sede):
+    """Condiciones extra (SQL, params) sobre la evaluación `e` para los motores con SQL crudo."""
+    sql, params = "", []
+    if periodo_id:
+        sql += " AND e.periodo_id = %s"
+        params.append(periodo_id)
+    if sede:
+        sql += " AND e.coordinador_id IN (SELECT id FROM atencion_coordinador WHERE sede = %s)"
+        params.append(sede)
+    return sql, params
+
+
+def _buscar_sqlite(conexion, terminos, periodo_id, sede, limite):
+    # Cada término entre comillas y como prefijo: la sintaxis FTS5 del usuario no llega al MATCH
+    consulta = " ".join(f'"{t}"*' for t in terminos)
+    sql = """
+        SELECT f.rowid, bm25(atencion_evaluacion_fts) AS rank,
+               snippet(atencion_evaluacion_fts, -1, %s, %s, '…', 16)
+        FROM atencion_evaluacion_fts f
+        JOIN atencion_evaluacion e ON e.id = f.rowid
+        WHERE atencion_evaluacion_fts MATCH %s {filtro}
+        ORDER BY rank
+        LIMIT %s
+    """
+    filtro, params_filtro = _filtros(periodo_id, sede)
+    params = [MARCA_INI, MARCA_FIN, consulta, *params_filtro, limite]
+    with conexion.cursor() as cursor:
+        cursor.execute(sql.format(filtro=filtro), params)
+        # bm25: menor es mejor; se invierte para que el rank crezca con la relevancia
+        return [(eid, -rank, fragmento) for eid, rank, fragmento in cursor.fetchall()]
+
+
+def _buscar_postgres(conexion, terminos, periodo_id, sede, limite):
+    sql = """
+        SELECT e.id, ts_rank(e.busqueda, q) AS rank,
+               ts_headline('spanish',
+                   concat_ws(' … ', e.fortalezas, e.oportunidades_mejora, e.resumen_comentarios, e.retroalimentacion),
+                   q, %s)
+        FROM atencion_evaluacion e, websearch_to_tsquery('spanish', %s) q
+        WHERE e.busqueda @@ q {filtro}
+        ORDER BY rank DESC
+        LIMIT %s
+    """
+    opciones = f"StartSel={MARCA_INI}, StopSel={MARCA_FIN}, MaxFragments=2, MaxWords=24, MinWords=8"
+    filtro, params_filtro = _filtros(periodo_id, sede)
+    params = [opciones, " ".join(terminos), *params_filtro, limite]
+    with conexion.cursor() as cursor:
+        cursor.execute(sql.format(filtro=filtro), params)
+        return cursor.fetchall()
+
+
+def _buscar_generico(conexion, terminos, periodo_id, sede, limite):
+    qs = Evaluacion.objects.filter(q_sede("coordinador__sede"))
+    for t in terminos:
+        qs = qs.filter(
+            Q(fortalezas__icontains=t) | Q(oportunidades_mejora__icontains=t)
+            | Q(resumen_comentarios__icontains=t) | Q(retroalimentacion__icontains=t)
+        )
+    if periodo_id:
+        qs = qs.filter(periodo_id=periodo_id)
+    filas = []
+    for e in qs.order_by("-id").only("id", *CAMPOS_COMENTARIO)[:limite]:
+        texto = " … ".join(getattr(e, c) for c in CAMPOS_COMENTARIO if getattr(e, c))
+        filas.append((e.id, 0.0, texto[:200]))
+    return filas
+
+
+def resaltar(fragmento):
+    return mark_safe(escape(fragmento).replace(MARCA_INI, "<mark>").replace(MARCA_FIN, "</mark>"))
+
+
+def buscar_comentarios(texto, periodo_id=None, limite=50):
+    """
+    Evaluaciones (de la sede activa) cuyos comentarios contienen los
+    términos, por relevancia. Retorna dicts {evaluacion, rank, fragmento} con el fragmento ya resaltado.
+    """
+    terminos = _terminos(texto)
+    if not terminos:
+        return []
+
+    # SQL crudo: la base la elige el router (sede activa, réplica en vistas de solo lectura)
+    conexion = connections[router.db_for_read(Evaluacion)]
+    buscar = {"sqlite": _buscar_sqlite, "postgresql": _buscar_postgres}.get(conexion.vendor, _buscar_generico)
+    filas = buscar(conexion, terminos, periodo_id, sede_actual(), limite)
+
+    evaluaciones = Evaluacion.objects.select_related("coordinador", "periodo").in_bulk([f[0] for f in filas])
+    return [
+        {"evaluacion": evaluaciones[eid], "rank": rank, "fragmento": resaltar(fragmento)}
+        for eid, rank, fragmento in filas
+        if eid in evaluaciones
+    ]
+
+
+def q_nombre_coordinador(texto):
+    """
+    Q para "el nombre normalizado empieza con `texto` o alguna de sus palabras
+    lo hace". El prefijo es un rango sobre el índice B-tree (no LIKE 'x%', que
+    con ESCAPE no usa índice en SQLite); el resto usa el trigram en PostgreSQL.
+    """
+    q = normalizar_nombre(texto)
+    return Q(nombre_normalizado__gte=q, nombre_normalizado__lt=q + "\uffff") | Q(nombre_normalizado__contains=f" {q}")
+
+
+def buscar_coordinadores(texto, limite=10, solo_activos=True):
+    """
+    Coordinadores (de la sede activa) cuyo nombre (sin tildes ni mayúsculas)
+    empieza con `texto` y, si faltan, aquellos con otra palabra que empieza
+    así (p. ej. el apellido).
+    """
+    q = normalizar_nombre(texto)
+    if not q:
+        return []
+    qs = Coordinador.objects.filter(q_sede())
+    if solo_activos:
+        qs = qs.filter(is_active=True)
+    qs = qs.only("id", "nombre_completo", "sede").order_by("nombre_normalizado")
+
+    # Rango [q, q + U+FFFF): lo resuelve el índice en cualquier motor
+    encontrados = list(qs.filter(nombre_normalizado__gte=q, nombre_normalizado__lt=q + "\uffff")[:limite])
+    if len(encontrados) < limite:
+        encontrados += list(
+            qs.filter(nombre_normalizado__contains=f" {q}")
+            .exclude(id__in=[c.id for c in encontrados])[: limite - len(encontrados)]
+        )
+    return encontrados
@@ -0,0 +1,155 @@
+"""
+Coalescencia de cálculos idénticos concurrentes ("single flight").
+
+acompartido(clave, fn, ...) ejecuta fn una sola vez aunque lleguen varias
+llamadas con la misma clave al mismo tiempo: la primera (líder) calcula y las
+demás esperan y reciben ese mismo resultado (o la misma excepción). No es una
+caché: terminado el cálculo, la siguiente llamada vuelve a calcular.
+
+- En el proceso: un Future por clave (sirve a corutinas de distintos event
+  loops). Si el líder se cancela (p. ej. su cliente se desconectó), quienes
+  esperaban no reciben esa cancelación: uno de ellos pasa a ser el líder.
+  Quien espera más de COALESCENCIA_ESPERA_MAX segundos calcula por su cuenta.
+- Entre procesos, solo si CACHES tiene una caché compartida (Redis,
+  Memcached, archivo, BD): lock con cache.add() y el resultado en la caché
+  bajo un token del vuelo, para que solo lo tomen quienes esperaban ese
+  cálculo. Con LocMemCache o DummyCache (cada proceso la suya) no se toca la
+  caché: se coalesce solo dentro del proceso.
+
+El resultado se comparte tal cual: quien lo recibe no debe modificarlo.
+"""
+import asyncio
+import inspect
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+
+
+PREFIJO = "vuelo"
+INTERVALO_SONDEO = 0.05
+
+# Backends que no salen del proceso: no sirven para coalescer entre workers
+CACHES_LOCALES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+_vuelos = {}
+_vuelos_lock = threading.Lock()
+
+
+class _LiderCancelado(Exception):
+    """El líder no terminó (cancelado): quien esperaba vuelve a intentar."""
+
+
+def espera_max():
+    return getattr(settings, "COALESCENCIA_ESPERA_MAX", 30)
+
+
+def cache_compartida():
+    backend = settings.CACHES.get(DEFAULT_CACHE_ALIAS, {}).get("BACKEND", "")
+    return backend not in CACHES_LOCALES
+
+
+def _unirse(clave):
+    """(future, es_lider): el líder registra el Future; los demás reciben el existente."""
+    with _vuelos_lock:
+        future = _vuelos.get(clave)
+        if future is not None:
+            return future, False
+        future = _vuelos[clave] = Future()
+        return future, True
+
+
+def _terminar(clave, future, resultado=None, error=None):
+    with _vuelos_lock:
+        _vuelos.pop(clave, None)
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(resultado)
+
+
+# -------- Entre procesos (caché compartida) --------
+
+def _claves(clave):
+    return f"{PREFIJO}:lock:{clave}", f"{PREFIJO}:resultado:{clave}"
+
+
+def _resultado_de(valor, token):
+    # Solo vale el resultado del vuelo que se estaba esperando
+    if valor is not None and valor[0] == token:
+        return True, valor[1]
+    return False, None
+
+
+async def _acalcular_global(clave, fn, args, kwargs):
+    lock, clave_resultado = _claves(clave)
+    token = uuid.uuid4().hex
+    limite = time.monotonic() + espera_max()
+    while True:
+        if await cache.aadd(lock, token, espera_max()):
+            try:
+                resultado = await _llamar(fn, args, kwargs)
+                await cache.aset(clave_resultado, (token, resultado), espera_max())
+                return resultado
+            finally:
+                await cache.adelete(lock)
+        ajeno = await cache.aget(lock)
+        while ajeno is not None and time.monotonic() < limite:
+            await asyncio.sleep(INTERVALO_SONDEO)
+            listo, resultado = _resultado_de(await cache.aget(clave_resultado), ajeno)
+            if listo:
+                return resultado
+            if await cache.aget(lock) != ajeno:
+                break
+        if time.monotonic() >= limite:
+            # El otro proceso tarda demasiado (o murió): se calcula sin esperar más
+            return await _llamar(fn, args, kwargs)
+
+
+async def _llamar(fn, args, kwargs):
+    resultado = fn(*args, **kwargs)
+    if inspect.isawaitable(resultado):
+        resultado = await resultado
+    return resultado
+
+
+# -------- API --------
+
+async def acompartido(clave, fn, *args, **kwargs):
+    """fn(*args, **kwargs) una sola vez por clave entre llamadas concurrentes; fn puede ser una corutina."""
+    limite = time.monotonic() + espera_max()
+    while True:
+        future, lider = _unirse(clave)
+        if lider:
+            break
+        espera = asyncio.wrap_future(future)
+        # Si este seguidor se rinde, nadie lee el resultado: que asyncio no lo reporte
+        espera.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            # shield: si este seguidor se rinde o se cancela, el Future del líder sigue
+            return await asyncio.wait_for(asyncio.shield(espera), max(limite - time.monotonic(), 0))
+        except _LiderCancelado:
+            continue  # el primero en volver a unirse es el nuevo líder
+        except asyncio.TimeoutError:
+            return await _llamar(fn, args, kwargs)
+
+    try:
+        if cache_compartida():
+            resultado = await _acalcular_global(clave, fn, args, kwargs)
+        else:
+            resultado = await _llamar(fn, args, kwargs)
+    except Exception as e:
+        _terminar(clave, future, error=e)
+        raise
+    except BaseException:
+        # Cancelación (o salida del proceso): no es un resultado para los demás
+        _terminar(clave, future, error=_LiderCancelado())
+        raise
+    _terminar(clave, future, resultado)
+    return resultado
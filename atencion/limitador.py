@@ -0,0 +1,150 @@
+"""
+Límite de concurrencia para los PDFs de actas que se arman en las vistas.
+
+- Por proceso: ACTA_PDF_WORKERS renders a la vez (pool de hilos) y como
+  mucho ACTA_PDF_COLA esperando. Con la cola llena se rechaza al instante con
+  Saturado, que la vista responde como 503 + Retry-After.
+- Por host (opcional): ACTA_PDF_SLOTS_HOST cupos compartidos por todos los
+  procesos del servidor, un archivo con lock fcntl por cupo en
+  ACTA_PDF_SLOTS_DIR.
+- Un render que no empieza dentro de ACTA_PDF_ESPERA_MAX segundos se
+  descarta (el cliente probablemente ya se fue).
+
+estadisticas() resume el tiempo de espera en cola de los últimos renders.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin cupos por host, solo el límite por proceso
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class Saturado(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Generación de PDF saturada; reintentar en {retry_after}s")
+        self.retry_after = retry_after
+
+
+class LimitadorPDF:
+    def __init__(self, workers=2, cola=4, espera_max=10, slots_host=0, dir_slots=None, retry_after=5):
+        self.workers = workers
+        self.capacidad = workers + cola
+        self.espera_max = espera_max
+        self.slots_host = slots_host if fcntl is not None else 0
+        self.dir_slots = dir_slots or os.path.join(tempfile.gettempdir(), "mgd-acta-pdf-slots")
+        self.retry_after = retry_after
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="acta-pdf")
+
+        self._lock = threading.Lock()
+        self._pendientes = 0  # en curso + en cola
+        self.completados = 0
+        self.rechazados = 0
+        self.esperas_ms = deque(maxlen=1000)
+
+    # -------- Admisión --------
+
+    def _admitir(self):
+        with self._lock:
+            if self._pendientes >= self.capacidad:
+                self.rechazados += 1
+                logger.warning("PDF rechazado: %s renders pendientes (capacidad %s)", self._pendientes, self.capacidad)
+                raise Saturado(self.retry_after)
+            self._pendientes += 1
+
+    def _liberar(self, _future=None):
+        with self._lock:
+            self._pendientes -= 1
+
+    def _rechazar(self, motivo):
+        with self._lock:
+            self.rechazados += 1
+        logger.warning("PDF rechazado: %s", motivo)
+        raise Saturado(self.retry_after)
+
+    @contextmanager
+    def _cupo_host(self, limite):
+        if not self.slots_host:
+            yield
+            return
+        os.makedirs(self.dir_slots, exist_ok=True)
+        while True:
+            for i in range(self.slots_host):
+                f = open(os.path.join(self.dir_slots, f"cupo-{i}.lock"), "a")
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    f.close()
+                    continue
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                    f.close()
+                return
+            if time.monotonic() >= limite:
+                self._rechazar("sin cupo libre en el host")
+            time.sleep(0.05)
+
+    # -------- Ejecución --------
+
+    def _ejecutar(self, fn, args, encolado):
+        # Corre en un hilo del pool
+        with self._cupo_host(encolado + self.espera_max):
+            espera = time.monotonic() - encolado
+            if espera > self.espera_max:
+                self._rechazar(f"{espera:.1f}s en cola")
+            self.esperas_ms.append(espera * 1000)
+            resultado = fn(*args)
+        with self._lock:
+            self.completados += 1
+        return resultado
+
+    async def ejecutar(self, fn, *args):
+        """Ejecuta fn(*args) en el pool respetando los límites; Saturado si no hay lugar."""
+        self._admitir()
+        future = self.executor.submit(self._ejecutar, fn, args, time.monotonic())
+        # Se libera al terminar o cancelarse en el pool, no cuando el cliente se desconecta
+        future.add_done_callback(self._liberar)
+        return await asyncio.wrap_future(future)
+
+    def estadisticas(self):
+        esperas = sorted(self.esperas_ms)
+
+        def percentil(p):
+            return round(esperas[min(len(esperas) - 1, int(len(esperas) * p))], 1) if esperas else None
+
+        return {
+            "workers": self.workers,
+            "capacidad": self.capacidad,
+            "slots_host": self.slots_host,
+            "pendientes": self._pendientes,
+            "completados": self.completados,
+            "rechazados": self.rechazados,
+            "espera_ms": {"p50": percentil(0.5), "p95": percentil(0.95), "max": percentil(1)},
+        }
+
+
+@lru_cache(maxsize=1)
+def get_limitador():
+    return LimitadorPDF(
+        workers=getattr(settings, "ACTA_PDF_WORKERS", 2),
+        cola=getattr(settings, "ACTA_PDF_COLA", 4),
+        espera_max=getattr(settings, "ACTA_PDF_ESPERA_MAX", 10),
+        slots_host=getattr(settings, "ACTA_PDF_SLOTS_HOST", 0),
+        dir_slots=getattr(settings, "ACTA_PDF_SLOTS_DIR", None),
+        retry_after=getattr(settings, "ACTA_PDF_RETRY_AFTER", 5),
+    )
@@ -0,0 +1,70 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+# Se ejecuta en un proceso nuevo, igual que un worker recién levantado:
+# django.setup() + URLconf (importa todas las vistas).
+SCRIPT_ARRANQUE = """
+import json, os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mgd.settings")
+t0 = time.perf_counter()
+import django
+django.setup()
+import mgd.urls
+t1 = time.perf_counter()
+rss_kib = 0
+with open("/proc/self/status") as f:
+    for linea in f:
+        if linea.startswith("VmRSS:"):
+            rss_kib = int(linea.split()[1])
+print(json.dumps({
+    "segundos": round(t1 - t0, 4),
+    "rss_kib": rss_kib,
+    "modulos": len(sys.modules),
+    "reportlab": any(m.startswith("reportlab") for m in sys.modules),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Mide el arranque de un worker: tiempo de import, RSS tras django.setup() y módulos más pesados"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=10, help="Módulos más lentos a mostrar (-X importtime)")
+        parser.add_argument("--historial", help="Archivo .jsonl donde agregar el resultado para seguir la tendencia")
+
+    def handle(self, *args, **options):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", SCRIPT_ARRANQUE],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+        resultado = json.loads(proc.stdout.strip().splitlines()[-1])
+
+        # Formato de -X importtime: "import time: self [us] | cumulative | imported package"
+        modulos = []
+        for linea in proc.stderr.splitlines():
+            if not linea.startswith("import time:") or "cumulative" in linea:
+                continue
+            _, acumulado, nombre = linea[len("import time:"):].split("|")
+            if not nombre.startswith(" " * 2):  # solo imports de primer nivel
+                modulos.append((int(acumulado), nombre.strip()))
+        modulos.sort(reverse=True)
+
+        self.stdout.write(
+            f"Arranque: {resultado['segundos'] * 1000:.0f} ms | RSS: {resultado['rss_kib'] / 1024:.1f} MiB | "
+            f"Módulos: {resultado['modulos']} | ReportLab cargado: {'sí' if resultado['reportlab'] else 'no'}"
+        )
+        for acumulado, nombre in modulos[:options["top"]]:
+            self.stdout.write(f"  {acumulado / 1000:8.1f} ms  {nombre}")
+
+        if options["historial"]:
+            resultado["fecha"] = timezone.now().isoformat()
+            with Path(options["historial"]).open("a", encoding="utf-8") as f:
+                f.write(json.dumps(resultado) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Resultado agregado a {options['historial']}"))
@@ -0,0 +1,69 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from atencion.models import (
+    ConductaSello, Coordinador, Evaluacion, Objetivo, Periodo, RespuestaConducta, RespuestaObjetivo,
+)
+from atencion.actas import construir_acta
+from atencion.pdf import LayoutActa, construir_pdf_acta, get_layout
+
+
+class Command(BaseCommand):
+    help = "Mide el render de un lote de actas PDF: layout nuevo por acta vs layout compartido (sin BD)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--actas", type=int, default=500)
+        parser.add_argument("--items", type=int, default=10, help="Ítems por catálogo")
+
+    def _acta(self, n_items):
+        ahora = timezone.now()
+        coordinador = Coordinador(id=1, nombre_completo="Coordinador de Prueba")
+        periodo = Periodo(id=1, name="Evaluación Desempeño Coordinadores 2025", anio=2025)
+        evaluacion = Evaluacion(
+            id=1, coordinador=coordinador, periodo=periodo, fecha_creacion=ahora,
+            fortalezas="Compromiso", oportunidades_mejora="Planificación",
+        )
+        conductas = [ConductaSello(id=i, conducta=f"Conducta {i}", ponderacion=10) for i in range(n_items)]
+        objetivos = [Objetivo(id=i, objetivo=f"Objetivo {i}", ponderacion=10) for i in range(n_items)]
+        return construir_acta(
+            evaluacion,
+            conductas,
+            objetivos,
+            resp_conductas={c.id: RespuestaConducta(cumplimiento="4") for c in conductas},
+            resp_objetivos={o.id: RespuestaObjetivo(cumplimiento="5") for o in objetivos},
+        )
+
+    def _render(self, n, acta, layout_por_acta):
+        for _ in range(n):
+            layout = LayoutActa() if layout_por_acta else get_layout()
+            construir_pdf_acta(acta, layout=layout)
+
+    def _medir(self, n, acta, layout_por_acta):
+        # Tiempo sin tracemalloc (distorsiona); memoria en una pasada aparte y más corta
+        t0 = time.perf_counter()
+        self._render(n, acta, layout_por_acta)
+        total = time.perf_counter() - t0
+
+        tracemalloc.start()
+        self._render(min(n, 50), acta, layout_por_acta)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return total, pico
+
+    def handle(self, *args, **options):
+        n = options["actas"]
+        acta = self._acta(options["items"])
+        get_layout()  # se construye fuera de la medición, como en un worker ya caliente
+
+        resultados = [
+            ("layout por acta", *self._medir(n, acta, layout_por_acta=True)),
+            ("layout compartido", *self._medir(n, acta, layout_por_acta=False)),
+        ]
+        for nombre, total, pico in resultados:
+            self.stdout.write(
+                f"{nombre:<18} | {n} actas en {total:6.2f} s | {total / n * 1000:6.2f} ms/acta | "
+                f"pico memoria {pico / 1024:8.1f} KiB"
+            )
@@ -0,0 +1,65 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+
+from atencion.models import ConductaSello, RespuestaConducta
+from atencion.views import _filas_catalogo
+
+
+# Patrón anterior: filtro get_item + {% with %} por fila del catálogo.
+PLANTILLA_LOOKUP = """{% load extras %}
+{% for c in conductas %}{% with r=resp_conductas|get_item:c.id %}
+<tr><td>{{ c.conducta }}</td><td>{{ c.ponderacion }}%</td>
+<td>{% if r %}{{ r.cumplimiento }}{% else %}—{% endif %}</td></tr>
+{% endwith %}{% endfor %}"""
+
+# Patrón actual: filas (ítem, respuesta) pre-emparejadas en la vista.
+PLANTILLA_FILAS = """
+{% for c, r in filas_conductas %}
+<tr><td>{{ c.conducta }}</td><td>{{ c.ponderacion }}%</td>
+<td>{% if r %}{{ r.cumplimiento }}{% else %}—{% endif %}</td></tr>
+{% endfor %}"""
+
+
+class Command(BaseCommand):
+    help = "Mide el render de catálogos: lookup get_item por fila vs filas pre-emparejadas (sin BD)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, nargs="+", default=[100, 500, 1000])
+        parser.add_argument("--repeticiones", type=int, default=20)
+
+    def handle(self, *args, **options):
+        engine = engines["django"]
+        t_lookup = engine.from_string(PLANTILLA_LOOKUP)
+        t_filas = engine.from_string(PLANTILLA_FILAS)
+        rep = options["repeticiones"]
+
+        for n in options["items"]:
+            # Objetos en memoria: solo se mide el render, no la BD.
+            conductas = [
+                ConductaSello(id=i, conducta=f"Conducta {i}", ponderacion=i % 30)
+                for i in range(1, n + 1)
+            ]
+            # La mitad del catálogo con respuesta
+            resp_conductas = {
+                c.id: RespuestaConducta(conducta_id=c.id, cumplimiento=str(c.id % 5 + 1))
+                for c in conductas[::2]
+            }
+
+            ctx_lookup = {"conductas": conductas, "resp_conductas": resp_conductas}
+
+            def render_filas():
+                # Incluye el costo de emparejar en la vista.
+                ctx = {"filas_conductas": _filas_catalogo(conductas, resp_conductas)}
+                return t_filas.render(ctx)
+
+            assert t_lookup.render(ctx_lookup).split() == render_filas().split()
+
+            ms_lookup = min(timeit.repeat(lambda: t_lookup.render(ctx_lookup), number=1, repeat=rep)) * 1000
+            ms_filas = min(timeit.repeat(render_filas, number=1, repeat=rep)) * 1000
+
+            self.stdout.write(
+                f"items={n:>5} | get_item+with: {ms_lookup:8.2f} ms | "
+                f"filas: {ms_filas:8.2f} ms | x{ms_lookup / ms_filas:.2f}"
+            )
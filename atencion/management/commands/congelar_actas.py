@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from atencion.actas import crear_snapshots
+from atencion.models import Evaluacion
+
+
+class Command(BaseCommand):
+    help = "Crea el snapshot del acta de las evaluaciones cerradas que aún no lo tienen (p. ej. cerradas antes de existir ActaSnapshot)"
+
+    def handle(self, *args, **options):
+        pendientes = Evaluacion.objects.filter(cerrada=True, snapshot__isnull=True)
+        total = pendientes.count()
+        crear_snapshots(pendientes)
+        self.stdout.write(self.style.SUCCESS(f"Snapshots creados: {total}"))
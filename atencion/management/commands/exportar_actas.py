@@ -0,0 +1,49 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from atencion.actas import RENDERERS, cargar_actas_periodo
+from atencion.models import Periodo
+from atencion.replicas import usar_replica
+from atencion.sedes import sedes, usar_sede
+
+
+class Command(BaseCommand):
+    help = "Exporta las actas de un periodo (datos en consultas por lote, un archivo por acta y formato)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("periodo_id", type=int)
+        parser.add_argument(
+            "--formato", nargs="+", default=["pdf"], choices=sorted(RENDERERS),
+            help="Uno o más formatos de salida",
+        )
+        parser.add_argument("--salida", default="actas_export", help="Directorio destino")
+        parser.add_argument("--solo-cerradas", action="store_true")
+        parser.add_argument(
+            "--sede", choices=sorted(sedes()),
+            help="Exporta solo esa sede, desde su base (periodo_id es el de esa base)",
+        )
+
+    def handle(self, *args, **options):
+        # Solo lee: desde la réplica si hay una configurada
+        with usar_sede(options["sede"]), usar_replica():
+            self._exportar(options)
+
+    def _exportar(self, options):
+        try:
+            periodo = Periodo.objects.get(id=options["periodo_id"])
+        except Periodo.DoesNotExist:
+            raise CommandError(f"No existe Periodo id={options['periodo_id']}")
+
+        salida = Path(options["salida"])
+        salida.mkdir(parents=True, exist_ok=True)
+
+        actas = cargar_actas_periodo(periodo, solo_cerradas=options["solo_cerradas"])
+        for acta in actas:
+            for formato in options["formato"]:
+                renderer = RENDERERS[formato]
+                (salida / renderer.nombre_archivo(acta)).write_bytes(renderer.render(acta))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"OK. Periodo: {periodo} | Actas: {len(actas)} | Formatos: {', '.join(options['formato'])} | Salida: {salida}"
+        ))
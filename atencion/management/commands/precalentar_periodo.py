@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from atencion.coalescencia import cache_compartida
+from atencion.models import Periodo
+from atencion.precalentar import precalentar_periodo
+from atencion.sedes import sedes, usar_sede
+
+
+class Command(BaseCommand):
+    help = (
+        "Precalienta un periodo: scores, snapshots y PDFs de las evaluaciones cerradas (periodo anual) "
+        "o rollup KPI (periodo mensual), y las filas del dashboard en la caché, en paralelo"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("periodo_id", type=int)
+        parser.add_argument("--workers", type=int, default=4, help="Hilos para PDFs y dashboards")
+        parser.add_argument("--sin-pdfs", action="store_true", help="No generar los PDFs de actas faltantes")
+        parser.add_argument(
+            "--sede", choices=sorted(sedes()),
+            help="Base de esa sede (periodo_id es el de esa base)",
+        )
+
+    def handle(self, *args, **options):
+        with usar_sede(options["sede"]):
+            try:
+                periodo = Periodo.objects.get(id=options["periodo_id"])
+            except Periodo.DoesNotExist:
+                raise CommandError(f"No existe Periodo id={options['periodo_id']}")
+
+            hecho = precalentar_periodo(periodo, workers=options["workers"], pdfs=not options["sin_pdfs"])
+
+        if not cache_compartida():
+            self.stdout.write(self.style.WARNING(
+                "CACHES usa una caché local del proceso: las filas del dashboard no se precalentaron "
+                "(configurar Redis, Memcached, archivo o BD para compartirlas con los procesos web)"
+            ))
+        resumen = " | ".join(f"{k}: {v}" for k, v in hecho.items())
+        self.stdout.write(self.style.SUCCESS(f"Periodo precalentado: {periodo} | {resumen}"))
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from atencion.tareas import ejecutar, liberar_colgadas, reclamar_siguiente
+from atencion.models import Tarea
+
+
+class Command(BaseCommand):
+    help = "Worker de la cola de tareas en BD (recalcular_score, generar_acta_pdf, precalentar_periodo)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--una-vez", action="store_true", help="Procesa lo pendiente y termina")
+        parser.add_argument("--intervalo", type=float, default=2.0, help="Segundos de espera si la cola está vacía")
+        parser.add_argument("--max-tareas", type=int, default=0, help="Termina tras N tareas (0 = sin límite)")
+
+    def handle(self, *args, **options):
+        procesadas = 0
+        self.stdout.write("Worker de tareas iniciado")
+
+        while True:
+            liberadas, fallidas = liberar_colgadas()
+            if liberadas:
+                self.stdout.write(self.style.WARNING(f"{liberadas} tarea(s) colgada(s) devueltas a la cola"))
+            if fallidas:
+                self.stdout.write(self.style.ERROR(f"{fallidas} tarea(s) colgada(s) sin intentos: fallidas"))
+
+            t = reclamar_siguiente()
+            if t is None:
+                if options["una_vez"]:
+                    break
+                time.sleep(options["intervalo"])
+                continue
+
+            t = ejecutar(t)
+            procesadas += 1
+            estilo = self.style.SUCCESS if t.estado == Tarea.COMPLETADA else self.style.ERROR
+            self.stdout.write(estilo(f"{t} intento={t.intentos}"))
+
+            if options["max_tareas"] and procesadas >= options["max_tareas"]:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f"OK. Tareas procesadas: {procesadas}"))
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from atencion.models import (
-    Colaborador,
+    Coordinador,
     Periodo,
     Pauta,
     Objetivo,
@@ -21,18 +21,21 @@ class Command(BaseCommand):
         # PERIODO
         # -------------------------
         periodo, _ = Periodo.objects.get_or_create(
-            nombre="Evaluación Desempeño Docente 2025",
+            name="Evaluación Desempeño Coordinador 2025",
             anio=2025,
-            defaults={"activo": True}
+            mes=None,
+            defaults={
+                "fecha_inicio": date(2025, 1, 1),
+                "fecha_fin": date(2025, 12, 31),
+                "estado": Periodo.ABIERTO,
+            }
         )
 
         # -------------------------
         # PAUTA
         # -------------------------
         pauta, _ = Pauta.objects.get_or_create(
-            nombre="Evaluación Desempeño Docente",
-            version="2025",
-            defaults={"activa": True}
+            nombre="Evaluación Desempeño Coordinador 2025",
         )
 
         # -------------------------
@@ -100,27 +103,25 @@ class Command(BaseCommand):
         )
 
         # -------------------------
-        # COLABORADORES
+        # COORDINADORES
         # -------------------------
-        colab1, _ = Colaborador.objects.get_or_create(
-            nombre="Alejandra Denise Nina Huanca",
-            defaults={"cargo": "Docente"}
+        coord1, _ = Coordinador.objects.get_or_create(
+            nombre_completo="Alejandra Denise Nina Huanca",
+            defaults={"area_academica": "Educación"}
         )
 
-        colab2, _ = Colaborador.objects.get_or_create(
-            nombre="Alejandro José Apata Espina",
-            defaults={"cargo": "Docente"}
+        Coordinador.objects.get_or_create(
+            nombre_completo="Alejandro José Apata Espina",
+            defaults={"area_academica": "Educación"}
         )
 
         # -------------------------
         # EVALUACION
         # -------------------------
         evaluacion, _ = Evaluacion.objects.get_or_create(
-            colaborador=colab1,
+            coordinador=coord1,
             periodo=periodo,
-            pauta=pauta,
             defaults={
-                "fecha_creacion": date.today(),
                 "fortalezas": "Demuestra alto compromiso y responsabilidad.",
                 "oportunidades_mejora": "Potenciar uso de metodologías activas.",
                 "resumen_comentarios": "Desempeño sólido y alineado al modelo educativo."
@@ -134,10 +135,7 @@ class Command(BaseCommand):
             RespuestaObjetivo.objects.get_or_create(
                 evaluacion=evaluacion,
                 objetivo=obj,
-                defaults={
-                    "autoevaluacion": "DESTACADO",
-                    "evaluacion_jefatura": "DESTACADO",
-                }
+                defaults={"cumplimiento": "5"}
             )
 
         # -------------------------
@@ -146,10 +144,7 @@ class Command(BaseCommand):
         RespuestaConducta.objects.get_or_create(
             evaluacion=evaluacion,
             conducta=conducta,
-            defaults={
-                "autoevaluacion": "LOGRADO",
-                "evaluacion_jefatura": "DESTACADO",
-            }
+            defaults={"cumplimiento": "4"}
         )
 
         self.stdout.write(self.style.SUCCESS("✅ Seed de Evaluación cargado correctamente"))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('atencion', '0003_coordinador_alter_conductasello_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluacion',
+            name='acta_pdf',
+            field=models.FileField(blank=True, default='', upload_to='actas/'),
+        ),
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=50)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En curso'), ('completada', 'Completada'), ('fallida', 'Fallida')], default='pendiente', max_length=20)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('max_intentos', models.PositiveSmallIntegerField(default=5)),
+                ('ejecutar_desde', models.DateTimeField(default=django.utils.timezone.now)),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['estado', 'ejecutar_desde'], name='atencion_ta_estado_011dce_idx')],
+            },
+        ),
+    ]
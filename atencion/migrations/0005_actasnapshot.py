@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('atencion', '0004_tarea_evaluacion_acta_pdf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActaSnapshot',
+            fields=[
+                ('evaluacion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='atencion.evaluacion')),
+                ('documento', models.JSONField()),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
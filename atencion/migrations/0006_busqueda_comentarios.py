@@ -0,0 +1,73 @@
+from django.db import migrations
+
+# Índice de texto completo sobre los 4 comentarios de Evaluacion.
+# Se mantiene desde la propia BD (triggers / columna generada), así también
+# cubre los QuerySet.update() del autoguardado y del cierre por lotes.
+
+CAMPOS = "fortalezas, oportunidades_mejora, resumen_comentarios, retroalimentacion"
+NUEVOS = "new.fortalezas, new.oportunidades_mejora, new.resumen_comentarios, new.retroalimentacion"
+VIEJOS = "old.fortalezas, old.oportunidades_mejora, old.resumen_comentarios, old.retroalimentacion"
+
+SQLITE_CREAR = [
+    f"""CREATE VIRTUAL TABLE atencion_evaluacion_fts USING fts5(
+        {CAMPOS},
+        content='atencion_evaluacion', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER atencion_evaluacion_fts_ai AFTER INSERT ON atencion_evaluacion BEGIN
+        INSERT INTO atencion_evaluacion_fts(rowid, {CAMPOS}) VALUES (new.id, {NUEVOS});
+    END""",
+    f"""CREATE TRIGGER atencion_evaluacion_fts_ad AFTER DELETE ON atencion_evaluacion BEGIN
+        INSERT INTO atencion_evaluacion_fts(atencion_evaluacion_fts, rowid, {CAMPOS})
+        VALUES ('delete', old.id, {VIEJOS});
+    END""",
+    f"""CREATE TRIGGER atencion_evaluacion_fts_au AFTER UPDATE OF {CAMPOS} ON atencion_evaluacion BEGIN
+        INSERT INTO atencion_evaluacion_fts(atencion_evaluacion_fts, rowid, {CAMPOS})
+        VALUES ('delete', old.id, {VIEJOS});
+        INSERT INTO atencion_evaluacion_fts(rowid, {CAMPOS}) VALUES (new.id, {NUEVOS});
+    END""",
+    "INSERT INTO atencion_evaluacion_fts(atencion_evaluacion_fts) VALUES ('rebuild')",
+]
+SQLITE_BORRAR = [
+    "DROP TRIGGER IF EXISTS atencion_evaluacion_fts_ai",
+    "DROP TRIGGER IF EXISTS atencion_evaluacion_fts_ad",
+    "DROP TRIGGER IF EXISTS atencion_evaluacion_fts_au",
+    "DROP TABLE IF EXISTS atencion_evaluacion_fts",
+]
+
+POSTGRES_CREAR = [
+    """ALTER TABLE atencion_evaluacion ADD COLUMN busqueda tsvector GENERATED ALWAYS AS (
+        to_tsvector('spanish',
+            coalesce(fortalezas, '') || ' ' || coalesce(oportunidades_mejora, '') || ' ' ||
+            coalesce(resumen_comentarios, '') || ' ' || coalesce(retroalimentacion, ''))
+    ) STORED""",
+    "CREATE INDEX atencion_evaluacion_busqueda_gin ON atencion_evaluacion USING GIN (busqueda)",
+]
+POSTGRES_BORRAR = [
+    "DROP INDEX IF EXISTS atencion_evaluacion_busqueda_gin",
+    "ALTER TABLE atencion_evaluacion DROP COLUMN IF EXISTS busqueda",
+]
+
+
+def _ejecutar(schema_editor, por_motor):
+    for sql in por_motor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def crear(apps, schema_editor):
+    _ejecutar(schema_editor, {"sqlite": SQLITE_CREAR, "postgresql": POSTGRES_CREAR})
+
+
+def borrar(apps, schema_editor):
+    _ejecutar(schema_editor, {"sqlite": SQLITE_BORRAR, "postgresql": POSTGRES_BORRAR})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("atencion", "0005_actasnapshot"),
+    ]
+
+    operations = [
+        migrations.RunPython(crear, borrar),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:46
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalizar(texto):
+    # Copia de models.normalizar_nombre (las migraciones no dependen del código actual)
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_tildes.casefold().split())
+
+
+def poblar(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Coordinador = apps.get_model("atencion", "Coordinador")
+    coordinadores = list(Coordinador.objects.using(db).only("id", "nombre_completo"))
+    for c in coordinadores:
+        c.nombre_normalizado = _normalizar(c.nombre_completo)
+    Coordinador.objects.using(db).bulk_update(coordinadores, ["nombre_normalizado"], batch_size=500)
+
+
+def crear_trigram(apps, schema_editor):
+    # Índice trigram para búsquedas "contiene" (LIKE '%x%'); solo PostgreSQL
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX atencion_coordinador_nombre_trgm "
+            "ON atencion_coordinador USING GIN (nombre_normalizado gin_trgm_ops)"
+        )
+
+
+def borrar_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS atencion_coordinador_nombre_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('atencion', '0006_busqueda_comentarios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coordinador',
+            name='nombre_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(poblar, migrations.RunPython.noop),
+        migrations.RunPython(crear_trigram, borrar_trigram),
+    ]
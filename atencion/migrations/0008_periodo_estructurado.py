@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:47
+
+import datetime
+import re
+
+import atencion.models
+from django.db import migrations, models
+
+
+def desde_nombres(apps, schema_editor):
+    """
+    Año desde el nombre (misma regla que el antiguo anio_desde_periodo),
+    rango = año calendario y estado cerrado si todas sus evaluaciones lo están.
+    """
+    db = schema_editor.connection.alias
+    Periodo = apps.get_model("atencion", "Periodo")
+    Evaluacion = apps.get_model("atencion", "Evaluacion")
+    con_abiertas = set(Evaluacion.objects.using(db).filter(cerrada=False).values_list("periodo_id", flat=True))
+    con_evaluaciones = set(Evaluacion.objects.using(db).values_list("periodo_id", flat=True))
+
+    periodos = list(Periodo.objects.using(db))
+    for p in periodos:
+        m = re.search(r"(20\d{2})", p.name or "")
+        if m:
+            p.anio = int(m.group(1))
+        p.fecha_inicio = datetime.date(p.anio, 1, 1)
+        p.fecha_fin = datetime.date(p.anio, 12, 31)
+        if p.id in con_evaluaciones and p.id not in con_abiertas:
+            p.estado = "cerrado"
+    Periodo.objects.using(db).bulk_update(periodos, ["anio", "fecha_inicio", "fecha_fin", "estado"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('atencion', '0007_coordinador_nombre_normalizado'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='periodo',
+            options={'ordering': ['-anio', '-fecha_inicio', '-id']},
+        ),
+        migrations.AddField(
+            model_name='periodo',
+            name='anio',
+            field=models.PositiveSmallIntegerField(default=atencion.models._anio_actual),
+        ),
+        migrations.AddField(
+            model_name='periodo',
+            name='estado',
+            field=models.CharField(choices=[('planificado', 'Planificado'), ('abierto', 'Abierto'), ('cerrado', 'Cerrado')], default='abierto', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='periodo',
+            name='fecha_fin',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='periodo',
+            name='fecha_inicio',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(desde_nombres, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='periodo',
+            index=models.Index(fields=['anio', 'fecha_inicio'], name='atencion_pe_anio_144de6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='periodo',
+            index=models.Index(fields=['fecha_inicio', 'fecha_fin'], name='atencion_pe_fecha_i_ca3b0b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='periodo',
+            index=models.Index(fields=['estado'], name='atencion_pe_estado_bfa0e2_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:49
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('atencion', '0008_periodo_estructurado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coordinador',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True),
+        ),
+        migrations.AddField(
+            model_name='periodo',
+            name='mes',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)]),
+        ),
+        migrations.AddConstraint(
+            model_name='periodo',
+            constraint=models.UniqueConstraint(condition=models.Q(('mes__isnull', False)), fields=('anio', 'mes'), name='periodo_mensual_unico'),
+        ),
+    ]
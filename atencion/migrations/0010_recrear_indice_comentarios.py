@@ -0,0 +1,54 @@
+from django.db import migrations
+
+# En SQLite, cualquier AlterField/AddField que reconstruya atencion_evaluacion
+# (tabla nueva + copia + DROP de la vieja) borra los triggers de la 0006 y el
+# índice FTS5 deja de seguir los cambios. Esta migración los vuelve a crear y
+# reconstruye el índice; una migración futura que reconstruya la tabla debe
+# repetir estas operaciones después (ver test_triggers_tras_migraciones).
+# En PostgreSQL la columna generada sobrevive a los ALTER: no hay nada que hacer.
+
+CAMPOS = "fortalezas, oportunidades_mejora, resumen_comentarios, retroalimentacion"
+NUEVOS = "new.fortalezas, new.oportunidades_mejora, new.resumen_comentarios, new.retroalimentacion"
+VIEJOS = "old.fortalezas, old.oportunidades_mejora, old.resumen_comentarios, old.retroalimentacion"
+
+SQLITE_RECREAR = [
+    "DROP TRIGGER IF EXISTS atencion_evaluacion_fts_ai",
+    "DROP TRIGGER IF EXISTS atencion_evaluacion_fts_ad",
+    "DROP TRIGGER IF EXISTS atencion_evaluacion_fts_au",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS atencion_evaluacion_fts USING fts5(
+        {CAMPOS},
+        content='atencion_evaluacion', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER atencion_evaluacion_fts_ai AFTER INSERT ON atencion_evaluacion BEGIN
+        INSERT INTO atencion_evaluacion_fts(rowid, {CAMPOS}) VALUES (new.id, {NUEVOS});
+    END""",
+    f"""CREATE TRIGGER atencion_evaluacion_fts_ad AFTER DELETE ON atencion_evaluacion BEGIN
+        INSERT INTO atencion_evaluacion_fts(atencion_evaluacion_fts, rowid, {CAMPOS})
+        VALUES ('delete', old.id, {VIEJOS});
+    END""",
+    f"""CREATE TRIGGER atencion_evaluacion_fts_au AFTER UPDATE OF {CAMPOS} ON atencion_evaluacion BEGIN
+        INSERT INTO atencion_evaluacion_fts(atencion_evaluacion_fts, rowid, {CAMPOS})
+        VALUES ('delete', old.id, {VIEJOS});
+        INSERT INTO atencion_evaluacion_fts(rowid, {CAMPOS}) VALUES (new.id, {NUEVOS});
+    END""",
+    # Lo cambiado mientras no había triggers
+    "INSERT INTO atencion_evaluacion_fts(atencion_evaluacion_fts) VALUES ('rebuild')",
+]
+
+
+def recrear(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_RECREAR:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("atencion", "0009_coordinador_email_periodo_mes"),
+    ]
+
+    operations = [
+        migrations.RunPython(recrear, migrations.RunPython.noop),
+    ]
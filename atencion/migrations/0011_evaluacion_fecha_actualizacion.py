@@ -0,0 +1,23 @@
+import importlib
+
+from django.db import migrations, models
+
+# En SQLite el AddField (auto_now: valor por defecto) reconstruye
+# atencion_evaluacion y borra los triggers FTS: se repiten las operaciones de la 0010.
+recrear_indice = importlib.import_module("atencion.migrations.0010_recrear_indice_comentarios").recrear
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('atencion', '0010_recrear_indice_comentarios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluacion',
+            name='fecha_actualizacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(recrear_indice, migrations.RunPython.noop),
+    ]
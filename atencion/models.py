@@ -1,18 +1,94 @@
+import calendar
+import unicodedata
+from datetime import date
+
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
+
+
+def normalizar_nombre(texto):
+    """Minúsculas, sin tildes y con espacios simples: "  José  Peña" -> "jose pena"."""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_tildes.casefold().split())
+
+
+SEDE_POR_DEFECTO = "Arica"
 
 
 class Coordinador(models.Model):
     nombre_completo = models.CharField(max_length=200)
-    sede = models.CharField(max_length=100, blank=True, default="Arica")
+    # Para búsqueda/typeahead: se recalcula en save(); índice B-tree (y trigram en PostgreSQL)
+    nombre_normalizado = models.CharField(max_length=200, editable=False, db_index=True, default="")
+    email = models.EmailField(blank=True, null=True)
+    sede = models.CharField(max_length=100, blank=True, default=SEDE_POR_DEFECTO)
     area_academica = models.CharField(max_length=200, blank=True, default="")
     is_active = models.BooleanField(default=True)
 
+    def save(self, *args, **kwargs):
+        self.nombre_normalizado = normalizar_nombre(self.nombre_completo)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "nombre_completo" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "nombre_normalizado"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.nombre_completo
 
 
+def _anio_actual():
+    return timezone.localdate().year
+
+
 class Periodo(models.Model):
+    PLANIFICADO = "planificado"
+    ABIERTO = "abierto"
+    CERRADO = "cerrado"
+    ESTADOS = [
+        (PLANIFICADO, "Planificado"),
+        (ABIERTO, "Abierto"),
+        (CERRADO, "Cerrado"),
+    ]
+
     name = models.CharField(max_length=200)
+    # Campos estructurados: filtrar, ordenar y numerar actas sin parsear `name`
+    anio = models.PositiveSmallIntegerField(default=_anio_actual)
+    # Solo periodos mensuales (evaluaciones KPI de desempenho); los anuales lo dejan vacío
+    mes = models.PositiveSmallIntegerField(
+        null=True, blank=True, validators=[MinValueValidator(1), MaxValueValidator(12)]
+    )
+    fecha_inicio = models.DateField(null=True, blank=True)
+    fecha_fin = models.DateField(null=True, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=ABIERTO)
+
+    class Meta:
+        ordering = ["-anio", "-fecha_inicio", "-id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["anio", "mes"], condition=models.Q(mes__isnull=False), name="periodo_mensual_unico"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["anio", "fecha_inicio"]),
+            models.Index(fields=["fecha_inicio", "fecha_fin"]),
+            models.Index(fields=["estado"]),
+        ]
+
+    @classmethod
+    def mensual(cls, anio, mes):
+        """Periodo mensual (anio, mes); se crea con su rango de fechas si no existe."""
+        ultimo_dia = calendar.monthrange(anio, mes)[1]
+        periodo, _ = cls.objects.get_or_create(
+            anio=anio,
+            mes=mes,
+            defaults={
+                "name": f"{mes:02d}-{anio}",
+                "fecha_inicio": date(anio, mes, 1),
+                "fecha_fin": date(anio, mes, ultimo_dia),
+            },
+        )
+        return periodo
 
     def __str__(self):
         return self.name
@@ -55,6 +131,9 @@ class Evaluacion(models.Model):
     periodo = models.ForeignKey(Periodo, on_delete=models.CASCADE)
 
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Marca de las filas del panel en la caché (dashboard_gestion): los UPDATE
+    # que cambian respuestas o `cerrada` sin pasar por save() la fijan a mano
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
     cerrada = models.BooleanField(default=False)
 
     # Comentarios
@@ -66,10 +145,29 @@ class Evaluacion(models.Model):
     # Score total calculable
     score_total = models.FloatField(null=True, blank=True)
 
+    # PDF del acta generado en segundo plano al cerrar (tarea "generar_acta_pdf")
+    acta_pdf = models.FileField(upload_to="actas/", blank=True, default="")
+
     def __str__(self):
         return f"{self.coordinador} - {self.periodo}"
 
 
+class ActaSnapshot(models.Model):
+    """
+    Acta congelada al cerrar la evaluación: documento ActaData.as_dict() con
+    textos del catálogo, ponderaciones, respuestas, scores y comentarios.
+    No se modifica después; el acta de una evaluación cerrada se lee solo de aquí.
+    """
+    evaluacion = models.OneToOneField(
+        Evaluacion, on_delete=models.CASCADE, primary_key=True, related_name="snapshot"
+    )
+    documento = models.JSONField()
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Snapshot acta {self.evaluacion_id}"
+
+
 class RespuestaObjetivo(models.Model):
     evaluacion = models.ForeignKey(Evaluacion, on_delete=models.CASCADE, related_name="resp_objetivos")
     objetivo = models.ForeignKey(Objetivo, on_delete=models.CASCADE)
@@ -89,3 +187,41 @@ class RespuestaConducta(models.Model):
 
     def __str__(self):
         return f"{self.evaluacion} | {self.conducta}"
+
+
+class Tarea(models.Model):
+    """
+    Cola de trabajos en la propia BD (sin broker externo).
+    La procesa el comando `procesar_tareas`; ver atencion/tareas.py.
+    """
+    PENDIENTE = "pendiente"
+    EN_CURSO = "en_curso"
+    COMPLETADA = "completada"
+    FALLIDA = "fallida"
+    ESTADOS = [
+        (PENDIENTE, "Pendiente"),
+        (EN_CURSO, "En curso"),
+        (COMPLETADA, "Completada"),
+        (FALLIDA, "Fallida"),
+    ]
+
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=5)
+    # No se toma antes de esta fecha (backoff entre reintentos)
+    ejecutar_desde = models.DateTimeField(default=timezone.now)
+
+    resultado = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["estado", "ejecutar_desde"])]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.id} ({self.estado})"
@@ -0,0 +1,194 @@
+"""
+PDF del acta con ReportLab.
+
+La hoja de estilos, los TableStyle, los títulos de sección y el estilo de firmas
+se arman una sola vez por proceso (LayoutActa vía get_layout()) y se reutilizan
+en cada acta; por acta solo se crean las tablas con sus datos.
+"""
+import copy
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+
+FUENTE_BASE = "Helvetica"
+FUENTE_BASE_NEGRITA = "Helvetica-Bold"
+
+
+def _registrar_fuente(ruta, ruta_negrita=None):
+    """
+    Registra una fuente TTF para embeber en el PDF (ReportLab embebe solo el
+    subconjunto de glifos usados). Retorna (normal, negrita).
+    """
+    from reportlab.lib.fonts import addMapping
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    pdfmetrics.registerFont(TTFont("ActaFuente", ruta))
+    negrita = "ActaFuente"
+    if ruta_negrita:
+        pdfmetrics.registerFont(TTFont("ActaFuente-Bold", ruta_negrita))
+        negrita = "ActaFuente-Bold"
+    # Para que <b> dentro de Paragraph use la variante negrita
+    addMapping("ActaFuente", 0, 0, "ActaFuente")
+    addMapping("ActaFuente", 1, 0, negrita)
+    addMapping("ActaFuente", 0, 1, "ActaFuente")
+    addMapping("ActaFuente", 1, 1, negrita)
+    return "ActaFuente", negrita
+
+
+class LayoutActa:
+    """Objetos de layout inmutables del acta, compartidos entre renders."""
+
+    def __init__(self, fuente=None, fuente_negrita=None):
+        if fuente:
+            self.fuente, self.fuente_negrita = _registrar_fuente(fuente, fuente_negrita)
+        else:
+            # Fuentes estándar PDF: no se embeben (PDF más liviano y rápido)
+            self.fuente, self.fuente_negrita = FUENTE_BASE, FUENTE_BASE_NEGRITA
+
+        self.styles = getSampleStyleSheet()
+        if fuente:
+            for estilo in self.styles.byName.values():
+                if hasattr(estilo, "fontName"):
+                    es_negrita = "Bold" in estilo.fontName
+                    estilo.fontName = self.fuente_negrita if es_negrita else self.fuente
+
+        self.estilo_meta = TableStyle([
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+            ("FONTNAME", (0, 0), (-1, -1), self.fuente),
+            ("FONTSIZE", (0, 0), (-1, -1), 10),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ])
+        self.estilo_catalogo = TableStyle([
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+            ("FONTNAME", (0, 0), (-1, -1), self.fuente),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ])
+        self.estilo_comentarios = TableStyle([
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
+            ("BACKGROUND", (0, 0), (0, -1), colors.whitesmoke),
+            ("FONTNAME", (0, 0), (-1, -1), self.fuente),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ])
+        self.estilo_firmas = TableStyle([
+            ("ALIGN", (0, 1), (-1, -1), "CENTER"),
+            ("FONTNAME", (0, 0), (-1, -1), self.fuente),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ("TOPPADDING", (0, 1), (-1, 1), 18),
+        ])
+
+        # La sede y el año del encabezado van por acta
+        self.titulo_conductas = Paragraph("<b>Conductas Sello</b>", self.styles["Heading3"])
+        self.titulo_objetivos = Paragraph("<b>Objetivos de Gestión</b>", self.styles["Heading3"])
+        self.titulo_comentarios = Paragraph("<b>Comentarios</b>", self.styles["Heading3"])
+
+        self.cabecera_conductas = ["Conducta", "Ponderación", "Cumplimiento"]
+        self.cabecera_objetivos = ["Objetivo", "Ponderación", "Cumplimiento"]
+        self.anchos_meta = [55 * mm, 120 * mm]
+        self.anchos_catalogo = [110 * mm, 30 * mm, 35 * mm]
+        self.anchos_firmas = [85 * mm, 85 * mm]
+
+
+@lru_cache(maxsize=1)
+def get_layout():
+    return LayoutActa(
+        fuente=getattr(settings, "ACTA_PDF_FUENTE", None),
+        fuente_negrita=getattr(settings, "ACTA_PDF_FUENTE_NEGRITA", None),
+    )
+
+
+def construir_pdf_acta(acta, layout=None):
+    """Arma el PDF de un ActaData (atencion.actas) y retorna los bytes."""
+    layout = layout or get_layout()
+    styles = layout.styles
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        leftMargin=15 * mm,
+        rightMargin=15 * mm,
+        topMargin=15 * mm,
+        bottomMargin=15 * mm,
+        title="Acta Evaluación Coordinador",
+    )
+
+    # Copia superficial: comparte el texto ya parseado pero no el estado de
+    # wrap/draw, así dos hilos pueden armar actas a la vez.
+    story = [Paragraph(f"<b>INSTITUTO PROFESIONAL INACAP — SEDE {escape(acta.sede.upper())}</b>", styles["Title"])]
+    story.append(Paragraph(f"<b>Evaluación de Desempeño Coordinador {acta.anio}</b>", styles["Heading2"]))
+    story.append(Paragraph(f"<b>N° Acta:</b> {acta.numero_acta}", styles["Normal"]))
+    story.append(Paragraph(f"<b>Fecha de firma:</b> {acta.fecha_firma.strftime('%d-%m-%Y')}", styles["Normal"]))
+    story.append(Spacer(1, 8))
+
+    # Meta
+    meta_data = [
+        ["Coordinador evaluado:", acta.coordinador],
+        ["Periodo:", acta.periodo],
+        ["Fecha evaluación:", acta.fecha_evaluacion.strftime("%d-%m-%Y %H:%M")],
+        ["Resultado (1–5):", f"{acta.score:.2f}" if acta.score is not None else "—"],
+        ["Equivalente (0–120):", f"{acta.equivalente:.1f}" if acta.equivalente is not None else "—"],
+        ["Nivel:", acta.nivel],
+    ]
+    story.append(Table(meta_data, colWidths=layout.anchos_meta, style=layout.estilo_meta))
+    story.append(Spacer(1, 12))
+
+    # Conductas
+    story.append(copy.copy(layout.titulo_conductas))
+    cond_rows = [layout.cabecera_conductas]
+    for f in acta.conductas:
+        cond_rows.append([f.texto, f"{f.ponderacion}%", f.cumplimiento if f.cumplimiento is not None else "—"])
+    story.append(Table(cond_rows, colWidths=layout.anchos_catalogo, style=layout.estilo_catalogo))
+    story.append(Spacer(1, 12))
+
+    # Objetivos
+    story.append(copy.copy(layout.titulo_objetivos))
+    obj_rows = [layout.cabecera_objetivos]
+    for f in acta.objetivos:
+        obj_rows.append([f.texto, f"{f.ponderacion}%", f.cumplimiento if f.cumplimiento is not None else "—"])
+    story.append(Table(obj_rows, colWidths=layout.anchos_catalogo, style=layout.estilo_catalogo))
+    story.append(Spacer(1, 12))
+
+    # Comentarios
+    story.append(copy.copy(layout.titulo_comentarios))
+    comm_data = [
+        ["Fortalezas", acta.fortalezas or "—"],
+        ["Oportunidades de mejora", acta.oportunidades_mejora or "—"],
+        ["Resumen", acta.resumen_comentarios or "—"],
+        ["Retroalimentación", acta.retroalimentacion or "—"],
+    ]
+    story.append(Table(comm_data, colWidths=layout.anchos_meta, style=layout.estilo_comentarios))
+    story.append(Spacer(1, 22))
+
+    # Firmas
+    firmas = Table(
+        [
+            ["", ""],
+            ["______________________________", "______________________________"],
+            ["Cristian Moscoso Muñoz", acta.coordinador],
+            ["Director de Carrera", "Coordinador(a) de Carrera"],
+            [f"INACAP Sede {acta.sede}", ""],
+        ],
+        colWidths=layout.anchos_firmas,
+        style=layout.estilo_firmas,
+    )
+    story.append(firmas)
+
+    doc.build(story)
+
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf
@@ -0,0 +1,125 @@
+"""
+Operaciones sobre un periodo completo (todas sus evaluaciones a la vez).
+
+abrir_periodo() crea de una vez las evaluaciones de todos los coordinadores
+activos, en vez de una por clic desde el panel; cerrar_evaluaciones() cierra
+todas las completas con un número fijo de consultas.
+"""
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .actas import crear_snapshots
+from .models import (
+    ConductaSello, Coordinador, Evaluacion, Objetivo, Periodo, RespuestaConducta, RespuestaObjetivo,
+)
+from .puntajes import scores_por_evaluacion
+from .sedes import atomico, q_sede
+from .tareas import al_confirmar, encolar, encolar_varios
+
+
+@atomico()
+def abrir_periodo(periodo, con_respuestas=False):
+    """
+    Crea (bulk_create) la evaluación del periodo para cada coordinador activo
+    (de la sede activa, si hay una) que aún no la tenga; las existentes no se tocan. Con `con_respuestas`,
+    las evaluaciones nuevas se crean con sus respuestas vacías del catálogo.
+    Si creó alguna, encola el precalentamiento del periodo.
+    Retorna la cantidad de evaluaciones creadas.
+    """
+    existentes = Evaluacion.objects.filter(periodo=periodo).values("coordinador_id")
+    pendientes = list(
+        Coordinador.objects.filter(q_sede(), is_active=True)
+        .exclude(id__in=existentes)
+        .values_list("id", flat=True)
+    )
+    if periodo.estado != Periodo.ABIERTO:
+        Periodo.objects.filter(id=periodo.id).update(estado=Periodo.ABIERTO)
+    if not pendientes:
+        return 0
+
+    ahora = timezone.now()
+    Evaluacion.objects.bulk_create(
+        [Evaluacion(coordinador_id=cid, periodo=periodo, fecha_creacion=ahora) for cid in pendientes],
+        batch_size=500,
+    )
+
+    if con_respuestas:
+        # Se releen los ids: no todos los motores los devuelven en bulk_create
+        nuevas = list(
+            Evaluacion.objects.filter(periodo=periodo, coordinador_id__in=pendientes).values_list("id", flat=True)
+        )
+        conductas = list(ConductaSello.objects.values_list("id", flat=True))
+        objetivos = list(Objetivo.objects.values_list("id", flat=True))
+        RespuestaConducta.objects.bulk_create(
+            [RespuestaConducta(evaluacion_id=eid, conducta_id=cid) for eid in nuevas for cid in conductas],
+            batch_size=1000,
+        )
+        RespuestaObjetivo.objects.bulk_create(
+            [RespuestaObjetivo(evaluacion_id=eid, objetivo_id=oid) for eid in nuevas for oid in objetivos],
+            batch_size=1000,
+        )
+
+    # Filas del panel con las evaluaciones nuevas (en la caché, vía procesar_tareas)
+    al_confirmar(encolar, "precalentar_periodo", periodo_id=periodo.id, pdfs=False)
+    return len(pendientes)
+
+
+def evaluaciones_completas(evaluaciones):
+    """
+    Filtra las evaluaciones que tienen cumplimiento en todas las conductas y
+    objetivos del catálogo (un solo SELECT con conteos agregados).
+    """
+    total_conductas = ConductaSello.objects.count()
+    total_objetivos = Objetivo.objects.count()
+    return evaluaciones.annotate(
+        n_conductas=Count(
+            "resp_conductas__conducta", filter=~Q(resp_conductas__cumplimiento=""), distinct=True
+        ),
+        n_objetivos=Count(
+            "resp_objetivos__objetivo", filter=~Q(resp_objetivos__cumplimiento=""), distinct=True
+        ),
+    ).filter(n_conductas__gte=total_conductas, n_objetivos__gte=total_objetivos)
+
+
+@atomico()
+def cerrar_evaluaciones(evaluaciones):
+    """
+    Cierra las evaluaciones abiertas y completas del queryset: congela su
+    score_total, marca `cerrada` en un solo UPDATE, guarda el snapshot del
+    acta y encola sus actas PDF al confirmar la transacción.
+    Retorna (cerradas, incompletas).
+    """
+    abiertas = evaluaciones.filter(cerrada=False)
+    completas = list(evaluaciones_completas(abiertas).values_list("id", flat=True))
+    incompletas = abiertas.count() - len(completas)
+    if not completas:
+        return 0, incompletas
+
+    scores = scores_por_evaluacion(completas)
+    Evaluacion.objects.bulk_update(
+        [Evaluacion(id=eid, score_total=scores.get(eid)) for eid in completas],
+        ["score_total"],
+        batch_size=500,
+    )
+    cerradas = Evaluacion.objects.filter(id__in=completas, cerrada=False).update(
+        cerrada=True, fecha_actualizacion=timezone.now()
+    )
+    crear_snapshots(Evaluacion.objects.filter(id__in=completas))
+    al_confirmar(encolar_varios, "generar_acta_pdf", [{"evaluacion_id": eid} for eid in completas])
+    return cerradas, incompletas
+
+
+def cerrar_periodo(periodo):
+    """
+    Cierra las evaluaciones completas (de la sede activa, si hay una); si no
+    queda ninguna abierta en el periodo, pasa a cerrado.
+    """
+    cerradas, incompletas = cerrar_evaluaciones(
+        Evaluacion.objects.filter(q_sede("coordinador__sede"), periodo=periodo)
+    )
+    if not Evaluacion.objects.filter(periodo=periodo, cerrada=False).exists():
+        Periodo.objects.filter(id=periodo.id).update(estado=Periodo.CERRADO)
+    if cerradas:
+        # Los PDFs ya quedaron encolados por cerrar_evaluaciones
+        al_confirmar(encolar, "precalentar_periodo", periodo_id=periodo.id, pdfs=False)
+    return cerradas, incompletas
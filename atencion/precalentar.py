@@ -0,0 +1,142 @@
+"""
+Precalentamiento de un Periodo: deja calculado lo que el primer usuario del
+día pediría.
+
+- Periodo anual (evaluaciones de atencion): score_total congelado de las
+  evaluaciones cerradas que no lo tienen, snapshot del acta, PDF generado y
+  las filas del panel de gestión (dashboard_gestion) en la caché.
+- Periodo mensual (KPI de desempenho): rollup KPI -> Función -> Evaluación
+  (Evaluation.recalc_period) y las filas del dashboard KPI en la caché.
+
+Las filas se guardan para cada sede configurada, sin sede y OTRAS, bajo la
+misma clave que lee la vista. Los PDFs y las filas por sede se arman en
+paralelo (hilos, cada uno con su conexión y la sede activa del que lo lanzó).
+Snapshots, scores y PDFs quedan en la BD; las filas solo llegan a los
+procesos web si CACHES es una caché compartida (Redis, Memcached, archivo,
+BD): con la LocMemCache por defecto quedarían en la del worker, así que no
+se calculan.
+"""
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .actas import crear_snapshots
+from .coalescencia import cache_compartida
+from .models import Evaluacion, Periodo
+from .puntajes import scores_por_evaluacion
+from .sedes import alias_de, q_sede, sedes_recorridas, usar_sede
+
+
+logger = logging.getLogger(__name__)
+
+
+def _en_paralelo(funciones, workers):
+    """Ejecuta las funciones (sin argumentos) en `workers` hilos; con 1, en este hilo."""
+    if workers <= 1:
+        return [fn() for fn in funciones]
+
+    def correr(contexto, fn):
+        try:
+            return contexto.run(fn)
+        finally:
+            connections.close_all()  # conexiones de este hilo
+
+    # copy_context() aquí: cada hilo hereda la sede activa de quien llama
+    trabajos = [(contextvars.copy_context(), fn) for fn in funciones]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="precalentar") as executor:
+        return list(executor.map(lambda t: correr(*t), trabajos))
+
+
+def _precalentar_evaluaciones(periodo, workers, pdfs):
+    from .tareas import generar_acta_pdf
+
+    cerradas = Evaluacion.objects.filter(q_sede("coordinador__sede"), periodo=periodo, cerrada=True)
+
+    # Solo las que tienen respuestas: sin respuestas el score sigue siendo None
+    scores = scores_por_evaluacion(cerradas.filter(score_total__isnull=True).values("id"))
+    sin_score = [Evaluacion(id=eid, score_total=s) for eid, s in scores.items() if s is not None]
+    Evaluacion.objects.bulk_update(sin_score, ["score_total"], batch_size=500)
+
+    sin_snapshot = cerradas.filter(snapshot__isnull=True)
+    n_snapshots = sin_snapshot.count()
+    if n_snapshots:
+        crear_snapshots(sin_snapshot)
+
+    sin_pdf = []
+    if pdfs:
+        sin_pdf = list(cerradas.filter(acta_pdf="").values_list("id", flat=True))
+    _en_paralelo([lambda eid=eid: generar_acta_pdf(eid) for eid in sin_pdf], workers)
+
+    return {
+        "scores": len(sin_score),
+        "snapshots": n_snapshots,
+        "pdfs": len(sin_pdf),
+        "dashboards": _filas_gestion(periodo, workers) if _cache_compartida() else 0,
+    }
+
+
+def _filas_gestion(periodo, workers):
+    from .views import filas_dashboard
+
+    def en_sede(sede):
+        # Como el panel en modo "todas": el mismo periodo (año y nombre) en la base de la sede
+        with usar_sede(sede):
+            actual = Periodo.objects.filter(anio=periodo.anio, name=periodo.name, mes__isnull=True).first()
+            if actual is None:
+                return 0
+            async_to_sync(filas_dashboard)(actual)
+            return 1
+
+    return sum(_en_paralelo([lambda s=s: en_sede(s) for s in [None, *sedes_recorridas()]], workers))
+
+
+def _precalentar_kpi(periodo, workers, rollup):
+    # Import diferido: desempenho depende de atencion, no al revés
+    from apps.desempenho.models import Evaluation, Function
+    from apps.desempenho.views import dashboard_rows, previous_period
+
+    def en_sede(sede, paso):
+        # Los ids difieren entre bases: el periodo se busca por (año, mes) en la de la sede
+        with usar_sede(sede):
+            periodos = list(Periodo.objects.filter(mes__isnull=False).order_by("-anio", "-mes"))
+            actual = next((p for p in periodos if (p.anio, p.mes) == (periodo.anio, periodo.mes)), None)
+            if actual is None:
+                return 0
+            if paso == "rollup":
+                return Evaluation.recalc_period(actual)
+            funciones = list(Function.objects.order_by("-weight", "name"))
+            dashboard_rows(actual, previous_period(actual, periodos), funciones)
+            return 1
+
+    # Sin sede (panel sin ?sede=), cada sede y OTRAS: son claves de caché distintas
+    contextos = [None, *sedes_recorridas()]
+    # Rollup una vez por base; después las filas (ya con los scores nuevos)
+    por_base = {}
+    for sede in contextos:
+        por_base.setdefault(alias_de(sede) if sede else DEFAULT_DB_ALIAS, sede)
+    rollups = _en_paralelo([lambda s=s: en_sede(s, "rollup") for s in por_base.values()], workers) if rollup else []
+    dashboards = []
+    if _cache_compartida():
+        dashboards = _en_paralelo([lambda s=s: en_sede(s, "filas") for s in contextos], workers)
+    return {"rollups": sum(rollups), "dashboards": sum(dashboards)}
+
+
+def _cache_compartida():
+    if cache_compartida():
+        return True
+    logger.warning("CACHES no es una caché compartida: las filas del dashboard no se precalientan")
+    return False
+
+
+def precalentar_periodo(periodo, workers=4, pdfs=True, rollup=True):
+    """
+    Precalienta un periodo (anual o mensual). `pdfs=False` omite los PDFs
+    (p. ej. si ya están encolados) y `rollup=False` el recálculo KPI (si se
+    acaba de hacer). Retorna un dict con lo hecho.
+    """
+    if periodo.mes is None:
+        return _precalentar_evaluaciones(periodo, workers, pdfs)
+    return _precalentar_kpi(periodo, workers, rollup)
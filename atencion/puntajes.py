@@ -0,0 +1,104 @@
+"""
+Cálculo de puntajes y nivel de desempeño de una Evaluacion.
+Funciones puras sobre respuestas ya cargadas + helpers que consultan la BD.
+"""
+from django.utils.text import slugify
+
+from .models import SEDE_POR_DEFECTO, Evaluacion, RespuestaConducta, RespuestaObjetivo
+
+
+def _promedio_respuestas(respuestas):
+    # "cumplimiento" es CharField: se promedian los valores convertibles a float.
+    vals = []
+    for r in respuestas:
+        try:
+            vals.append(float(r.cumplimiento.strip()))
+        except (AttributeError, ValueError):
+            continue
+    if not vals:
+        return None
+    return sum(vals) / len(vals)
+
+
+def score_desde_respuestas(resp_conductas, resp_objetivos):
+    """
+    Promedio simple: promedio conductas + promedio objetivos.
+    Recibe respuestas ya cargadas (sirve para vistas sync y async).
+    """
+    prom_c = _promedio_respuestas(resp_conductas)
+    prom_o = _promedio_respuestas(resp_objetivos)
+
+    vals = [v for v in [prom_c, prom_o] if v is not None]
+    if not vals:
+        return None
+    return sum(vals) / len(vals)
+
+
+def calcular_score(evaluacion: Evaluacion):
+    return score_desde_respuestas(
+        RespuestaConducta.objects.filter(evaluacion=evaluacion),
+        RespuestaObjetivo.objects.filter(evaluacion=evaluacion),
+    )
+
+
+def equivalente_0_120(score_1_5):
+    """
+    Convierte score 1–5 a equivalente 0–120:
+    1.0 -> 24
+    5.0 -> 120
+    (lineal)
+    """
+    if score_1_5 is None:
+        return None
+    try:
+        s = float(score_1_5)
+    except Exception:
+        return None
+    return (s / 5.0) * 120.0
+
+
+def nivel_desempeno(equiv_0_120):
+    """
+    Rangos (números):
+    - No logrado: 0 - 79.9999
+    - Parcialmente logrado: 80 - 95.9999
+    - Esperado: 96 - 109.9999
+    - Destacado: 110 - 120
+    """
+    if equiv_0_120 is None:
+        return ("Sin datos", "gris")
+
+    e = float(equiv_0_120)
+
+    if e < 80:
+        return ("No logrado", "rojo")
+    if 80 <= e < 96:
+        return ("Parcialmente logrado", "amarillo")
+    if 96 <= e < 110:
+        return ("Esperado", "verde")
+    return ("Destacado", "azul")
+
+
+def numero_acta_de(evaluacion: Evaluacion):
+    """
+    Número de acta automático:
+    ACTA-<SEDE>-COORD-<AÑO>-<ID 4 dígitos>  (p. ej. ACTA-ARICA-COORD-2025-0012)
+    """
+    sede = slugify(evaluacion.coordinador.sede or SEDE_POR_DEFECTO).upper()
+    return f"ACTA-{sede}-COORD-{evaluacion.periodo.anio}-{evaluacion.id:04d}"
+
+
+def scores_por_evaluacion(evaluaciones):
+    """
+    {evaluacion_id: score} para un conjunto de evaluaciones (queryset o ids)
+    en 2 consultas, sin importar cuántas sean.
+    """
+    resp_c, resp_o = {}, {}
+    for r in RespuestaConducta.objects.filter(evaluacion__in=evaluaciones).only("evaluacion_id", "cumplimiento"):
+        resp_c.setdefault(r.evaluacion_id, []).append(r)
+    for r in RespuestaObjetivo.objects.filter(evaluacion__in=evaluaciones).only("evaluacion_id", "cumplimiento"):
+        resp_o.setdefault(r.evaluacion_id, []).append(r)
+    return {
+        eid: score_desde_respuestas(resp_c.get(eid, []), resp_o.get(eid, []))
+        for eid in resp_c.keys() | resp_o.keys()
+    }
@@ -0,0 +1,123 @@
+"""
+Lecturas de reportes contra una réplica.
+
+settings.REPLICAS asigna a cada alias primario (el que elige RouterSedes) un
+alias de solo lectura. Solo leen de la réplica las vistas marcadas con
+@solo_lectura y los bloques usar_replica() (comandos de exportación); todo lo
+demás, y cualquier escritura, sigue en la primaria.
+
+Lectura de lo propio: tras un POST (u otro método no seguro) ReplicaMiddleware
+deja una cookie por REPLICA_PEGADO_SEGUNDOS y mientras exista ese navegador
+lee de la primaria, para no ver la réplica atrasada justo después de guardar.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .sedes import APPS_POR_SEDE, RouterSedes
+
+
+COOKIE_PEGADO = "mgd_primaria"
+METODOS_SEGUROS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+_lectura = ContextVar("lectura_en_replica", default=False)
+_pegado = ContextVar("pegado_a_primaria", default=False)
+
+
+def replicas():
+    return getattr(settings, "REPLICAS", None) or {}
+
+
+def segundos_pegado():
+    return getattr(settings, "REPLICA_PEGADO_SEGUNDOS", 10)
+
+
+@contextmanager
+def usar_replica(activa=True):
+    token = _lectura.set(activa)
+    try:
+        yield
+    finally:
+        _lectura.reset(token)
+
+
+def solo_lectura(vista):
+    """Marca una vista (sync o async) cuyas lecturas pueden ir a la réplica."""
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura(request, *args, **kwargs):
+            with usar_replica():
+                return await vista(request, *args, **kwargs)
+    else:
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            with usar_replica():
+                return vista(request, *args, **kwargs)
+    return envoltura
+
+
+class RouterReplicas:
+    """
+    Va antes de RouterSedes en DATABASE_ROUTERS: decide la base primaria con
+    él y, en modo lectura, la cambia por su réplica. Escrituras: no opina.
+    """
+
+    sedes = RouterSedes()
+
+    def db_for_read(self, model, **hints):
+        if not _lectura.get() or _pegado.get() or model._meta.app_label not in APPS_POR_SEDE:
+            return None
+        primaria = self.sedes.db_for_read(model, **hints) or DEFAULT_DB_ALIAS
+        return replicas().get(primaria)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Un objeto leído de la réplica puede relacionarse con uno de su primaria
+        primaria = {r: p for p, r in replicas().items()}
+        db1, db2 = obj1._state.db, obj2._state.db
+        if db1 and db2 and db1 != db2 and primaria.get(db1, db1) == primaria.get(db2, db2):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # La réplica es una copia: se migra la primaria
+        if db in replicas().values():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def _pegar(self, request, response):
+        if request.method not in METODOS_SEGUROS:
+            response.set_cookie(COOKIE_PEGADO, "1", max_age=segundos_pegado(), samesite="Lax")
+        return response
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        token = _pegado.set(COOKIE_PEGADO in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pegado.reset(token)
+        return self._pegar(request, response)
+
+    async def __acall__(self, request):
+        token = _pegado.set(COOKIE_PEGADO in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pegado.reset(token)
+        return self._pegar(request, response)
@@ -0,0 +1,186 @@
+"""
+Ruteo de base de datos por sede.
+
+settings.SEDES asigna cada sede (Coordinador.sede) a un alias de DATABASES;
+varias sedes pueden compartir una base. La sede activa vive en un ContextVar:
+la fija SedeMiddleware en cada request (?sede=..., recordada en una cookie) y
+usar_sede() en comandos y tareas. RouterSedes manda los modelos de atencion y
+desempenho a la base de la sede activa; sin sede activa todo va a "default".
+
+Modo entre sedes (?sede=todas): en_cada_sede() ejecuta una función una vez
+por sede, cada vez contra su propia base, para agregar los resultados.
+
+Coordinadores con una sede que no está en SEDES (p. ej. "Iquique", creada por
+la migración 0003 de desempenho): su base es "default" y en el modo entre
+sedes se recorren aparte, como la sede OTRAS (q_sede excluye las configuradas).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+
+
+TODAS = "todas"
+OTRAS = "otras"
+COOKIE_SEDE = "sede"
+
+# Apps cuyas tablas se reparten por sede; el resto (auth, sesiones, admin) queda en "default"
+APPS_POR_SEDE = {"atencion", "desempenho"}
+# Modelos de esas apps que son de toda la instalación (la cola la lee un solo worker)
+MODELOS_COMPARTIDOS = {"atencion.tarea"}
+
+_sede = ContextVar("sede", default=None)
+
+
+def sedes():
+    return getattr(settings, "SEDES", None) or {}
+
+
+def sede_actual():
+    return _sede.get()
+
+
+def alias_de(sede):
+    """Base de la sede; las no configuradas (y OTRAS) van a "default"."""
+    return sedes().get(sede, DEFAULT_DB_ALIAS)
+
+
+def alias_activo():
+    """Base de la sede activa: donde RouterSedes manda las escrituras de atencion/desempenho."""
+    sede = _sede.get()
+    return alias_de(sede) if sede else DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def atomico():
+    """
+    transaction.atomic() sobre la base de la sede activa (el de Django, sin
+    `using`, es siempre "default"). Sirve de bloque y de decorador; la base se
+    elige al entrar, no al importar.
+    """
+    with transaction.atomic(using=alias_activo()):
+        yield
+
+
+def sedes_recorridas():
+    """Sedes del modo entre sedes: las configuradas y al final OTRAS."""
+    return [*sedes(), OTRAS]
+
+
+def q_sede(campo="sede"):
+    """Limita a la sede activa (por si varias sedes comparten base); Q() vacío si no hay."""
+    sede = _sede.get()
+    if sede == OTRAS:
+        return ~Q(**{f"{campo}__in": list(sedes())})
+    return Q(**{campo: sede}) if sede else Q()
+
+
+@contextmanager
+def usar_sede(sede):
+    """Activa `sede` (None = ninguna) mientras dure el bloque."""
+    token = _sede.set(sede)
+    try:
+        yield
+    finally:
+        _sede.reset(token)
+
+
+def en_cada_sede(fn, *args, **kwargs):
+    """[(sede, fn(...)), ...] ejecutando fn una vez por sede (sedes_recorridas()), cada una en su base."""
+    resultados = []
+    for sede in sedes_recorridas():
+        with usar_sede(sede):
+            resultados.append((sede, fn(*args, **kwargs)))
+    return resultados
+
+
+async def aen_cada_sede(fn, *args, **kwargs):
+    """Versión async de en_cada_sede (fn es una corutina)."""
+    resultados = []
+    for sede in sedes_recorridas():
+        with usar_sede(sede):
+            resultados.append((sede, await fn(*args, **kwargs)))
+    return resultados
+
+
+class RouterSedes:
+    """Lecturas y escrituras de atencion/desempenho a la base de la sede activa."""
+
+    def _alias(self, model, hints):
+        if model._meta.app_label not in APPS_POR_SEDE:
+            return None
+        if model._meta.label_lower in MODELOS_COMPARTIDOS:
+            return DEFAULT_DB_ALIAS
+        # Objetos relacionados se quedan en la base de la instancia de origen
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        sede = _sede.get()
+        return alias_de(sede) if sede else None
+
+    def db_for_read(self, model, **hints):
+        return self._alias(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._alias(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._state.db and obj2._state.db and obj1._state.db != obj2._state.db:
+            return False
+        return None
+
+    # allow_migrate no se define: cada base tiene el esquema completo
+    # (`python manage.py migrate --database <alias>`).
+
+
+class SedeMiddleware:
+    """
+    Activa la sede del request: ?sede=<sede> (o ?sede=todas, ?sede=otras) la
+    elige y queda en una cookie; ?sede= vacío vuelve a la base por defecto.
+    Deja en request.sede la elección (incluido TODAS) y activa la sede en el
+    ContextVar.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def _elegir(self, request):
+        # Cookie y no sesión: la sesión se lee de la BD y este middleware también corre en async
+        pedida = request.GET.get("sede")
+        sede = pedida if pedida is not None else request.COOKIES.get(COOKIE_SEDE)
+        if sede not in (TODAS, OTRAS) and sede not in sedes():
+            sede = None
+        request.sede = sede
+        return pedida
+
+    def _recordar(self, request, pedida, response):
+        if pedida is None:
+            return response
+        if request.sede:
+            response.set_cookie(COOKIE_SEDE, request.sede, samesite="Lax")
+        else:
+            response.delete_cookie(COOKIE_SEDE)
+        return response
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        pedida = self._elegir(request)
+        with usar_sede(None if request.sede == TODAS else request.sede):
+            response = self.get_response(request)
+        return self._recordar(request, pedida, response)
+
+    async def __acall__(self, request):
+        pedida = self._elegir(request)
+        with usar_sede(None if request.sede == TODAS else request.sede):
+            response = await self.get_response(request)
+        return self._recordar(request, pedida, response)
@@ -0,0 +1,215 @@
+"""
+Cola de tareas en BD: encolar, reclamar y ejecutar con reintentos.
+
+Uso:
+    encolar("generar_acta_pdf", evaluacion_id=12)
+
+El worker es `python manage.py procesar_tareas`.
+"""
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ActaSnapshot, Evaluacion, Periodo, Tarea
+from .puntajes import calcular_score
+from .sedes import alias_activo, sede_actual, usar_sede
+
+logger = logging.getLogger(__name__)
+
+# Backoff exponencial entre reintentos: 10s, 20s, 40s ... hasta 1 hora.
+BACKOFF_BASE_SEGUNDOS = 10
+BACKOFF_MAX_SEGUNDOS = 3600
+
+# Una tarea "en_curso" sin actualizarse en este tiempo se considera de un worker caído.
+TIMEOUT_EN_CURSO = timedelta(minutes=15)
+# Mientras corre, el worker la marca viva cada LATIDO (muy por debajo del timeout):
+# un precalentamiento o un lote de PDFs largo no se vuelve a tomar a mitad de camino.
+LATIDO = timedelta(minutes=1)
+
+HANDLERS = {}
+
+# La cola vive en "default"; la sede activa al encolar viaja en los parámetros
+# y el handler corre con esa sede activa (ve la base de esa sede).
+PARAM_SEDE = "_sede"
+
+
+def tarea(tipo):
+    """Registra la función como handler de un tipo de tarea."""
+    def decorador(fn):
+        HANDLERS[tipo] = fn
+        return fn
+    return decorador
+
+
+def _con_sede(parametros):
+    sede = sede_actual()
+    return {**parametros, PARAM_SEDE: sede} if sede else parametros
+
+
+def encolar(tipo, max_intentos=5, **parametros):
+    if tipo not in HANDLERS:
+        raise ValueError(f"Tipo de tarea desconocido: {tipo}")
+    return Tarea.objects.create(tipo=tipo, parametros=_con_sede(parametros), max_intentos=max_intentos)
+
+
+def encolar_varios(tipo, lista_parametros, max_intentos=5):
+    """Encola una tarea por cada dict de parámetros en un solo INSERT."""
+    if tipo not in HANDLERS:
+        raise ValueError(f"Tipo de tarea desconocido: {tipo}")
+    return Tarea.objects.bulk_create(
+        [Tarea(tipo=tipo, parametros=_con_sede(p), max_intentos=max_intentos) for p in lista_parametros],
+        batch_size=500,
+    )
+
+
+def al_confirmar(fn, *args, **kwargs):
+    """
+    fn(*args, **kwargs) cuando confirme la transacción en curso de la base de
+    la sede activa (de inmediato si no hay), con esa misma sede activa. Para
+    encolar desde un bloque atómico: si se revierte, no queda ninguna tarea
+    que un worker pueda tomar.
+    """
+    sede = sede_actual()
+
+    def correr():
+        with usar_sede(sede):
+            fn(*args, **kwargs)
+
+    transaction.on_commit(correr, using=alias_activo())
+
+
+def reclamar_siguiente():
+    """
+    Toma la siguiente tarea lista. El UPDATE condicional hace de lock:
+    si otro worker la tomó antes, filas=0 y se prueba con la siguiente.
+    Funciona igual en SQLite (sin SELECT ... FOR UPDATE SKIP LOCKED).
+    """
+    ahora = timezone.now()
+    candidatas = (
+        Tarea.objects.filter(estado=Tarea.PENDIENTE, ejecutar_desde__lte=ahora)
+        .order_by("ejecutar_desde", "id")
+        .values_list("id", flat=True)[:10]
+    )
+    for tarea_id in candidatas:
+        tomada = Tarea.objects.filter(id=tarea_id, estado=Tarea.PENDIENTE).update(
+            estado=Tarea.EN_CURSO, fecha_actualizacion=ahora
+        )
+        if tomada:
+            return Tarea.objects.get(id=tarea_id)
+    return None
+
+
+def liberar_colgadas():
+    """
+    Devuelve a la cola las tareas de workers que murieron a mitad de camino.
+    Cada rescate cuenta como un intento: una tarea que tumba al worker
+    termina FALLIDA al agotar max_intentos. Retorna (liberadas, fallidas).
+    """
+    ahora = timezone.now()
+    colgadas = Tarea.objects.filter(estado=Tarea.EN_CURSO, fecha_actualizacion__lt=ahora - TIMEOUT_EN_CURSO)
+    fallidas = colgadas.filter(intentos__gte=F("max_intentos") - 1).update(
+        estado=Tarea.FALLIDA,
+        intentos=F("intentos") + 1,
+        error="El worker dejó de responder (sin latido) en el último intento.",
+        fecha_actualizacion=ahora,
+    )
+    liberadas = colgadas.update(
+        estado=Tarea.PENDIENTE, intentos=F("intentos") + 1, ejecutar_desde=ahora, fecha_actualizacion=ahora
+    )
+    if fallidas:
+        logger.error("%s tarea(s) colgada(s) fallaron definitivamente", fallidas)
+    return liberadas, fallidas
+
+
+def latir(tarea_id):
+    """Marca viva la tarea en curso: liberar_colgadas no la toma mientras lata."""
+    return Tarea.objects.filter(id=tarea_id, estado=Tarea.EN_CURSO).update(fecha_actualizacion=timezone.now())
+
+
+@contextmanager
+def _latiendo(tarea_id):
+    """Latido en un hilo aparte mientras dura el bloque (el handler ocupa este)."""
+    detener = threading.Event()
+
+    def latido():
+        try:
+            while not detener.wait(LATIDO.total_seconds()):
+                latir(tarea_id)
+        finally:
+            connections.close_all()  # conexiones de este hilo
+
+    hilo = threading.Thread(target=latido, name=f"latido-tarea-{tarea_id}", daemon=True)
+    hilo.start()
+    try:
+        yield
+    finally:
+        detener.set()
+        hilo.join()
+
+
+def _backoff(intentos):
+    return timedelta(seconds=min(BACKOFF_BASE_SEGUNDOS * 2 ** (intentos - 1), BACKOFF_MAX_SEGUNDOS))
+
+
+def ejecutar(t: Tarea):
+    handler = HANDLERS.get(t.tipo)
+    t.intentos += 1
+    try:
+        if handler is None:
+            raise ValueError(f"Tipo de tarea desconocido: {t.tipo}")
+        parametros = dict(t.parametros)
+        with usar_sede(parametros.pop(PARAM_SEDE, None)), _latiendo(t.id):
+            t.resultado = handler(**parametros)
+        t.estado = Tarea.COMPLETADA
+        t.error = ""
+    except Exception:
+        t.error = traceback.format_exc()
+        if t.intentos >= t.max_intentos:
+            t.estado = Tarea.FALLIDA
+            logger.error("Tarea %s falló definitivamente", t)
+        else:
+            t.estado = Tarea.PENDIENTE
+            t.ejecutar_desde = timezone.now() + _backoff(t.intentos)
+            logger.warning("Tarea %s falló (intento %s), reintento en %s", t, t.intentos, t.ejecutar_desde)
+    t.save()
+    return t
+
+
+# -------- Handlers --------
+
+@tarea("recalcular_score")
+def recalcular_score(evaluacion_id):
+    evaluacion = Evaluacion.objects.get(id=evaluacion_id)
+    evaluacion.score_total = calcular_score(evaluacion)
+    evaluacion.save(update_fields=["score_total"])
+    return {"score_total": evaluacion.score_total}
+
+
+@tarea("generar_acta_pdf")
+def generar_acta_pdf(evaluacion_id):
+    from .actas import RENDERERS, acta_desde_snapshot, cargar_acta
+
+    evaluacion = Evaluacion.objects.select_related("coordinador", "periodo").get(id=evaluacion_id)
+    snapshot = ActaSnapshot.objects.filter(evaluacion_id=evaluacion_id).first()
+    acta = acta_desde_snapshot(snapshot) if snapshot else cargar_acta(evaluacion)
+    renderer = RENDERERS["pdf"]
+    pdf = renderer.render(acta)
+    if evaluacion.acta_pdf:
+        evaluacion.acta_pdf.delete(save=False)
+    evaluacion.acta_pdf.save(renderer.nombre_archivo(acta), ContentFile(pdf), save=False)
+    evaluacion.save(update_fields=["acta_pdf"])
+    return {"archivo": evaluacion.acta_pdf.name}
+
+
+@tarea("precalentar_periodo")
+def precalentar_periodo(periodo_id, pdfs=True, rollup=True):
+    from .precalentar import precalentar_periodo as precalentar
+
+    return precalentar(Periodo.objects.get(id=periodo_id), pdfs=pdfs, rollup=rollup)
@@ -2,8 +2,22 @@ from django import template
 
 register = template.Library()
 
+# Única librería de filtros del proyecto ({% load extras %}).
+# Las plantillas de catálogo ya no la necesitan por fila: las vistas entregan
+# filas pre-emparejadas (ítem, respuesta). Se mantiene para usos puntuales.
+
+
 @register.filter
 def get_item(d, key):
+    """Obtiene d[key] si existe (None si d es None)."""
     if d is None:
         return None
     return d.get(key)
+
+
+@register.filter
+def get_attr(obj, attr_name):
+    """Obtiene getattr(obj, attr_name) si existe."""
+    if obj is None or not attr_name:
+        return None
+    return getattr(obj, attr_name, None)
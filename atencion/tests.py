@@ -1,3 +1,985 @@
-from django.test import TestCase
+import asyncio
+import importlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, router, transaction
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .busqueda import buscar_comentarios, buscar_coordinadores
+from .coalescencia import acompartido, cache_compartida
+from .limitador import LimitadorPDF, Saturado
+from . import views
+from .actas import ActaData, acta_desde_snapshot, cargar_acta
+from .admin import EvaluacionAdmin
+from .models import (
+    ActaSnapshot, ConductaSello, Coordinador, Evaluacion, Objetivo, Periodo, RespuestaConducta, RespuestaObjetivo, Tarea,
+    normalizar_nombre,
+)
+from .periodos import abrir_periodo, cerrar_evaluaciones, cerrar_periodo, evaluaciones_completas
+from .precalentar import precalentar_periodo
+from .replicas import COOKIE_PEGADO, ReplicaMiddleware, RouterReplicas, solo_lectura, usar_replica
+from .sedes import OTRAS, q_sede, usar_sede
+from .tareas import (
+    HANDLERS, PARAM_SEDE, TIMEOUT_EN_CURSO, ejecutar, encolar, latir, liberar_colgadas, reclamar_siguiente,
+)
+
+
+# Dos sedes en la misma base: el filtro por sede (q_sede) es lo que las separa
+DOS_SEDES = override_settings(SEDES={"Arica": "default", "Iquique": "default"})
+
+# Sin collectstatic: las plantillas usan los estáticos sin manifiesto
+ESTATICOS_SIN_MANIFIESTO = override_settings(STORAGES={
+    **settings.STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+})
+
+
+def crear_catalogo():
+    return Objetivo.objects.create(objetivo="Retención"), ConductaSello.objects.create(conducta="Compromiso")
+
+
+def crear_evaluaciones(periodo, n, objetivo=None, conducta=None, cumplimiento="4", **coordinador):
+    """n coordinadores con su evaluación (y respuestas si se pasa el catálogo)."""
+    evaluaciones = []
+    for i in range(n):
+        c = Coordinador.objects.create(nombre_completo=f"Coordinador {Coordinador.objects.count() + 1}", **coordinador)
+        e = Evaluacion.objects.create(coordinador=c, periodo=periodo)
+        if objetivo:
+            RespuestaObjetivo.objects.create(evaluacion=e, objetivo=objetivo, cumplimiento=cumplimiento)
+        if conducta:
+            RespuestaConducta.objects.create(evaluacion=e, conducta=conducta, cumplimiento=cumplimiento)
+        evaluaciones.append(e)
+    return evaluaciones
+
+
+@ESTATICOS_SIN_MANIFIESTO
+class AdminConsultasTests(TestCase):
+    """Las changelists y acciones hacen un número fijo de consultas, sin importar las filas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@inacap.cl", "clave")
+        cls.periodo = Periodo.objects.create(name="2025", anio=2025)
+        cls.objetivo, cls.conducta = crear_catalogo()
+        crear_evaluaciones(cls.periodo, 12, cls.objetivo, cls.conducta)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def assertChangelist(self, url, consultas):
+        with self.assertNumQueries(consultas):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_changelist_evaluacion(self):
+        # sesión + usuario + filtro de periodos + página (coordinador y periodo en el JOIN) + conteo total
+        self.assertChangelist("/admin/atencion/evaluacion/", 5)
+
+    def test_changelist_respuestas(self):
+        self.assertChangelist("/admin/atencion/respuestaobjetivo/", 4)
+        self.assertChangelist("/admin/atencion/respuestaconducta/", 4)
+
+    def test_changelist_tarea(self):
+        Tarea.objects.bulk_create([Tarea(tipo="recalcular_score", parametros={"evaluacion_id": i}) for i in range(5)])
+        self.assertChangelist("/admin/atencion/tarea/", 5)
+
+    def test_accion_recalcular_scores(self):
+        ids = list(Evaluacion.objects.values_list("id", flat=True))
+        # respuestas en 2 consultas y un solo UPDATE por lotes
+        with self.assertNumQueries(9):
+            self.client.post("/admin/atencion/evaluacion/", {"action": "recalcular_scores", "_selected_action": ids})
+        self.assertEqual(set(Evaluacion.objects.values_list("score_total", flat=True)), {4.0})
+
+    def test_accion_cerrar_seleccionadas(self):
+        ids = list(Evaluacion.objects.values_list("id", flat=True))
+        # lectura y cierre por lotes, snapshots en un INSERT, tareas en otro
+        # Las tareas se encolan al confirmar: se ejecutan dentro del conteo
+        with self.assertNumQueries(22), self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/admin/atencion/evaluacion/", {"action": "cerrar_seleccionadas", "_selected_action": ids})
+        self.assertEqual(Evaluacion.objects.filter(cerrada=True).count(), 12)
+        self.assertEqual(Tarea.objects.filter(tipo="generar_acta_pdf").count(), 12)
+
+    def test_accion_abrir_periodos(self):
+        nuevo = Periodo.objects.create(name="2026", anio=2026)
+        # Evaluaciones en un INSERT y una tarea de precalentamiento del periodo
+        with self.assertNumQueries(10), self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/admin/atencion/periodo/", {"action": "abrir_periodos", "_selected_action": [nuevo.id]})
+        self.assertEqual(Evaluacion.objects.filter(periodo=nuevo).count(), 12)
+        self.assertEqual(Tarea.objects.filter(tipo="precalentar_periodo").count(), 1)
+
+
+class ColaTareasTests(TestCase):
+    def setUp(self):
+        self.llamadas = 0
+
+    def fallar(self):
+        self.llamadas += 1
+        raise RuntimeError("sin conexión")
+
+    def test_reclamar_siguiente(self):
+        futura = Tarea.objects.create(tipo="recalcular_score", ejecutar_desde=timezone.now() + timedelta(minutes=5))
+        lista = encolar("recalcular_score", evaluacion_id=1)
+
+        tomada = reclamar_siguiente()
+        self.assertEqual((tomada.id, tomada.estado), (lista.id, Tarea.EN_CURSO))
+        # Ya tomada no se vuelve a entregar, y la futura espera su hora
+        self.assertIsNone(reclamar_siguiente())
+        self.assertEqual(Tarea.objects.get(id=futura.id).estado, Tarea.PENDIENTE)
+
+    def test_reintentos_con_backoff_hasta_fallida(self):
+        with mock.patch.dict(HANDLERS, {"fallar": self.fallar}):
+            t = encolar("fallar", max_intentos=3)
+            esperas = []
+            for _ in range(3):
+                antes = timezone.now()
+                t = ejecutar(t)
+                esperas.append(round((t.ejecutar_desde - antes).total_seconds()))
+        self.assertEqual(self.llamadas, 3)
+        self.assertEqual((t.estado, t.intentos), (Tarea.FALLIDA, 3))
+        self.assertIn("RuntimeError: sin conexión", t.error)
+        # 10s y 20s entre reintentos; el último ya no se reprograma
+        self.assertEqual(esperas[:2], [10, 20])
+
+    def test_late_mientras_corre(self):
+        with (
+            mock.patch.dict(HANDLERS, {"lenta": lambda: time.sleep(0.1)}),
+            mock.patch("atencion.tareas.LATIDO", timedelta(seconds=0.01)),
+            mock.patch("atencion.tareas.latir") as latir_,
+        ):
+            t = ejecutar(encolar("lenta"))
+        self.assertEqual(t.estado, Tarea.COMPLETADA)
+        self.assertGreater(latir_.call_count, 1)
+        latir_.assert_called_with(t.id)
+
+    def test_liberar_colgadas_cuenta_el_intento(self):
+        viva, colgada, ultima = (
+            Tarea.objects.create(tipo="recalcular_score", estado=Tarea.EN_CURSO, intentos=i, max_intentos=5)
+            for i in (0, 1, 4)
+        )
+        antiguo = timezone.now() - TIMEOUT_EN_CURSO - timedelta(minutes=1)
+        Tarea.objects.update(fecha_actualizacion=antiguo)
+        latir(viva.id)
+
+        self.assertEqual(liberar_colgadas(), (1, 1))
+        viva, colgada, ultima = (Tarea.objects.get(id=t.id) for t in (viva, colgada, ultima))
+        self.assertEqual((viva.estado, viva.intentos), (Tarea.EN_CURSO, 0))
+        self.assertEqual((colgada.estado, colgada.intentos), (Tarea.PENDIENTE, 2))
+        self.assertEqual((ultima.estado, ultima.intentos), (Tarea.FALLIDA, 5))
+
+    def test_estado_tarea(self):
+        t = encolar("recalcular_score", evaluacion_id=1)
+        datos = self.client.get(reverse("estado_tarea", args=[t.id])).json()
+        self.assertEqual(
+            (datos["id"], datos["tipo"], datos["estado"], datos["intentos"]),
+            (t.id, "recalcular_score", Tarea.PENDIENTE, 0),
+        )
+        Tarea.objects.filter(id=t.id).update(error="Traceback ...\nValueError: malo\n")
+        self.assertEqual(self.client.get(reverse("estado_tarea", args=[t.id])).json()["error"], "ValueError: malo")
+        self.assertEqual(self.client.get(reverse("estado_tarea", args=[t.id + 1])).status_code, 404)
+
+    def test_procesar_tareas_una_vez(self):
+        periodo = Periodo.objects.create(name="2025", anio=2025)
+        evaluacion, = crear_evaluaciones(periodo, 1, *crear_catalogo())
+        t = encolar("recalcular_score", evaluacion_id=evaluacion.id)
+        salida = io.StringIO()
+        call_command("procesar_tareas", "--una-vez", stdout=salida)
+
+        t.refresh_from_db()
+        self.assertEqual((t.estado, t.resultado), (Tarea.COMPLETADA, {"score_total": 4.0}))
+        self.assertIn("Tareas procesadas: 1", salida.getvalue())
+
+
+class AutoguardadoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.periodo = Periodo.objects.create(name="2025", anio=2025)
+        cls.objetivo, cls.conducta = crear_catalogo()
+        cls.evaluacion, = crear_evaluaciones(cls.periodo, 1)
+
+    def autoguardar(self, cuerpo, evaluacion=None):
+        url = reverse("autoguardar_evaluacion", args=[(evaluacion or self.evaluacion).id])
+        datos = cuerpo if isinstance(cuerpo, (str, bytes)) else json.dumps(cuerpo)
+        return self.client.post(url, datos, content_type="application/json")
+
+    def test_guarda_respuesta_y_recalcula_score(self):
+        response = self.autoguardar({f"conducta_{self.conducta.id}": "4", "fortalezas": " Liderazgo "})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["score"], 4.0)
+        self.evaluacion.refresh_from_db()
+        self.assertEqual(self.evaluacion.score_total, 4.0)
+        self.assertEqual(self.evaluacion.fortalezas, "Liderazgo")
+
+        # Vaciar la respuesta actualiza la fila existente (no crea otra)
+        self.autoguardar({f"conducta_{self.conducta.id}": ""})
+        self.assertEqual(RespuestaConducta.objects.get(evaluacion=self.evaluacion).cumplimiento, "")
+
+    def test_evaluacion_cerrada_409(self):
+        Evaluacion.objects.filter(id=self.evaluacion.id).update(cerrada=True)
+        response = self.autoguardar({"fortalezas": "x"})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Evaluacion.objects.get(id=self.evaluacion.id).fortalezas, "")
+
+    def test_cuerpos_invalidos_400(self):
+        for cuerpo in (
+            "{no es json",
+            [],
+            {},
+            {"fortalezas": 3},
+            {"campo_raro": "1"},
+            {f"conducta_{self.conducta.id}": "9"},
+            {"objetivo_999": "3"},
+        ):
+            with self.subTest(cuerpo=cuerpo):
+                self.assertEqual(self.autoguardar(cuerpo).status_code, 400)
+        self.assertFalse(RespuestaConducta.objects.exists())
+
+    def test_solo_post_o_patch(self):
+        self.assertEqual(self.client.get(reverse("autoguardar_evaluacion", args=[self.evaluacion.id])).status_code, 405)
+
+
+@ESTATICOS_SIN_MANIFIESTO
+@DOS_SEDES
+class BusquedaComentariosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.periodo = Periodo.objects.create(name="2025", anio=2025)
+        cls.arica, = crear_evaluaciones(cls.periodo, 1, sede="Arica")
+        cls.iquique, = crear_evaluaciones(cls.periodo, 1, sede="Iquique")
+        Evaluacion.objects.filter(id=cls.arica.id).update(fortalezas="Gran liderazgo del equipo docente")
+        Evaluacion.objects.filter(id=cls.iquique.id).update(retroalimentacion="Mejorar el liderazgo en reuniones")
+
+    def ids(self, texto, **kwargs):
+        return [r["evaluacion"].id for r in buscar_comentarios(texto, **kwargs)]
+
+    def test_busca_sin_tildes_y_resalta(self):
+        resultados = buscar_comentarios("LÍDER")
+        self.assertEqual({r["evaluacion"].id for r in resultados}, {self.arica.id, self.iquique.id})
+        self.assertIn("<mark>liderazgo</mark>", resultados[0]["fragmento"])
+
+    def test_indice_sigue_update_y_delete(self):
+        Evaluacion.objects.filter(id=self.arica.id).update(fortalezas="Planificación rigurosa")
+        self.assertEqual(self.ids("liderazgo"), [self.iquique.id])
+        self.assertEqual(self.ids("planificacion"), [self.arica.id])
+        Evaluacion.objects.filter(id=self.arica.id).delete()
+        self.assertEqual(self.ids("planificacion"), [])
+
+    def test_limitado_a_la_sede_activa(self):
+        with usar_sede("Iquique"):
+            self.assertEqual(self.ids("liderazgo"), [self.iquique.id])
+            self.assertEqual([c.sede for c in buscar_coordinadores("coord")], ["Iquique"])
+        with usar_sede("Arica"):
+            self.assertEqual(self.ids("liderazgo", periodo_id=self.periodo.id), [self.arica.id])
+
+    def test_vistas_por_sede_y_todas(self):
+        url = reverse("buscar_comentarios")
+        response = self.client.get(url, {"q": "liderazgo", "sede": "Arica"})
+        self.assertEqual([r["evaluacion"].id for r in response.context["resultados"]], [self.arica.id])
+
+        response = self.client.get(url, {"q": "liderazgo", "sede": "todas"})
+        self.assertEqual(
+            {(r["evaluacion"].id, r["qs_sede"]) for r in response.context["resultados"]},
+            {(self.arica.id, "sede=Arica"), (self.iquique.id, "sede=Iquique")},
+        )
+
+        url = reverse("buscar_coordinadores")
+        sedes = [c["sede"] for c in self.client.get(url, {"q": "coord", "sede": "Iquique"}).json()["resultados"]]
+        self.assertEqual(sedes, ["Iquique"])
+        sedes = [c["sede"] for c in self.client.get(url, {"q": "coord", "sede": "todas"}).json()["resultados"]]
+        self.assertEqual(sorted(sedes), ["Arica", "Iquique"])
+
+
+class IndiceComentariosSqliteTests(TestCase):
+    """Triggers FTS5 de la 0006, recreados por la 0010 tras reconstrucciones de la tabla."""
+
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Índice FTS5 solo en SQLite")
+
+    def triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'atencion_evaluacion'")
+            return {fila[0] for fila in cursor.fetchall()}
+
+    def test_triggers_tras_migraciones(self):
+        self.assertEqual(
+            self.triggers(),
+            {"atencion_evaluacion_fts_ai", "atencion_evaluacion_fts_ad", "atencion_evaluacion_fts_au"},
+        )
+
+    def test_recrear_tras_reconstruir_tabla(self):
+        periodo = Periodo.objects.create(name="2025", anio=2025)
+        evaluacion, = crear_evaluaciones(periodo, 1)
+        # Lo que deja un _remake_table de SQLite: la tabla sin triggers
+        with connection.cursor() as cursor:
+            for nombre in self.triggers():
+                cursor.execute(f"DROP TRIGGER {nombre}")
+        Evaluacion.objects.filter(id=evaluacion.id).update(fortalezas="Excelente comunicación")
+        self.assertEqual(buscar_comentarios("comunicacion"), [])
+
+        migracion = importlib.import_module("atencion.migrations.0010_recrear_indice_comentarios")
+        with connection.cursor() as cursor:
+            for sql in migracion.SQLITE_RECREAR:
+                cursor.execute(sql)
+        self.assertEqual(len(self.triggers()), 3)
+        self.assertEqual([r["evaluacion"].id for r in buscar_comentarios("comunicacion")], [evaluacion.id])
+
+
+class NombreNormalizadoTests(TestCase):
+    def test_normalizar_nombre(self):
+        self.assertEqual(normalizar_nombre("  José  PEÑA\tÁlvarez "), "jose pena alvarez")
+        self.assertEqual(normalizar_nombre(None), "")
+
+    def test_se_recalcula_al_guardar(self):
+        c = Coordinador.objects.create(nombre_completo="Mónica Núñez")
+        self.assertEqual(c.nombre_normalizado, "monica nunez")
+        c.nombre_completo = "Mónica Íñiguez"
+        c.save(update_fields=["nombre_completo"])
+        self.assertEqual(Coordinador.objects.get(id=c.id).nombre_normalizado, "monica iniguez")
+
+    def test_typeahead_por_inicio_y_por_apellido(self):
+        for nombre in ("Ángela Soto", "Andrés Pérez", "Pedro Ángulo", "Ana Inactiva"):
+            Coordinador.objects.create(nombre_completo=nombre, is_active=nombre != "Ana Inactiva")
+        # Primero los que empiezan con el texto, después los de otra palabra
+        self.assertEqual(
+            [c.nombre_completo for c in buscar_coordinadores("AN")], ["Andrés Pérez", "Ángela Soto", "Pedro Ángulo"]
+        )
+        self.assertEqual(len(buscar_coordinadores("an", solo_activos=False)), 4)
+        self.assertEqual(len(buscar_coordinadores("an", limite=1)), 1)
+        self.assertEqual(buscar_coordinadores("   "), [])
+
+        response = self.client.get(reverse("buscar_coordinadores"), {"q": "perez"})
+        self.assertEqual([c["nombre"] for c in response.json()["resultados"]], ["Andrés Pérez"])
+
+
+@ESTATICOS_SIN_MANIFIESTO
+@DOS_SEDES
+class SedesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.periodo = Periodo.objects.create(name="2025", anio=2025)
+        crear_evaluaciones(cls.periodo, 2, sede="Arica")
+        crear_evaluaciones(cls.periodo, 1, sede="Iquique")
+        # Sede que no está en SEDES (como las que dejó la migración 0003 de desempenho)
+        cls.antofagasta, = crear_evaluaciones(cls.periodo, 1, sede="Antofagasta")
+
+    def test_q_sede(self):
+        with usar_sede("Iquique"):
+            self.assertEqual(Coordinador.objects.filter(q_sede()).count(), 1)
+        with usar_sede(OTRAS):
+            self.assertEqual(list(Coordinador.objects.filter(q_sede()).values_list("sede", flat=True)), ["Antofagasta"])
+        self.assertEqual(Coordinador.objects.filter(q_sede()).count(), 4)
+
+    def test_panel_todas_incluye_sedes_no_configuradas(self):
+        response = self.client.get(reverse("dashboard_gestion"), {"periodo": self.periodo.id, "sede": "todas"})
+        filas = response.context["filas"]
+        self.assertEqual(sorted(f["sede"] for f in filas), ["Antofagasta", "Arica", "Arica", "Iquique"])
+        fila = next(f for f in filas if f["sede"] == "Antofagasta")
+        self.assertEqual(fila["qs_sede"], "sede=otras")
+
+        # El enlace de la fila abre la evaluación en esa "sede"
+        response = self.client.get(reverse("evaluacion_detalle", args=[self.antofagasta.id]), {"sede": OTRAS})
+        self.assertEqual(response.status_code, 200)
+
+    def test_panel_por_sede(self):
+        response = self.client.get(reverse("dashboard_gestion"), {"periodo": self.periodo.id, "sede": "Iquique"})
+        self.assertEqual([f["coordinador"].sede for f in response.context["filas"]], ["Iquique"])
+        self.assertEqual(response.cookies["sede"].value, "Iquique")
+
+    def test_abrir_y_cerrar_rechazados_en_modo_todas(self):
+        nuevo = Periodo.objects.create(name="2026", anio=2026)
+        self.client.cookies["sede"] = "todas"
+        response = self.client.post(reverse("abrir_periodo", args=[nuevo.id]))
+        self.assertRedirects(
+            response, f"{reverse('dashboard_gestion')}?periodo={nuevo.id}", fetch_redirect_response=False
+        )
+        self.assertFalse(Evaluacion.objects.filter(periodo=nuevo).exists())
+        self.client.post(reverse("cerrar_periodo", args=[self.periodo.id]))
+        self.assertEqual(Periodo.objects.get(id=self.periodo.id).estado, Periodo.ABIERTO)
+
+    def test_abrir_por_sede(self):
+        nuevo = Periodo.objects.create(name="2026", anio=2026)
+        self.client.post(reverse("abrir_periodo", args=[nuevo.id]) + "?sede=Arica")
+        sedes = Evaluacion.objects.filter(periodo=nuevo).values_list("coordinador__sede", flat=True)
+        self.assertEqual(list(sedes), ["Arica", "Arica"])
+
+    def test_tarea_lleva_la_sede(self):
+        with usar_sede("Iquique"):
+            t = encolar("recalcular_score", evaluacion_id=1)
+        self.assertEqual(t.parametros[PARAM_SEDE], "Iquique")
+
+
+@ESTATICOS_SIN_MANIFIESTO
+class PanelCacheTests(TestCase):
+    """Filas de dashboard_gestion en la caché, con la clave que también llena el precalentamiento."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.periodo = Periodo.objects.create(name="2025", anio=2025)
+        cls.objetivo, cls.conducta = crear_catalogo()
+        cls.evaluacion, _ = crear_evaluaciones(cls.periodo, 2, sede="Arica")
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def panel(self):
+        return self.client.get(reverse("dashboard_gestion"), {"periodo": self.periodo.id})
+
+    def test_cachea_hasta_que_cambia_una_evaluacion(self):
+        with mock.patch("atencion.views._filas_dashboard", side_effect=views._filas_dashboard) as calcular:
+            self.panel()
+            self.panel()
+            self.assertEqual(calcular.call_count, 1)
+
+            url = reverse("autoguardar_evaluacion", args=[self.evaluacion.id])
+            self.client.post(url, json.dumps({f"conducta_{self.conducta.id}": "5"}), content_type="application/json")
+            response = self.panel()
+            self.assertEqual(calcular.call_count, 2)
+        fila = next(f for f in response.context["filas"] if f["evaluacion"] == self.evaluacion)
+        self.assertEqual(fila["score"], 5.0)
+
+    def test_precalentar_llena_la_clave_del_panel(self):
+        with tempfile.TemporaryDirectory() as directorio, override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directorio},
+        }):
+            hecho = precalentar_periodo(self.periodo, workers=1, pdfs=False)
+            # Sin sede, Arica y OTRAS
+            self.assertEqual(hecho["dashboards"], 3)
+            with mock.patch("atencion.views._filas_dashboard") as calcular:
+                response = self.panel()
+            calcular.assert_not_called()
+            self.assertEqual(len(response.context["filas"]), 2)
+
+    def test_sin_cache_compartida_no_precalienta_filas(self):
+        with self.assertLogs("atencion.precalentar", "WARNING"):
+            hecho = precalentar_periodo(self.periodo, workers=1, pdfs=False)
+        self.assertEqual(hecho["dashboards"], 0)
+
+
+@override_settings(SEDES={"Arica": "default", "Iquique": "sede_iquique"})
+class SedeEnOtraBaseTests(TestCase):
+    """
+    Una sede con base propia: las transacciones y el bloqueo van sobre esa
+    base, no sobre "default". La conexión se crea y migra aquí, fuera de
+    DATABASES: las transacciones del TestCase envuelven solo "default".
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directorio = tempfile.mkdtemp()
+        ajustes = {**connections.settings["default"], "NAME": f"{cls.directorio}/sede_iquique.sqlite3"}
+        connections["sede_iquique"] = connections["default"].__class__(ajustes, "sede_iquique")
+        call_command("migrate", database="sede_iquique", verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["sede_iquique"].close()
+        del connections["sede_iquique"]
+        shutil.rmtree(cls.directorio, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        with usar_sede("Iquique"):
+            self.periodo = Periodo.objects.create(name="2025", anio=2025)
+            self.objetivo, self.conducta = crear_catalogo()
+            self.evaluacion, = crear_evaluaciones(self.periodo, 1, sede="Iquique")
+
+    def test_autoguardar_bloquea_dentro_de_la_transaccion_de_la_sede(self):
+        bloqueos = []
+        original = QuerySet.select_for_update
+
+        def espiar(qs, *args, **kwargs):
+            bloqueos.append((qs.db, connections[qs.db].in_atomic_block))
+            return original(qs, *args, **kwargs)
+
+        url = reverse("autoguardar_evaluacion", args=[self.evaluacion.id]) + "?sede=Iquique"
+        with mock.patch.object(QuerySet, "select_for_update", espiar):
+            response = self.client.post(
+                url, json.dumps({f"conducta_{self.conducta.id}": "4"}), content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(bloqueos, [("sede_iquique", True)])
+        self.assertTrue(RespuestaConducta.objects.using("sede_iquique").filter(evaluacion=self.evaluacion).exists())
+        self.assertFalse(RespuestaConducta.objects.using("default").exists())
+
+    def test_abrir_periodo_es_atomico_en_la_base_de_la_sede(self):
+        with usar_sede("Iquique"):
+            Coordinador.objects.create(nombre_completo="Nueva", sede="Iquique")
+            nuevo = Periodo.objects.create(name="2026", anio=2026)
+            with mock.patch.object(RespuestaObjetivo.objects, "bulk_create", side_effect=RuntimeError):
+                with self.assertRaises(RuntimeError):
+                    abrir_periodo(nuevo, con_respuestas=True)
+            # El INSERT de evaluaciones se deshizo junto con el resto
+            self.assertFalse(Evaluacion.objects.filter(periodo=nuevo).exists())
+
+            self.assertEqual(abrir_periodo(nuevo, con_respuestas=True), 2)
+        self.assertEqual(Evaluacion.objects.using("sede_iquique").filter(periodo__anio=2026).count(), 2)
+
+
+@override_settings(REPLICAS={"default": "replica"}, REPLICA_PEGADO_SEGUNDOS=7)
+class ReplicasTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def lecturas(self, metodo="get", cookies=None, vista=None):
+        """(response, base de lectura de Evaluacion dentro de la vista) pasando por ReplicaMiddleware."""
+        leida = {}
+
+        def registrar(request):
+            leida["db"] = router.db_for_read(Evaluacion)
+            return HttpResponse()
+
+        request = getattr(self.factory, metodo)("/")
+        request.COOKIES.update(cookies or {})
+        response = ReplicaMiddleware(vista or solo_lectura(registrar))(request)
+        return response, leida.get("db")
+
+    def test_router(self):
+        self.assertEqual(router.db_for_read(Evaluacion), "default")
+        with usar_replica():
+            self.assertEqual(router.db_for_read(Evaluacion), "replica")
+            # Escrituras y apps fuera de APPS_POR_SEDE siguen en la primaria
+            self.assertEqual(router.db_for_write(Evaluacion), "default")
+            self.assertEqual(router.db_for_read(User), "default")
+        self.assertFalse(RouterReplicas().allow_migrate("replica", "atencion"))
+        self.assertIsNone(RouterReplicas().allow_migrate("default", "atencion"))
+
+    def test_solo_lectura_va_a_la_replica(self):
+        response, db = self.lecturas()
+        self.assertEqual(db, "replica")
+        self.assertNotIn(COOKIE_PEGADO, response.cookies)
+
+    def test_tras_escribir_queda_pegado_a_la_primaria(self):
+        response, _ = self.lecturas("post")
+        self.assertEqual(response.cookies[COOKIE_PEGADO]["max-age"], 7)
+        _, db = self.lecturas(cookies={COOKIE_PEGADO: "1"})
+        self.assertEqual(db, "default")
+
+    def test_vista_async(self):
+        @solo_lectura
+        async def vista(request):
+            return router.db_for_read(Evaluacion)
+
+        self.assertEqual(asyncio.run(vista(self.factory.get("/"))), "replica")
+
+
+class LimitadorPDFTests(SimpleTestCase):
+    def test_rechaza_con_la_cola_llena(self):
+        limitador = LimitadorPDF(workers=1, cola=1, retry_after=3)
+        self.addCleanup(limitador.executor.shutdown)
+        liberar = threading.Event()
+
+        async def escenario():
+            en_curso = [asyncio.ensure_future(limitador.ejecutar(liberar.wait)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            with self.assertRaises(Saturado) as ctx:
+                await limitador.ejecutar(lambda: "no llega")
+            self.assertEqual(ctx.exception.retry_after, 3)
+            liberar.set()
+            return await asyncio.gather(*en_curso)
+
+        self.assertEqual(asyncio.run(escenario()), [True, True])
+        stats = limitador.estadisticas()
+        self.assertEqual((stats["completados"], stats["rechazados"], stats["pendientes"]), (2, 1, 0))
+        # Liberados los cupos, se vuelve a aceptar
+        self.assertEqual(asyncio.run(limitador.ejecutar(lambda x: x * 2, 21)), 42)
+
+    def test_descarta_lo_que_espero_demasiado(self):
+        limitador = LimitadorPDF(workers=1, cola=1, espera_max=0.05)
+        self.addCleanup(limitador.executor.shutdown)
+
+        async def escenario():
+            lento = asyncio.ensure_future(limitador.ejecutar(time.sleep, 0.2))
+            await asyncio.sleep(0.01)
+            with self.assertRaises(Saturado):
+                await limitador.ejecutar(lambda: "tarde")
+            await lento
+
+        asyncio.run(escenario())
+        self.assertEqual(limitador.estadisticas()["rechazados"], 1)
+
+
+@ESTATICOS_SIN_MANIFIESTO
+class EvaluacionesCompletasTests(TestCase):
+    """Completa = cumplimiento no vacío en todas las conductas y objetivos del catálogo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.periodo = Periodo.objects.create(name="2025", anio=2025)
+        cls.objetivo, cls.conducta = crear_catalogo()
+        cls.otro_objetivo = Objetivo.objects.create(objetivo="Titulación")
+
+    def completas(self):
+        return set(evaluaciones_completas(Evaluacion.objects.all()).values_list("id", flat=True))
+
+    def responder(self, evaluacion, conducta="4", objetivos=("4", "4")):
+        RespuestaConducta.objects.create(evaluacion=evaluacion, conducta=self.conducta, cumplimiento=conducta)
+        for objetivo, cumplimiento in zip((self.objetivo, self.otro_objetivo), objetivos):
+            RespuestaObjetivo.objects.create(evaluacion=evaluacion, objetivo=objetivo, cumplimiento=cumplimiento)
+
+    def test_completa(self):
+        evaluacion, = crear_evaluaciones(self.periodo, 1)
+        self.responder(evaluacion)
+        self.assertEqual(self.completas(), {evaluacion.id})
+
+    def test_faltan_respuestas(self):
+        sin_respuestas, sin_un_objetivo, sin_conducta = crear_evaluaciones(self.periodo, 3)
+        self.responder(sin_un_objetivo, objetivos=("4",))
+        RespuestaObjetivo.objects.create(evaluacion=sin_conducta, objetivo=self.objetivo, cumplimiento="4")
+        RespuestaObjetivo.objects.create(evaluacion=sin_conducta, objetivo=self.otro_objetivo, cumplimiento="4")
+        self.assertEqual(self.completas(), set())
+
+    def test_cumplimiento_vacio_no_cuenta(self):
+        objetivo_vacio, conducta_vacia = crear_evaluaciones(self.periodo, 2)
+        self.responder(objetivo_vacio, objetivos=("4", ""))
+        self.responder(conducta_vacia, conducta="")
+        self.assertEqual(self.completas(), set())
+
+    def test_abrir_con_respuestas_crea_vacias(self):
+        Coordinador.objects.create(nombre_completo="Nueva")
+        nuevo = Periodo.objects.create(name="2026", anio=2026)
+        self.assertEqual(abrir_periodo(nuevo, con_respuestas=True), 1)
+        evaluacion = Evaluacion.objects.get(periodo=nuevo)
+        self.assertEqual(
+            sorted(evaluacion.resp_objetivos.values_list("objetivo_id", "cumplimiento")),
+            [(self.objetivo.id, ""), (self.otro_objetivo.id, "")],
+        )
+        self.assertEqual(list(evaluacion.resp_conductas.values_list("cumplimiento", flat=True)), [""])
+        self.assertEqual(self.completas(), set())
+
+
+class CierrePeriodoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.periodo = Periodo.objects.create(name="2025", anio=2025)
+        cls.objetivo, cls.conducta = crear_catalogo()
+        cls.completas = crear_evaluaciones(cls.periodo, 2, cls.objetivo, cls.conducta)
+        cls.incompleta, = crear_evaluaciones(cls.periodo, 1, conducta=cls.conducta)
+
+    def cerrar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse("cerrar_periodo", args=[self.periodo.id]))
+
+    def test_cierra_las_completas_con_snapshot_y_tareas(self):
+        response = self.cerrar()
+        self.assertRedirects(
+            response, f"{reverse('dashboard_gestion')}?periodo={self.periodo.id}", fetch_redirect_response=False
+        )
+        self.assertEqual(
+            set(Evaluacion.objects.filter(cerrada=True).values_list("id", flat=True)), {e.id for e in self.completas}
+        )
+        # Snapshot en lote con el acta al momento del cierre
+        documentos = ActaSnapshot.objects.order_by("evaluacion_id").values_list("documento", flat=True)
+        self.assertEqual([(d["score"], d["cerrada"]) for d in documentos], [(4.0, True), (4.0, True)])
+        self.assertEqual(Tarea.objects.filter(tipo="generar_acta_pdf").count(), 2)
+        self.assertEqual(Tarea.objects.filter(tipo="precalentar_periodo").count(), 1)
+        # Queda una abierta: el periodo sigue abierto
+        self.assertEqual(Periodo.objects.get(id=self.periodo.id).estado, Periodo.ABIERTO)
+
+        RespuestaObjetivo.objects.create(evaluacion=self.incompleta, objetivo=self.objetivo, cumplimiento="3")
+        self.cerrar()
+        self.assertEqual(Periodo.objects.get(id=self.periodo.id).estado, Periodo.CERRADO)
+        self.assertEqual(ActaSnapshot.objects.count(), 3)
+
+    def test_sin_tareas_si_el_cierre_se_revierte(self):
+        with self.captureOnCommitCallbacks() as callbacks, self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                cerrar_periodo(self.periodo)
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertFalse(Tarea.objects.exists())
+        self.assertFalse(Evaluacion.objects.filter(cerrada=True).exists())
+
+
+class ActaSnapshotTests(TestCase):
+    """El acta de una evaluación cerrada sale de su snapshot, y solo mientras siga cerrada."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.periodo = Periodo.objects.create(name="2025", anio=2025)
+        cls.objetivo, cls.conducta = crear_catalogo()
+        cls.evaluacion, = crear_evaluaciones(cls.periodo, 1, cls.objetivo, cls.conducta)
+
+    def acta(self):
+        return self.client.get(reverse("acta_evaluacion", args=[self.evaluacion.id]), {"format": "json"}).json()
+
+    def test_cerrada_no_cambia_con_el_catalogo(self):
+        cerrar_evaluaciones(Evaluacion.objects.filter(id=self.evaluacion.id))
+        antes = self.acta()
+        Objetivo.objects.filter(id=self.objetivo.id).update(objetivo="Titulación oportuna", ponderacion=80)
+        RespuestaObjetivo.objects.filter(evaluacion=self.evaluacion).update(cumplimiento="1")
+
+        despues = self.acta()
+        self.assertEqual(despues, antes)
+        self.assertEqual(
+            [(f["texto"], f["ponderacion"]) for f in despues["objetivos"]], [("Retención", 0)]
+        )
+
+    def test_reabrir_y_volver_a_cerrar(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+        cerrar_evaluaciones(Evaluacion.objects.filter(id=self.evaluacion.id))
+        self.assertEqual(self.acta()["score"], 4.0)
+
+        # Reabierta desde el admin: se descartan snapshot y PDF
+        self.evaluacion.refresh_from_db()
+        self.evaluacion.acta_pdf.save("acta.pdf", ContentFile(b"%PDF viejo"), save=True)
+        nombre_pdf = self.evaluacion.acta_pdf.name
+        self.evaluacion.cerrada = False
+        EvaluacionAdmin(Evaluacion, admin.site).save_model(
+            None, self.evaluacion, SimpleNamespace(changed_data=["cerrada"]), True
+        )
+        self.assertFalse(ActaSnapshot.objects.filter(evaluacion=self.evaluacion).exists())
+        self.assertFalse(default_storage.exists(nombre_pdf))
+
+        RespuestaConducta.objects.filter(evaluacion=self.evaluacion).update(cumplimiento="5")
+        RespuestaObjetivo.objects.filter(evaluacion=self.evaluacion).update(cumplimiento="5")
+        Evaluacion.objects.filter(id=self.evaluacion.id).update(fortalezas="NUEVO")
+        acta = self.acta()
+        self.assertEqual((acta["score"], acta["fortalezas"], acta["cerrada"]), (5.0, "NUEVO", False))
+
+        cerrar_evaluaciones(Evaluacion.objects.filter(id=self.evaluacion.id))
+        acta = self.acta()
+        self.assertEqual((acta["score"], acta["fortalezas"], acta["cerrada"]), (5.0, "NUEVO", True))
+
+    def test_snapshot_de_reabierta_no_se_usa(self):
+        cerrar_evaluaciones(Evaluacion.objects.filter(id=self.evaluacion.id))
+        # Reabierta sin pasar por el admin: el snapshot queda, pero el acta se arma en vivo
+        Evaluacion.objects.filter(id=self.evaluacion.id).update(cerrada=False, fortalezas="NUEVO")
+        self.assertEqual(self.acta()["fortalezas"], "NUEVO")
+
+        cerrar_evaluaciones(Evaluacion.objects.filter(id=self.evaluacion.id))
+        self.assertEqual(ActaSnapshot.objects.get(evaluacion=self.evaluacion).documento["fortalezas"], "NUEVO")
+
+
+@ESTATICOS_SIN_MANIFIESTO
+class ActaFormatosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.periodo = Periodo.objects.create(name="2025", anio=2025)
+        objetivo, conducta = crear_catalogo()
+        cls.evaluacion, cls.abierta = crear_evaluaciones(cls.periodo, 2, objetivo, conducta)
+        cerrar_evaluaciones(Evaluacion.objects.filter(id=cls.evaluacion.id))
+
+    def get(self, formato):
+        return self.client.get(reverse("acta_evaluacion", args=[self.evaluacion.id]), {"format": formato})
+
+    def test_content_type_y_nombre_de_archivo(self):
+        numero = cargar_acta(self.evaluacion).numero_acta
+        for formato, content_type in (
+            ("html", "text/html; charset=utf-8"),
+            ("json", "application/json"),
+            ("txt", "text/plain; charset=utf-8"),
+        ):
+            with self.subTest(formato):
+                response = self.get(formato)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Type"], content_type)
+                if formato != "html":
+                    self.assertEqual(
+                        response["Content-Disposition"], f'inline; filename="acta_{numero}.{formato}"'
+                    )
+        self.assertNotIn("Content-Disposition", self.get("html"))
+        self.assertIn("Resultado (1–5): 4.00", self.get("txt").content.decode())
+
+    def test_json_ida_y_vuelta(self):
+        datos = self.get("json").json()
+        acta = ActaData.from_dict(datos)
+        # as_dict() deja tuplas donde JSON trae listas: se compara ya serializado
+        self.assertEqual(json.loads(json.dumps(acta.as_dict())), datos)
+        self.assertEqual(acta, acta_desde_snapshot(ActaSnapshot.objects.get(evaluacion=self.evaluacion)))
+        self.assertEqual(
+            (acta.coordinador, acta.score, acta.cerrada), (self.evaluacion.coordinador.nombre_completo, 4.0, True)
+        )
+
+    def test_formato_desconocido_404(self):
+        self.assertEqual(self.get("xml").status_code, 404)
+
+    def test_anio_del_periodo_en_el_encabezado(self):
+        periodo = Periodo.objects.create(name="Coordinadores", anio=2027)
+        evaluacion, = crear_evaluaciones(periodo, 1)
+        url = reverse("acta_evaluacion", args=[evaluacion.id])
+        self.assertContains(self.client.get(url), "Evaluación de Desempeño Coordinador 2027")
+        self.assertIn("Coordinador 2027", self.client.get(url, {"format": "txt"}).content.decode())
+
+        # Snapshots anteriores sin año: el de la fecha de la evaluación
+        datos = cargar_acta(evaluacion).as_dict()
+        del datos["anio"]
+        self.assertEqual(ActaData.from_dict(datos).anio, evaluacion.fecha_creacion.year)
+
+    def test_exportar_actas(self):
+        salida = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, salida, ignore_errors=True)
+        texto = io.StringIO()
+        call_command(
+            "exportar_actas", str(self.periodo.id), "--formato", "json", "txt", "--solo-cerradas",
+            "--salida", salida, stdout=texto,
+        )
+        numero = cargar_acta(self.evaluacion).numero_acta
+        self.assertEqual(sorted(os.listdir(salida)), [f"acta_{numero}.json", f"acta_{numero}.txt"])
+        with open(os.path.join(salida, f"acta_{numero}.json"), encoding="utf-8") as f:
+            self.assertEqual(ActaData.from_dict(json.load(f)).evaluacion_id, self.evaluacion.id)
+        self.assertIn("Actas: 1", texto.getvalue())
+
+        call_command("exportar_actas", str(self.periodo.id), "--formato", "json", "--salida", salida, stdout=texto)
+        self.assertEqual(len([n for n in os.listdir(salida) if n.endswith(".json")]), 2)
+        with self.assertRaises(CommandError):
+            call_command("exportar_actas", str(self.periodo.id + 99), "--salida", salida)
+
+
+class SeedEvaluacionTests(TestCase):
+    def test_carga_y_es_idempotente(self):
+        for _ in range(2):
+            call_command("seed_evaluacion", stdout=io.StringIO())
+        periodo = Periodo.objects.get()
+        self.assertEqual((periodo.anio, periodo.estado), (2025, Periodo.ABIERTO))
+        self.assertEqual(Coordinador.objects.count(), 2)
+        evaluacion = Evaluacion.objects.get()
+        self.assertEqual(evaluacion.resp_objetivos.count(), 5)
+        self.assertEqual(cargar_acta(evaluacion).anio, 2025)
+
+
+class PeriodoEstructuradoMigracionTests(TestCase):
+    def test_desde_nombres(self):
+        migracion = importlib.import_module("atencion.migrations.0008_periodo_estructurado")
+        abierto = Periodo.objects.create(name="Evaluación Coordinador 2024", anio=2030)
+        cerrado = Periodo.objects.create(name="Cierre 2023", anio=2030)
+        sin_anio = Periodo.objects.create(name="Piloto", anio=2030)
+        una_cerrada, _ = crear_evaluaciones(abierto, 2)
+        crear_evaluaciones(cerrado, 2)
+        Evaluacion.objects.filter(periodo=cerrado).update(cerrada=True)
+        Evaluacion.objects.filter(id=una_cerrada.id).update(cerrada=True)
+
+        migracion.desde_nombres(apps, SimpleNamespace(connection=connection))
+
+        abierto, cerrado, sin_anio = (Periodo.objects.get(id=p.id) for p in (abierto, cerrado, sin_anio))
+        self.assertEqual(
+            (abierto.anio, abierto.fecha_inicio, abierto.fecha_fin, abierto.estado),
+            (2024, date(2024, 1, 1), date(2024, 12, 31), Periodo.ABIERTO),
+        )
+        self.assertEqual((cerrado.anio, cerrado.estado), (2023, Periodo.CERRADO))
+        # Sin año en el nombre conserva el suyo; sin evaluaciones no se cierra
+        self.assertEqual(
+            (sin_anio.anio, sin_anio.fecha_inicio, sin_anio.estado), (2030, date(2030, 1, 1), Periodo.ABIERTO)
+        )
+
+
+class ActaPDFTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        periodo = Periodo.objects.create(name="2025", anio=2025)
+        objetivo, conducta = crear_catalogo()
+        cls.evaluacion, = crear_evaluaciones(periodo, 1, objetivo, conducta)
+
+    def url(self):
+        return reverse("acta_evaluacion", args=[self.evaluacion.id]) + "?format=pdf"
+
+    def test_pdf(self):
+        response = self.client.get(self.url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(response.content.startswith(b"%PDF"))
+        self.assertGreaterEqual(self.client.get(reverse("metricas_pdf")).json()["completados"], 1)
+
+    def test_saturado_503_con_retry_after(self):
+        saturado = mock.Mock(ejecutar=mock.AsyncMock(side_effect=Saturado(7)))
+        with mock.patch("atencion.views.get_limitador", return_value=saturado):
+            response = self.client.get(self.url())
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "7")
+
+
+class CoalescenciaTests(SimpleTestCase):
+    def setUp(self):
+        self.llamadas = 0
+
+    async def calcular(self, valor, demora=0.05):
+        self.llamadas += 1
+        await asyncio.sleep(demora)
+        return valor
+
+    async def varios(self, n, fn, *args):
+        return await asyncio.gather(*(acompartido("clave", fn, *args) for _ in range(n)), return_exceptions=True)
+
+    def test_un_calculo_para_todos(self):
+        self.assertEqual(asyncio.run(self.varios(5, self.calcular, 42)), [42] * 5)
+        self.assertEqual(self.llamadas, 1)
+        # No es una caché: terminado el vuelo se vuelve a calcular
+        asyncio.run(acompartido("clave", self.calcular, 1))
+        self.assertEqual(self.llamadas, 2)
+
+    def test_error_del_lider_llega_a_todos(self):
+        async def falla():
+            self.llamadas += 1
+            await asyncio.sleep(0.05)
+            raise ValueError("sin datos")
+
+        resultados = asyncio.run(self.varios(3, falla))
+        self.assertTrue(all(isinstance(r, ValueError) for r in resultados))
+        self.assertEqual(self.llamadas, 1)
+
+    def test_cancelar_al_lider_no_cancela_a_los_demas(self):
+        async def escenario():
+            lider = asyncio.ensure_future(acompartido("clave", self.calcular, "ok", 0.2))
+            await asyncio.sleep(0.01)
+            seguidores = asyncio.gather(*(acompartido("clave", self.calcular, "ok", 0.05) for _ in range(3)))
+            await asyncio.sleep(0.01)
+            lider.cancel()
+            return await seguidores, lider.cancelled()
+
+        resultados, cancelado = asyncio.run(escenario())
+        self.assertEqual(resultados, ["ok"] * 3)
+        self.assertTrue(cancelado)
+        # El líder cancelado + un solo seguidor promovido a líder
+        self.assertEqual(self.llamadas, 2)
+
+    @override_settings(COALESCENCIA_ESPERA_MAX=0.05)
+    def test_seguidor_que_espera_demasiado_calcula_por_su_cuenta(self):
+        async def escenario():
+            lento = asyncio.ensure_future(acompartido("clave", self.calcular, "lento", 0.3))
+            await asyncio.sleep(0.01)
+            propio = await acompartido("clave", self.calcular, "propio", 0)
+            return propio, await lento
+
+        self.assertEqual(asyncio.run(escenario()), ("propio", "lento"))
+        self.assertEqual(self.llamadas, 2)
+
+    def test_sin_cache_compartida_no_usa_la_cache(self):
+        self.assertFalse(cache_compartida())
+        with mock.patch("atencion.coalescencia.cache") as cache:
+            self.assertEqual(asyncio.run(self.varios(2, self.calcular, 1)), [1, 1])
+        cache.aadd.assert_not_called()
+
+    def test_con_cache_compartida(self):
+        with tempfile.TemporaryDirectory() as directorio, override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directorio},
+        }):
+            self.assertTrue(cache_compartida())
+            self.assertEqual(asyncio.run(self.varios(3, self.calcular, {"filas": [1]})), [{"filas": [1]}] * 3)
+        self.assertEqual(self.llamadas, 1)
@@ -10,13 +10,62 @@ urlpatterns = [
         name="crear_evaluacion"
     ),
 
+    # Crea de una vez las evaluaciones de todos los coordinadores activos (POST)
+    path(
+        "periodo/<int:periodo_id>/abrir/",
+        views.abrir_periodo_view,
+        name="abrir_periodo"
+    ),
+
+    # Cierra todas las evaluaciones completas del periodo (POST)
+    path(
+        "periodo/<int:periodo_id>/cerrar/",
+        views.cerrar_periodo_view,
+        name="cerrar_periodo"
+    ),
+
     path(
         "evaluacion/<int:evaluacion_id>/",
         views.evaluacion_detalle,
         name="evaluacion_detalle"
     ),
 
-    # ✅ ACTA HTML
+    # Autoguardado de campos sueltos del formulario (JSON)
+    path(
+        "evaluacion/<int:evaluacion_id>/autoguardar/",
+        views.autoguardar_evaluacion,
+        name="autoguardar_evaluacion"
+    ),
+
+    # Búsqueda de texto completo en comentarios de evaluaciones
+    path(
+        "buscar/",
+        views.buscar_comentarios_view,
+        name="buscar_comentarios"
+    ),
+
+    # Typeahead de coordinadores (JSON)
+    path(
+        "coordinadores/buscar/",
+        views.buscar_coordinadores_view,
+        name="buscar_coordinadores"
+    ),
+
+    # Estado de una tarea en cola (JSON para polling)
+    path(
+        "tareas/<int:tarea_id>/",
+        views.estado_tarea,
+        name="estado_tarea"
+    ),
+
+    # Limitador de PDFs: renders en curso, rechazos y espera en cola (JSON)
+    path(
+        "metricas/pdf/",
+        views.metricas_pdf,
+        name="metricas_pdf"
+    ),
+
+    # ✅ ACTA HTML (y PDF con ?format=pdf)
     path(
         "acta/<int:evaluacion_id>/",
         views.acta_evaluacion,
@@ -1,19 +1,15 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.utils import timezone
 from django.contrib import messages
-from django.db.models import Avg
-from django.http import HttpResponse
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Q
+from django.http import Http404, FileResponse, HttpResponse, JsonResponse
+from django.views.decorators.http import require_http_methods, require_POST
 
-from io import BytesIO
-import re
-
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.units import mm
-from reportlab.lib import colors
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-)
-from reportlab.lib.styles import getSampleStyleSheet
+import hashlib
+import json
+from urllib.parse import urlencode
 
 from .models import (
     Coordinador,
@@ -23,154 +19,83 @@ from .models import (
     Objetivo,
     RespuestaConducta,
     RespuestaObjetivo,
+    Tarea,
+    ActaSnapshot,
+    normalizar_nombre,
 )
+from .puntajes import (
+    calcular_score,
+    equivalente_0_120,
+    nivel_desempeno,
+    score_desde_respuestas,
+)
+from .tareas import encolar
+from .periodos import abrir_periodo, cerrar_periodo
+from .busqueda import CAMPOS_COMENTARIO, buscar_comentarios, buscar_coordinadores
+from .actas import RENDERERS, acargar_acta, acta_desde_snapshot, crear_snapshots, respuesta_acta
+from .coalescencia import acompartido
+from .limitador import Saturado, get_limitador
+from .replicas import solo_lectura
+from .sedes import TODAS, aen_cada_sede, atomico, en_cada_sede, q_sede, sede_actual, sedes
 
 
-# -------- Helpers: detectar campo de puntaje real --------
-
-def _score_field(model_cls, preferred=("puntaje", "cumplimiento", "score", "valor")):
-    """
-    Retorna el nombre del campo real para puntaje en un modelo.
-    En tu caso, RespuestaConducta/RespuestaObjetivo tienen "cumplimiento" (CharField),
-    así que lo usa como valor.
-    """
-    field_names = {f.name for f in model_cls._meta.get_fields() if hasattr(f, "name")}
-    for n in preferred:
-        if n in field_names:
-            return n
-    return None
-
-
-RESP_COND_FIELD = _score_field(RespuestaConducta, preferred=("puntaje", "cumplimiento", "score", "valor"))
-RESP_OBJ_FIELD  = _score_field(RespuestaObjetivo, preferred=("puntaje", "cumplimiento", "score", "valor"))
-
-
-def _promedio_respuestas(qs, field_name):
-    if not field_name:
-        return None
-    # Si es CharField (como "cumplimiento"), promediamos manualmente convirtiendo a float cuando se pueda.
-    vals = []
-    for r in qs:
-        v = getattr(r, field_name, None)
-        if v is None:
-            continue
-        s = str(v).strip()
-        try:
-            vals.append(float(s))
-        except Exception:
-            continue
-    if not vals:
-        return None
-    return sum(vals) / len(vals)
-
-
-def _calcular_score(evaluacion: Evaluacion):
-    """
-    Promedio simple: promedio conductas + promedio objetivos.
-    """
-    prom_c = _promedio_respuestas(
-        RespuestaConducta.objects.filter(evaluacion=evaluacion),
-        RESP_COND_FIELD
-    )
-    prom_o = _promedio_respuestas(
-        RespuestaObjetivo.objects.filter(evaluacion=evaluacion),
-        RESP_OBJ_FIELD
-    )
-
-    vals = [v for v in [prom_c, prom_o] if v is not None]
-    if not vals:
-        return None
-    return sum(vals) / len(vals)
-
-
-def _equivalente_0_120(score_1_5):
-    """
-    Convierte score 1–5 a equivalente 0–120:
-    1.0 -> 24
-    5.0 -> 120
-    (lineal)
-    """
-    if score_1_5 is None:
-        return None
-    try:
-        s = float(score_1_5)
-    except Exception:
-        return None
-    return (s / 5.0) * 120.0
-
-
-def _nivel_desempeno(equiv_0_120):
+def _filas_catalogo(catalogo, respuestas):
     """
-    Rangos (números):
-    - No logrado: 0 - 79.9999
-    - Parcialmente logrado: 80 - 95.9999
-    - Esperado: 96 - 109.9999
-    - Destacado: 110 - 120
+    Empareja cada ítem del catálogo con su respuesta (o None).
+    La plantilla itera `{% for item, resp in filas %}` sin lookups por fila.
     """
-    if equiv_0_120 is None:
-        return ("Sin datos", "gris")
+    return [(item, respuestas.get(item.id)) for item in catalogo]
 
-    e = float(equiv_0_120)
 
-    if e < 80:
-        return ("No logrado", "rojo")
-    if 80 <= e < 96:
-        return ("Parcialmente logrado", "amarillo")
-    if 96 <= e < 110:
-        return ("Esperado", "verde")
-    return ("Destacado", "azul")
+# Valores posibles de cumplimiento (strings, igual que RespuestaX.cumplimiento)
+OPCIONES_CUMPLIMIENTO = ("1", "2", "3", "4", "5")
 
+LIMITE_BUSQUEDA = 50
+LIMITE_TYPEAHEAD = 10
 
-def _anio_desde_periodo(periodo_name: str):
-    if not periodo_name:
-        return timezone.now().year
-    m = re.search(r"(20\d{2})", periodo_name)
-    if m:
-        try:
-            return int(m.group(1))
-        except Exception:
-            pass
-    return timezone.now().year
-
-
-def _numero_acta(evaluacion: Evaluacion):
-    """
-    Número de acta automático:
-    ACTA-ARICA-COORD-<AÑO>-<ID 4 dígitos>
-    """
-    anio = _anio_desde_periodo(getattr(evaluacion.periodo, "name", ""))
-    return f"ACTA-ARICA-COORD-{anio}-{evaluacion.id:04d}"
+DASHBOARD_CACHE_SEGUNDOS = 15 * 60
 
 
 # -------- Views --------
 
-def dashboard_gestion(request):
-    periodos = Periodo.objects.all().order_by("-id")
-
-    periodo_id = request.GET.get("periodo")
-    periodo_sel = None
-    if periodo_id:
-        try:
-            periodo_sel = Periodo.objects.get(id=int(periodo_id))
-        except (ValueError, Periodo.DoesNotExist):
-            periodo_sel = None
-
-    coordinadores = Coordinador.objects.filter(is_active=True).order_by("nombre_completo")
+async def _filas_dashboard(periodo_sel):
+    """Filas del panel para un periodo, en la base (y sede) activa. Retorna (filas, hay_coordinadores)."""
+    coordinadores_qs = Coordinador.objects.filter(q_sede(), is_active=True).order_by("nombre_completo")
+    if periodo_sel:
+        # Promedio KPI mensual (desempenho) del mismo año, en la misma consulta
+        coordinadores_qs = coordinadores_qs.annotate(
+            kpi_promedio=Avg(
+                "kpi_evaluations__total_score",
+                filter=Q(kpi_evaluations__period__anio=periodo_sel.anio),
+            )
+        )
+    coordinadores = [c async for c in coordinadores_qs]
 
     eval_por_coord = {}
+    resp_c_por_eval = {}
+    resp_o_por_eval = {}
     if periodo_sel:
         qs = Evaluacion.objects.filter(periodo=periodo_sel).select_related("coordinador", "periodo")
-        for e in qs:
+        async for e in qs:
             eval_por_coord[e.coordinador_id] = e
 
+        # Respuestas de todo el periodo en 2 consultas (no 2 por fila)
+        async for r in RespuestaConducta.objects.filter(evaluacion__periodo=periodo_sel):
+            resp_c_por_eval.setdefault(r.evaluacion_id, []).append(r)
+        async for r in RespuestaObjetivo.objects.filter(evaluacion__periodo=periodo_sel):
+            resp_o_por_eval.setdefault(r.evaluacion_id, []).append(r)
+
     filas = []
     if periodo_sel:
         for c in coordinadores:
             e = eval_por_coord.get(c.id)
             if e:
-                score = _calcular_score(e)
-                equivalente = _equivalente_0_120(score)
-                nivel, nivel_color = _nivel_desempeno(equivalente)
+                score = score_desde_respuestas(
+                    resp_c_por_eval.get(e.id, []),
+                    resp_o_por_eval.get(e.id, []),
+                )
+                equivalente = equivalente_0_120(score)
+                nivel, nivel_color = nivel_desempeno(equivalente)
                 accion = ("ver", e.id)
             else:
                 score = None
@@ -181,21 +106,113 @@ def dashboard_gestion(request):
             filas.append(
                 {
                     "coordinador": c,
+                    "periodo": periodo_sel,
+                    "kpi_promedio": c.kpi_promedio,
                     "evaluacion": e,
                     "score": score,
                     "equivalente": equivalente,
                     "nivel": nivel,
                     "nivel_color": nivel_color,
                     "accion": accion,
+                    "qs_sede": "",
                 }
             )
+    return filas, bool(coordinadores)
+
+
+async def _clave_dashboard(periodo):
+    # Marca: evaluaciones del periodo (cantidad y última modificación),
+    # coordinadores activos y evaluaciones KPI del año (kpi_promedio). Se lee
+    # de la misma base que las filas: una réplica atrasada da la marca vieja,
+    # no las filas viejas bajo la marca nueva.
+    evaluaciones = await Evaluacion.objects.filter(q_sede("coordinador__sede"), periodo=periodo).aaggregate(
+        n=Count("id"), ultima=Max("fecha_actualizacion")
+    )
+    coordinadores = await Coordinador.objects.filter(q_sede(), is_active=True).aaggregate(
+        n=Count("id", distinct=True),
+        ultimo=Max("id"),
+        kpi=Max("kpi_evaluations__updated_at", filter=Q(kpi_evaluations__period__anio=periodo.anio)),
+    )
+    # Los ids de periodo se repiten entre bases de sedes distintas: la sede va en la clave
+    return "dashboard_gestion:{}:{}:{}:{}:{}:{}:{}".format(
+        sede_actual() or "",
+        periodo.id,
+        evaluaciones["n"],
+        evaluaciones["ultima"].timestamp() if evaluaciones["ultima"] else 0,
+        coordinadores["n"],
+        coordinadores["ultimo"] or 0,
+        coordinadores["kpi"].timestamp() if coordinadores["kpi"] else 0,
+    )
+
+
+async def filas_dashboard(periodo):
+    """
+    Filas del panel desde la caché, o calculadas (una vez entre requests
+    concurrentes) y cacheadas. La clave cambia al guardar o cerrar una
+    evaluación del periodo; lo que no la cambia (p. ej. renombrar a un
+    coordinador) se ve al vencer DASHBOARD_CACHE_SEGUNDOS. También la usa el
+    precalentamiento (atencion.precalentar).
+    """
+    if periodo is None:
+        return await _filas_dashboard(None)
+    clave = await _clave_dashboard(periodo)
+    filas = await cache.aget(clave)
+    if filas is None:
+        filas = await acompartido(clave, _filas_dashboard, periodo)
+        await cache.aset(clave, filas, DASHBOARD_CACHE_SEGUNDOS)
+    return filas
+
+
+@solo_lectura
+async def _filas_compartidas(periodo):
+    return await filas_dashboard(periodo)
+
+
+async def dashboard_gestion(request):
+    # Los periodos mensuales son de las evaluaciones KPI (desempenho)
+    periodos = [p async for p in Periodo.objects.filter(mes__isnull=True)]
+
+    periodo_id = request.GET.get("periodo")
+    periodo_sel = None
+    if periodo_id:
+        try:
+            periodo_sel = await Periodo.objects.aget(id=int(periodo_id))
+        except (ValueError, Periodo.DoesNotExist):
+            periodo_sel = None
+
+    todas = request.sede == TODAS
+    if todas and periodo_sel:
+        # Entre sedes: el mismo periodo (año y nombre) en la base de cada sede
+        async def filas_sede():
+            periodo = await Periodo.objects.filter(
+                anio=periodo_sel.anio, name=periodo_sel.name, mes__isnull=True
+            ).afirst()
+            return await _filas_compartidas(periodo) if periodo else ([], False)
+
+        filas, hay_coordinadores = [], False
+        for sede, (filas_de_sede, hay) in await aen_cada_sede(filas_sede):
+            # Copias: las filas calculadas son compartidas con otros requests
+            # "sede" es la del coordinador: en OTRAS cada uno trae la suya
+            filas += [
+                {**f, "sede": f["coordinador"].sede, "qs_sede": urlencode({"sede": sede})} for f in filas_de_sede
+            ]
+            hay_coordinadores = hay_coordinadores or hay
+        filas.sort(key=lambda f: f["coordinador"].nombre_normalizado)
+    else:
+        filas, hay_coordinadores = await _filas_compartidas(periodo_sel)
 
     ctx = {
         "periodos": periodos,
         "periodo_sel": periodo_sel,
         "filas": filas,
         "hay_periodo": bool(periodo_sel),
-        "hay_coordinadores": coordinadores.exists(),
+        "hay_coordinadores": hay_coordinadores,
+        "sedes": list(sedes()),
+        "sede_sel": request.sede,
+        "todas_las_sedes": todas,
+        # Abrir/cerrar periodo es por sede: en modo "todas" el panel es solo lectura
+        "faltan_evaluaciones": 0 if todas else sum(1 for f in filas if f["evaluacion"] is None),
+        "hay_abiertas": not todas and any(f["evaluacion"] and not f["evaluacion"].cerrada for f in filas),
     }
     return render(request, "dashboard_list.html", ctx)
 
@@ -215,6 +232,40 @@ def crear_evaluacion(request, coordinador_id: int, periodo_id: int):
     return redirect("evaluacion_detalle", evaluacion_id=evaluacion.id)
 
 
+def _rechazar_todas(request, periodo_id):
+    """Abrir/cerrar un periodo es por sede: en modo "todas" se rechaza sin tocar nada."""
+    messages.error(request, "Elige una sede para abrir o cerrar el periodo.")
+    return redirect(f"{reverse('dashboard_gestion')}?periodo={periodo_id}")
+
+
+@require_POST
+def abrir_periodo_view(request, periodo_id: int):
+    if request.sede == TODAS:
+        return _rechazar_todas(request, periodo_id)
+    periodo = get_object_or_404(Periodo, id=periodo_id)
+    creadas = abrir_periodo(periodo, con_respuestas=bool(request.POST.get("con_respuestas")))
+    if creadas:
+        messages.success(request, f"Periodo abierto: {creadas} evaluaciones creadas.")
+    else:
+        messages.info(request, "Todos los coordinadores activos ya tienen evaluación en este periodo.")
+    return redirect(f"{reverse('dashboard_gestion')}?periodo={periodo.id}")
+
+
+@require_POST
+def cerrar_periodo_view(request, periodo_id: int):
+    if request.sede == TODAS:
+        return _rechazar_todas(request, periodo_id)
+    periodo = get_object_or_404(Periodo, id=periodo_id)
+    cerradas, incompletas = cerrar_periodo(periodo)
+    if cerradas:
+        messages.success(request, f"Evaluaciones cerradas: {cerradas}. Las actas PDF se están generando.")
+    if incompletas:
+        messages.warning(request, f"{incompletas} evaluaciones siguen abiertas por tener respuestas pendientes.")
+    if not cerradas and not incompletas:
+        messages.info(request, "No hay evaluaciones abiertas en este periodo.")
+    return redirect(f"{reverse('dashboard_gestion')}?periodo={periodo.id}")
+
+
 def evaluacion_detalle(request, evaluacion_id: int):
     evaluacion = get_object_or_404(Evaluacion, id=evaluacion_id)
     coordinador = evaluacion.coordinador
@@ -280,19 +331,23 @@ def evaluacion_detalle(request, evaluacion_id: int):
         evaluacion.retroalimentacion = request.POST.get("retroalimentacion", "").strip()
         evaluacion.save()
 
-        # Cerrar evaluación
+        # Cerrar evaluación: score y PDF del acta quedan en cola (procesar_tareas)
         if request.POST.get("accion") == "cerrar":
-            evaluacion.cerrada = True
-            evaluacion.save(update_fields=["cerrada"])
-            messages.success(request, "Evaluación cerrada. Ya no se puede editar.")
+            with atomico():
+                evaluacion.cerrada = True
+                evaluacion.save(update_fields=["cerrada", "fecha_actualizacion"])
+                crear_snapshots(Evaluacion.objects.filter(id=evaluacion.id))
+            encolar("recalcular_score", evaluacion_id=evaluacion.id)
+            encolar("generar_acta_pdf", evaluacion_id=evaluacion.id)
+            messages.success(request, "Evaluación cerrada. Ya no se puede editar. El acta PDF se está generando.")
         else:
             messages.success(request, "Cambios guardados correctamente.")
 
         return redirect("evaluacion_detalle", evaluacion_id=evaluacion.id)
 
-    score = _calcular_score(evaluacion)
-    equivalente = _equivalente_0_120(score)
-    nivel, nivel_color = _nivel_desempeno(equivalente)
+    score = calcular_score(evaluacion)
+    equivalente = equivalente_0_120(score)
+    nivel, nivel_color = nivel_desempeno(equivalente)
 
     ctx = {
         "evaluacion": evaluacion,
@@ -302,202 +357,216 @@ def evaluacion_detalle(request, evaluacion_id: int):
         "equivalente": equivalente,
         "nivel": nivel,
         "nivel_color": nivel_color,
-        "conductas": conductas,
-        "objetivos": objetivos,
-        "resp_conductas": resp_conductas,
-        "resp_objetivos": resp_objetivos,
+        "filas_conductas": _filas_catalogo(conductas, resp_conductas),
+        "filas_objetivos": _filas_catalogo(objetivos, resp_objetivos),
+        "opciones": OPCIONES_CUMPLIMIENTO,
     }
     return render(request, "evaluacion_detalle.html", ctx)
 
 
-# ---------- ACTA (HTML + PDF) ----------
+# ---------- AUTOGUARDADO (un campo por petición) ----------
 
-def acta_evaluacion(request, evaluacion_id: int):
-    evaluacion = get_object_or_404(Evaluacion, id=evaluacion_id)
-    coordinador = evaluacion.coordinador
-    periodo = evaluacion.periodo
+def _guardar_respuesta(modelo, evaluacion, campo_fk, item_id, valor):
+    # UPDATE directo; solo si la fila no existía se hace el INSERT
+    filtro = {"evaluacion": evaluacion, campo_fk: item_id}
+    if not modelo.objects.filter(**filtro).update(cumplimiento=valor):
+        modelo.objects.create(cumplimiento=valor, **filtro)
 
-    conductas = ConductaSello.objects.all().order_by("id")
-    objetivos = Objetivo.objects.all().order_by("id")
 
-    resp_conductas_qs = RespuestaConducta.objects.filter(evaluacion=evaluacion).select_related("conducta")
-    resp_objetivos_qs = RespuestaObjetivo.objects.filter(evaluacion=evaluacion).select_related("objetivo")
+@require_http_methods(["POST", "PATCH"])
+def autoguardar_evaluacion(request, evaluacion_id: int):
+    """
+    Guarda solo los campos cambiados del formulario de evaluación.
+    Cuerpo JSON: {"conducta_3": "4"}, {"objetivo_7": ""} o {"fortalezas": "..."}.
+    Actualiza score_total y responde el score/nivel recalculados.
+    """
+    evaluacion = get_object_or_404(Evaluacion.objects.only("id", "cerrada"), id=evaluacion_id)
+    if evaluacion.cerrada:
+        return JsonResponse({"error": "La evaluación está cerrada y no se puede modificar."}, status=409)
 
-    resp_conductas = {r.conducta_id: r for r in resp_conductas_qs}
-    resp_objetivos = {r.objetivo_id: r for r in resp_objetivos_qs}
+    try:
+        cambios = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "JSON inválido."}, status=400)
+    if not isinstance(cambios, dict) or not cambios:
+        return JsonResponse({"error": "Se espera un objeto con al menos un campo."}, status=400)
+
+    respuestas, comentarios = [], {}
+    for campo, valor in cambios.items():
+        if not isinstance(valor, str):
+            return JsonResponse({"error": f"Valor inválido para {campo}."}, status=400)
+        valor = valor.strip()
+        if campo in CAMPOS_COMENTARIO:
+            comentarios[campo] = valor
+            continue
+        tipo, _, item_id = campo.partition("_")
+        if tipo not in ("conducta", "objetivo") or not item_id.isdigit():
+            return JsonResponse({"error": f"Campo desconocido: {campo}."}, status=400)
+        if valor and valor not in OPCIONES_CUMPLIMIENTO:
+            return JsonResponse({"error": f"Valor inválido para {campo}."}, status=400)
+        respuestas.append((tipo, int(item_id), valor))
+
+    for tipo, item_id, valor in respuestas:
+        catalogo = ConductaSello if tipo == "conducta" else Objetivo
+        if not catalogo.objects.filter(id=item_id).exists():
+            return JsonResponse({"error": f"No existe {tipo} {item_id}."}, status=400)
+
+    with atomico():
+        # Se vuelve a mirar `cerrada` con la fila bloqueada: si alguien cerró entre medio, no se escribe nada
+        abierta = Evaluacion.objects.select_for_update().filter(id=evaluacion.id, cerrada=False).exists()
+        if not abierta:
+            return JsonResponse({"error": "La evaluación está cerrada y no se puede modificar."}, status=409)
+        for tipo, item_id, valor in respuestas:
+            if tipo == "conducta":
+                _guardar_respuesta(RespuestaConducta, evaluacion, "conducta_id", item_id, valor)
+            else:
+                _guardar_respuesta(RespuestaObjetivo, evaluacion, "objetivo_id", item_id, valor)
 
-    score = _calcular_score(evaluacion)
-    equivalente = _equivalente_0_120(score)
-    nivel, nivel_color = _nivel_desempeno(equivalente)
-
-    numero_acta = _numero_acta(evaluacion)
-    fecha_firma = timezone.localdate()  # hoy (puedes cambiar a fecha_creacion si prefieres)
-
-    # Si piden PDF
-    if request.GET.get("format") == "pdf":
-        return _acta_pdf_response(
-            evaluacion=evaluacion,
-            coordinador=coordinador,
-            periodo=periodo,
-            score=score,
-            equivalente=equivalente,
-            nivel=nivel,
-            numero_acta=numero_acta,
-            fecha_firma=fecha_firma,
-            conductas=conductas,
-            objetivos=objetivos,
-            resp_conductas=resp_conductas,
-            resp_objetivos=resp_objetivos,
+        score = calcular_score(evaluacion)
+        Evaluacion.objects.filter(id=evaluacion.id).update(
+            score_total=score, fecha_actualizacion=timezone.now(), **comentarios
         )
 
-    # HTML
+    equivalente = equivalente_0_120(score)
+    nivel, nivel_color = nivel_desempeno(equivalente)
+    return JsonResponse(
+        {
+            "guardados": list(cambios),
+            "score": score,
+            "equivalente": equivalente,
+            "nivel": nivel,
+            "nivel_color": nivel_color,
+        }
+    )
+
+
+# ---------- BÚSQUEDA EN COMENTARIOS ----------
+
+@solo_lectura
+def buscar_comentarios_view(request):
+    q = (request.GET.get("q") or "").strip()
+    periodo_id = request.GET.get("periodo") or None
+    if periodo_id and not periodo_id.isdigit():
+        periodo_id = None
+
+    resultados = []
+    if q and request.sede == TODAS:
+        # Entre sedes: el periodo elegido se busca por año y nombre en la base de cada sede
+        periodo = Periodo.objects.filter(id=periodo_id).first() if periodo_id else None
+
+        def buscar_en_sede():
+            pid = None
+            if periodo:
+                pid = Periodo.objects.filter(anio=periodo.anio, name=periodo.name, mes__isnull=True).values_list(
+                    "id", flat=True
+                ).first()
+                if pid is None:
+                    return []
+            return buscar_comentarios(q, periodo_id=pid)
+
+        for sede, de_sede in en_cada_sede(buscar_en_sede):
+            resultados += [{**r, "qs_sede": urlencode({"sede": sede})} for r in de_sede]
+        resultados = sorted(resultados, key=lambda r: -r["rank"])[:LIMITE_BUSQUEDA]
+    elif q:
+        resultados = buscar_comentarios(q, periodo_id=periodo_id, limite=LIMITE_BUSQUEDA)
+
     ctx = {
-        "evaluacion": evaluacion,
-        "coordinador": coordinador,
-        "periodo": periodo,
-        "score": score,
-        "equivalente": equivalente,
-        "nivel": nivel,
-        "nivel_color": nivel_color,
-        "numero_acta": numero_acta,
-        "fecha_firma": fecha_firma,
-        "conductas": conductas,
-        "objetivos": objetivos,
-        "resp_conductas": resp_conductas,
-        "resp_objetivos": resp_objetivos,
+        "q": q,
+        "periodos": Periodo.objects.filter(mes__isnull=True),
+        "periodo_id": int(periodo_id) if periodo_id else None,
+        "resultados": resultados,
     }
-    return render(request, "acta_evaluacion.html", ctx)
-
-
-def _acta_pdf_response(
-    evaluacion,
-    coordinador,
-    periodo,
-    score,
-    equivalente,
-    nivel,
-    numero_acta,
-    fecha_firma,
-    conductas,
-    objetivos,
-    resp_conductas,
-    resp_objetivos,
-):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        leftMargin=15 * mm,
-        rightMargin=15 * mm,
-        topMargin=15 * mm,
-        bottomMargin=15 * mm,
-        title="Acta Evaluación Coordinador",
+    return render(request, "buscar_comentarios.html", ctx)
+
+
+@solo_lectura
+def buscar_coordinadores_view(request):
+    """Typeahead: ?q=texto[&activos=0] -> [{id, nombre, sede}, ...]."""
+    texto = request.GET.get("q", "")
+    solo_activos = request.GET.get("activos") != "0"
+    if request.sede == TODAS:
+        coordinadores = [c for _, de_sede in en_cada_sede(buscar_coordinadores, texto, solo_activos=solo_activos)
+                         for c in de_sede]
+        coordinadores = sorted(coordinadores, key=lambda c: normalizar_nombre(c.nombre_completo))[:LIMITE_TYPEAHEAD]
+    else:
+        coordinadores = buscar_coordinadores(texto, limite=LIMITE_TYPEAHEAD, solo_activos=solo_activos)
+    return JsonResponse(
+        {"resultados": [{"id": c.id, "nombre": c.nombre_completo, "sede": c.sede} for c in coordinadores]}
     )
 
-    styles = getSampleStyleSheet()
-    story = []
-
-    # Encabezado oficial
-    story.append(Paragraph("<b>INSTITUTO PROFESIONAL INACAP — SEDE ARICA</b>", styles["Title"]))
-    story.append(Paragraph(f"<b>Evaluación de Desempeño Coordinador 2025</b>", styles["Heading2"]))
-    story.append(Paragraph(f"<b>N° Acta:</b> {numero_acta}", styles["Normal"]))
-    story.append(Paragraph(f"<b>Fecha de firma:</b> {fecha_firma.strftime('%d-%m-%Y')}", styles["Normal"]))
-    story.append(Spacer(1, 8))
-
-    # Meta
-    meta_data = [
-        ["Coordinador evaluado:", coordinador.nombre_completo],
-        ["Periodo:", periodo.name],
-        ["Fecha evaluación:", evaluacion.fecha_creacion.strftime("%d-%m-%Y %H:%M")],
-        ["Resultado (1–5):", f"{score:.2f}" if score is not None else "—"],
-        ["Equivalente (0–120):", f"{equivalente:.1f}" if equivalente is not None else "—"],
-        ["Nivel:", nivel],
-    ]
-    meta_table = Table(meta_data, colWidths=[55 * mm, 120 * mm])
-    meta_table.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-        ("FONTNAME", (0, 0), (-1, -1), "Helvetica"),
-        ("FONTSIZE", (0, 0), (-1, -1), 10),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-    ]))
-    story.append(meta_table)
-    story.append(Spacer(1, 12))
-
-    # Conductas
-    story.append(Paragraph("<b>Conductas Sello</b>", styles["Heading3"]))
-    cond_rows = [["Conducta", "Ponderación", "Cumplimiento"]]
-    for c in conductas:
-        r = resp_conductas.get(c.id)
-        cond_rows.append([c.conducta, f"{c.ponderacion}%", (r.cumplimiento if r else "—")])
-    cond_table = Table(cond_rows, colWidths=[110 * mm, 30 * mm, 35 * mm])
-    cond_table.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-        ("FONTSIZE", (0, 0), (-1, -1), 9),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-    ]))
-    story.append(cond_table)
-    story.append(Spacer(1, 12))
-
-    # Objetivos
-    story.append(Paragraph("<b>Objetivos de Gestión</b>", styles["Heading3"]))
-    obj_rows = [["Objetivo", "Ponderación", "Cumplimiento"]]
-    for o in objetivos:
-        r = resp_objetivos.get(o.id)
-        obj_rows.append([o.objetivo, f"{o.ponderacion}%", (r.cumplimiento if r else "—")])
-    obj_table = Table(obj_rows, colWidths=[110 * mm, 30 * mm, 35 * mm])
-    obj_table.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-        ("FONTSIZE", (0, 0), (-1, -1), 9),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-    ]))
-    story.append(obj_table)
-    story.append(Spacer(1, 12))
-
-    # Comentarios
-    story.append(Paragraph("<b>Comentarios</b>", styles["Heading3"]))
-    comm_data = [
-        ["Fortalezas", evaluacion.fortalezas or "—"],
-        ["Oportunidades de mejora", evaluacion.oportunidades_mejora or "—"],
-        ["Resumen", evaluacion.resumen_comentarios or "—"],
-        ["Retroalimentación", evaluacion.retroalimentacion or "—"],
-    ]
-    comm_table = Table(comm_data, colWidths=[55 * mm, 120 * mm])
-    comm_table.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
-        ("BACKGROUND", (0, 0), (0, -1), colors.whitesmoke),
-        ("FONTSIZE", (0, 0), (-1, -1), 9),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-    ]))
-    story.append(comm_table)
-    story.append(Spacer(1, 22))
-
-    # Firmas
-    firmas = Table(
-        [
-            ["", ""],
-            ["______________________________", "______________________________"],
-            ["Cristian Moscoso Muñoz", coordinador.nombre_completo],
-            ["Director de Carrera", "Coordinador(a) de Carrera"],
-            ["INACAP Sede Arica", ""],
-        ],
-        colWidths=[85 * mm, 85 * mm]
+
+# ---------- TAREAS (polling de estado) ----------
+
+def estado_tarea(request, tarea_id: int):
+    t = get_object_or_404(Tarea, id=tarea_id)
+    return JsonResponse(
+        {
+            "id": t.id,
+            "tipo": t.tipo,
+            "estado": t.estado,
+            "intentos": t.intentos,
+            "ejecutar_desde": t.ejecutar_desde.isoformat(),
+            "resultado": t.resultado,
+            "error": t.error.strip().splitlines()[-1] if t.error else "",
+        }
     )
-    firmas.setStyle(TableStyle([
-        ("ALIGN", (0, 1), (-1, -1), "CENTER"),
-        ("FONTSIZE", (0, 0), (-1, -1), 9),
-        ("TOPPADDING", (0, 1), (-1, 1), 18),
-    ]))
-    story.append(firmas)
-
-    doc.build(story)
-
-    pdf = buffer.getvalue()
-    buffer.close()
-
-    filename = f"acta_{numero_acta}.pdf"
-    resp = HttpResponse(pdf, content_type="application/pdf")
-    resp["Content-Disposition"] = f'inline; filename="{filename}"'
-    return resp
+
+
+# ---------- ACTA (HTML + PDF) ----------
+
+# ReportLab es CPU-bound: se ejecuta fuera del event loop en un pool acotado
+# (atencion.limitador), así un worker ASGI sigue atendiendo otras peticiones
+# mientras se arma el PDF y una ráfaga de PDFs recibe 503 en vez de encolarse.
+
+def metricas_pdf(request):
+    """Estado del limitador de PDFs de este proceso (JSON)."""
+    return JsonResponse(get_limitador().estadisticas())
+
+
+@solo_lectura
+async def acta_evaluacion(request, evaluacion_id: int):
+    """
+    Acta en el formato pedido con ?format= (html por defecto, pdf, json, txt).
+    """
+    formato = request.GET.get("format") or "html"
+    renderer = RENDERERS.get(formato)
+    if renderer is None:
+        raise Http404("Formato de acta no soportado")
+
+    # Evaluación cerrada: el acta sale entera del snapshot (una lectura por PK).
+    # Una reabierta se arma en vivo aunque le quede un snapshot o PDF anterior.
+    snapshot = await ActaSnapshot.objects.filter(evaluacion_id=evaluacion_id, evaluacion__cerrada=True).afirst()
+    if snapshot is not None:
+        acta = acta_desde_snapshot(snapshot)
+        if formato == "pdf":
+            # PDF ya generado por la cola de tareas
+            evaluacion = await Evaluacion.objects.only("acta_pdf").aget(id=evaluacion_id)
+            if evaluacion.acta_pdf:
+                return FileResponse(
+                    evaluacion.acta_pdf.open("rb"),
+                    content_type="application/pdf",
+                    filename=renderer.nombre_archivo(acta),
+                )
+    else:
+        try:
+            evaluacion = await Evaluacion.objects.select_related("coordinador", "periodo").aget(id=evaluacion_id)
+        except Evaluacion.DoesNotExist:
+            raise Http404("Evaluación no encontrada")
+        acta = await acargar_acta(evaluacion)
+
+    if formato == "pdf":
+        try:
+            # El mismo acta pedida a la vez por varios: un solo render (la clave es su contenido)
+            huella = hashlib.sha256(json.dumps(acta.as_dict(), sort_keys=True).encode()).hexdigest()
+            contenido = await acompartido(f"acta_pdf:{huella}", get_limitador().ejecutar, renderer.render, acta)
+        except Saturado as e:
+            resp = HttpResponse(
+                "Se están generando muchas actas PDF. Intenta nuevamente en unos segundos.",
+                status=503,
+                content_type="text/plain; charset=utf-8",
+            )
+            resp["Retry-After"] = str(e.retry_after)
+            return resp
+    else:
+        contenido = renderer.render(acta, request)
+    return respuesta_acta(contenido, renderer, acta)
@@ -3,6 +3,13 @@ ASGI config for mgd project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Las vistas de lectura (dashboard y acta) son async: con un servidor ASGI, p.ej.
+
+    uvicorn mgd.asgi:application --workers 2
+
+un solo worker atiende muchas peticiones concurrentes y los PDFs se arman en
+un pool acotado de hilos (ver ACTA_PDF_WORKERS en settings).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
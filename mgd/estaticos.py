@@ -0,0 +1,144 @@
+"""
+Archivos estáticos servidos por la propia app (sin CDN ni servidor aparte).
+
+- StaticComprimidoStorage: nombres con hash (ManifestStaticFilesStorage) y,
+  al hacer collectstatic, variantes precomprimidas .gz y .br (si está
+  instalado el paquete opcional `brotli`).
+- servir_estatico: entrega desde STATIC_ROOT la variante que acepte el
+  navegador, con caché de un año (immutable) para los nombres con hash y
+  304 por ETag (If-None-Match) o If-Modified-Since.
+"""
+import gzip
+import mimetypes
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se generan .gz
+    brotli = None
+
+
+EXTENSIONES_COMPRIMIBLES = {".css", ".js", ".svg", ".map", ".json", ".txt", ".html", ".xml", ".ico"}
+# Archivos muy chicos no ganan nada comprimidos
+TAMANO_MINIMO = 512
+
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_CORTO = "public, max-age=300"
+
+
+def _comprimir(ruta: Path):
+    datos = ruta.read_bytes()
+    if len(datos) < TAMANO_MINIMO:
+        return
+    variantes = [(".gz", gzip.compress(datos, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variantes.append((".br", brotli.compress(datos, quality=11)))
+    for ext, comprimido in variantes:
+        if len(comprimido) < len(datos):
+            ruta.with_name(ruta.name + ext).write_bytes(comprimido)
+
+
+class StaticComprimidoStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # Originales y copias con hash (ambas pueden pedirse)
+        nombres = set(paths) | set(self.hashed_files.values())
+        for nombre in nombres:
+            ruta = Path(self.path(nombre))
+            if ruta.suffix in EXTENSIONES_COMPRIMIBLES and ruta.is_file():
+                _comprimir(ruta)
+
+
+@lru_cache(maxsize=1)
+def _nombres_con_hash():
+    return frozenset(getattr(staticfiles_storage, "hashed_files", {}).values())
+
+
+def _codificaciones_aceptadas(accept_encoding: str):
+    """{codificación: q} de un Accept-Encoding; las con q=0 quedan fuera."""
+    aceptadas = {}
+    for parte in accept_encoding.split(","):
+        token, *parametros = [p.strip() for p in parte.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for parametro in parametros:
+            nombre, _, valor = parametro.partition("=")
+            if nombre.strip().lower() == "q":
+                try:
+                    q = float(valor)
+                except ValueError:
+                    q = 0.0
+        aceptadas[token.lower()] = q
+    # "*" cubre las codificaciones no nombradas
+    comodin = aceptadas.pop("*", None)
+    if comodin is not None:
+        for codificacion in ("br", "gzip"):
+            aceptadas.setdefault(codificacion, comodin)
+    return {c: q for c, q in aceptadas.items() if q > 0}
+
+
+def _elegir_variante(ruta: Path, accept_encoding: str):
+    aceptadas = _codificaciones_aceptadas(accept_encoding)
+    # Mayor q primero; a igual q, brotli antes que gzip (sorted es estable)
+    candidatas = sorted((("br", ".br"), ("gzip", ".gz")), key=lambda c: -aceptadas.get(c[0], 0))
+    for codificacion, ext in candidatas:
+        if codificacion in aceptadas:
+            variante = ruta.with_name(ruta.name + ext)
+            if variante.is_file():
+                return variante, codificacion
+    return ruta, None
+
+
+def _etag(archivo: Path, codificacion):
+    # Por variante: la .gz y la .br son representaciones distintas del mismo archivo
+    stat = archivo.stat()
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}{"-" + codificacion if codificacion else ""}"'
+
+
+def _coincide_etag(if_none_match: str, etag):
+    etiquetas = [e.strip().removeprefix("W/") for e in if_none_match.split(",")]
+    return "*" in etiquetas or etag in etiquetas
+
+
+def servir_estatico(request, path):
+    raiz = Path(settings.STATIC_ROOT).resolve()
+    ruta = (raiz / path).resolve()
+    if raiz not in ruta.parents or not ruta.is_file():
+        raise Http404("Archivo estático no encontrado")
+
+    archivo, codificacion = _elegir_variante(ruta, request.headers.get("Accept-Encoding", ""))
+    mtime = archivo.stat().st_mtime
+    etag = _etag(archivo, codificacion)
+    cabeceras = {
+        "ETag": etag,
+        "Last-Modified": http_date(mtime),
+        "Vary": "Accept-Encoding",
+        "Cache-Control": CACHE_INMUTABLE if path in _nombres_con_hash() else CACHE_CORTO,
+    }
+
+    # If-None-Match manda sobre If-Modified-Since (RFC 9110 13.2.2)
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        no_modificado = _coincide_etag(if_none_match, etag)
+    else:
+        no_modificado = not was_modified_since(request.headers.get("If-Modified-Since"), mtime)
+    if no_modificado:
+        resp = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(ruta.name)
+        resp = FileResponse(archivo.open("rb"), content_type=content_type or "application/octet-stream")
+        if codificacion:
+            resp["Content-Encoding"] = codificacion
+    for nombre, valor in cabeceras.items():
+        resp[nombre] = valor
+    return resp
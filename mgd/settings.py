@@ -32,6 +32,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'atencion.sedes.SedeMiddleware',
+    'atencion.replicas.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,6 +73,27 @@ DATABASES = {
     }
 }
 
+# SEDES: alias de DATABASES de cada sede (atencion.sedes.RouterSedes).
+# Varias sedes pueden compartir "default"; para separar una, agregar su base,
+# p. ej. 'sede_iquique': {..., 'NAME': BASE_DIR / 'db_iquique.sqlite3'},
+# mapearla aquí y correr `python manage.py migrate --database sede_iquique`.
+SEDES = {
+    'Arica': 'default',
+}
+
+# RÉPLICAS: alias primario -> alias de solo lectura (atencion.replicas). Las
+# vistas de reportes (@solo_lectura) y exportar_actas leen de la réplica; tras
+# un POST el navegador lee de la primaria por REPLICA_PEGADO_SEGUNDOS.
+# Para probar en local con una copia de SQLite (cp db.sqlite3 db_replica.sqlite3):
+#   DATABASES['replica'] = {'ENGINE': 'django.db.backends.sqlite3',
+#                           'NAME': BASE_DIR / 'db_replica.sqlite3',
+#                           'TEST': {'MIRROR': 'default'}}
+#   REPLICAS = {'default': 'replica'}
+REPLICAS = {}
+REPLICA_PEGADO_SEGUNDOS = 10
+
+DATABASE_ROUTERS = ['atencion.replicas.RouterReplicas', 'atencion.sedes.RouterSedes']
+
 
 # VALIDACIÓN DE CONTRASEÑAS
 AUTH_PASSWORD_VALIDATORS = [
@@ -89,8 +112,68 @@ USE_TZ = True
 
 
 # ARCHIVOS ESTÁTICOS
+# `collectstatic` copia a STATIC_ROOT con nombres con hash + variantes .gz/.br
+# (mgd/estaticos.py); la propia app los sirve con caché de largo plazo.
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'mgd.estaticos.StaticComprimidoStorage'},
+    # Evidencias KPI: nombre = SHA-256 del contenido (sin duplicados)
+    'evidences': {'BACKEND': 'apps.desempenho.storage.ContentAddressedStorage'},
+}
+
+
+# ARCHIVOS SUBIDOS / GENERADOS (p.ej. PDFs de actas)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Las subidas van siempre a un archivo temporal (nunca enteras a memoria)
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+
+# Tamaño máximo de una evidencia subida
+EVIDENCE_MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+
+# ACTAS PDF
+# Hilos dedicados a armar PDFs con ReportLab (por proceso). Acota el CPU que
+# pueden tomar los PDFs sin bloquear el event loop en despliegues ASGI.
+ACTA_PDF_WORKERS = 2
+# Backpressure (atencion.limitador): PDFs esperando por proceso antes de
+# responder 503 + Retry-After, y segundos máximos de espera en cola.
+ACTA_PDF_COLA = 4
+ACTA_PDF_ESPERA_MAX = 10
+ACTA_PDF_RETRY_AFTER = 5
+# Cupos compartidos por todos los procesos del host (lock fcntl); 0 = sin límite por host.
+ACTA_PDF_SLOTS_HOST = 0
+ACTA_PDF_SLOTS_DIR = None
+
+# Fuente TTF a embeber en el PDF (ReportLab incluye solo los glifos usados).
+# None = Helvetica estándar, sin embeber: PDF más liviano y render más rápido.
+ACTA_PDF_FUENTE = None
+ACTA_PDF_FUENTE_NEGRITA = None
+
+
+# CACHÉ
+# Filas de los dashboards (panel de gestión y KPI) y coalescencia entre
+# procesos. La LocMemCache es de cada proceso: sirve con un solo proceso web,
+# pero lo que calienta el worker (procesar_tareas / precalentar_periodo) no
+# llega a la web. En producción, una caché compartida, p. ej.:
+#   {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache",
+#                "LOCATION": "redis://127.0.0.1:6379"}}
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+# COALESCENCIA (atencion.coalescencia)
+# Segundos máximos que un request espera el cálculo idéntico de otro (panel,
+# PDF) antes de calcular por su cuenta. Con una caché compartida en CACHES
+# (Redis/Memcached) la coalescencia alcanza a todos los procesos; con la caché
+# local por defecto es solo dentro de cada proceso (sin pasar por la caché).
+COALESCENCIA_ESPERA_MAX = 30
 
 
 # DEFAULT
@@ -0,0 +1,90 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .estaticos import CACHE_CORTO, CACHE_INMUTABLE, _codificaciones_aceptadas, servir_estatico
+
+
+class CodificacionesAceptadasTests(SimpleTestCase):
+    def test_q_cero_excluye(self):
+        self.assertEqual(_codificaciones_aceptadas("gzip, br;q=0"), {"gzip": 1.0})
+
+    def test_comodin_cubre_las_no_nombradas(self):
+        self.assertEqual(_codificaciones_aceptadas("*;q=0.5, gzip"), {"gzip": 1.0, "br": 0.5})
+        self.assertEqual(_codificaciones_aceptadas("*, br;q=0"), {"gzip": 1.0})
+
+    def test_q_invalido_vale_cero(self):
+        self.assertEqual(_codificaciones_aceptadas("gzip;q=abc, BR"), {"br": 1.0})
+
+
+class ServirEstaticoTests(SimpleTestCase):
+    """Variantes .br/.gz desde STATIC_ROOT, cabeceras de caché y 304."""
+
+    def setUp(self):
+        base = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, base, ignore_errors=True)
+        self.raiz = base / "staticfiles"
+        self.raiz.mkdir()
+        ajustes = override_settings(STATIC_ROOT=self.raiz)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        parche = mock.patch("mgd.estaticos._nombres_con_hash", return_value=frozenset({"css/app.1a2b3c.css"}))
+        parche.start()
+        self.addCleanup(parche.stop)
+
+        (self.raiz / "css").mkdir()
+        for nombre in ("app.css", "app.1a2b3c.css"):
+            (self.raiz / "css" / nombre).write_bytes(b"body{}")
+            (self.raiz / "css" / f"{nombre}.gz").write_bytes(b"gz")
+            (self.raiz / "css" / f"{nombre}.br").write_bytes(b"br")
+
+    def get(self, path, **cabeceras):
+        return servir_estatico(RequestFactory().get(f"/static/{path}", headers=cabeceras), path)
+
+    def contenido(self, resp):
+        return b"".join(resp.streaming_content)
+
+    def test_elige_variante_por_q(self):
+        casos = [
+            ("gzip, br", "br", b"br"),  # a igual q, brotli
+            ("gzip;q=1, br;q=0.5", "gzip", b"gz"),
+            ("gzip, br;q=0", "gzip", b"gz"),
+            ("*", "br", b"br"),
+            ("identity", None, b"body{}"),
+        ]
+        for accept, codificacion, cuerpo in casos:
+            with self.subTest(accept):
+                resp = self.get("css/app.css", accept_encoding=accept)
+                self.assertEqual(resp.get("Content-Encoding"), codificacion)
+                self.assertEqual(self.contenido(resp), cuerpo)
+                self.assertEqual(resp["Content-Type"], "text/css")
+                self.assertEqual(resp["Vary"], "Accept-Encoding")
+
+    def test_immutable_solo_con_hash(self):
+        self.assertEqual(self.get("css/app.1a2b3c.css")["Cache-Control"], CACHE_INMUTABLE)
+        self.assertEqual(self.get("css/app.css")["Cache-Control"], CACHE_CORTO)
+
+    def test_304_con_if_none_match(self):
+        etag = self.get("css/app.css", accept_encoding="gzip")["ETag"]
+        resp = self.get("css/app.css", accept_encoding="gzip", if_none_match=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual((resp["ETag"], resp["Vary"]), (etag, "Accept-Encoding"))
+        # Otra variante, otro ETag: no sirve el 304 de la .gz
+        self.assertEqual(self.get("css/app.css", accept_encoding="br", if_none_match=etag).status_code, 200)
+        # Comparación débil y listas de ETags (RFC 9110)
+        identidad = self.get("css/app.css")["ETag"]
+        self.assertEqual(self.get("css/app.css", if_none_match=f'"otro", W/{identidad}').status_code, 304)
+
+    def test_304_con_if_modified_since(self):
+        ultima = self.get("css/app.css")["Last-Modified"]
+        self.assertEqual(self.get("css/app.css", if_modified_since=ultima).status_code, 304)
+
+    def test_404_fuera_de_static_root(self):
+        (self.raiz.parent / "secreto.txt").write_text("x")
+        for path in ("../secreto.txt", "css/../../secreto.txt", "css/no_existe.css", "css"):
+            with self.subTest(path), self.assertRaises(Http404):
+                self.get(path)
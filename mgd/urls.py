@@ -1,14 +1,20 @@
+import re
+
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path
-from atencion import views
+from django.urls import include, path, re_path
+
+from mgd.estaticos import servir_estatico
 
 urlpatterns = [
     path("admin/", admin.site.urls),
 
-    path("dashboard/", views.dashboard_gestion, name="dashboard_gestion"),
-    path("crear-evaluacion/<int:coordinador_id>/<int:periodo_id>/", views.crear_evaluacion, name="crear_evaluacion"),
-    path("evaluacion/<int:evaluacion_id>/", views.evaluacion_detalle, name="evaluacion_detalle"),
+    # Dashboard, evaluación, acta (HTML y PDF con ?format=pdf) y tareas
+    path("", include("atencion.urls")),
+
+    # Dashboard KPI mensual (desempenho)
+    path("kpi/", include("apps.desempenho.urls")),
 
-    # ACTA: HTML y PDF (mismo endpoint con ?format=pdf)
-    path("acta/<int:evaluacion_id>/", views.acta_evaluacion, name="acta_evaluacion"),
+    # Estáticos desde STATIC_ROOT (con DEBUG, runserver los sirve antes de llegar aquí)
+    re_path(rf"^{re.escape(settings.STATIC_URL.lstrip('/'))}(?P<path>.+)$", servir_estatico),
 ]